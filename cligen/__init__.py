@@ -0,0 +1,4 @@
+
+# The version of cligen; generated code may differ between versions, so this value is included in
+# the fingerprints that decide whether previously-generated code is still up to date.
+__version__ = "0.1.0.dev0"
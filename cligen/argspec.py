@@ -17,30 +17,126 @@
 A class that contains a specification for a command-line arguments parser produced by cligen.
 """
 
+import sys
+
 
 class ArgumentParserSpec:
+    """
+    An immutable specification of a command-line arguments parser.
+    Instances are hashable and, for compactness, do not have a __dict__; an index of the arguments
+    by key is built when an instance is created so that find_argument() takes constant time.
+    """
+
+    __slots__ = (
+        "arguments", "help_argument", "response_files", "_arguments_by_key", "_hash",
+        "_fingerprint",
+    )
 
-    def __init__(self, arguments, help_argument):
+    def __init__(self, arguments, help_argument, response_files=False):
         """
         Initializes a new instance of ArgumentParserSpec.
-        *arguments* must be a list or tuple containing ArgumentParserSpec.Argument objects, and
-        lists the arguments in this parser specification.
+        *arguments* must be an iterable of ArgumentParserSpec.Argument objects that lists the
+        arguments in this parser specification; it is stored as a tuple.
         *help_argument* must be one of the arguments from the given *arguments* that,
         when specified, will print the help screen; may be None if no help argument exists.
+        *response_files* must be a bool whose value is whether or not the generated code replaces
+        each command-line argument of the form "@path" with the arguments read from the file at
+        the given path (a "response file"); defaults to False.
         """
-        self.arguments = arguments
-        self.help_argument = help_argument
+        arguments = tuple(arguments)
+        arguments_by_key = {}
+        for argument in arguments:
+            for key in argument.keys:
+                arguments_by_key.setdefault(key, argument)
+
+        object.__setattr__(self, "arguments", arguments)
+        object.__setattr__(self, "help_argument", help_argument)
+        object.__setattr__(self, "response_files", response_files)
+        object.__setattr__(self, "_arguments_by_key", arguments_by_key)
+        object.__setattr__(self, "_hash", None)
+        object.__setattr__(self, "_fingerprint", None)
+
+    def find_argument(self, key):
+        """
+        Returns the argument that has the given key (e.g. "--output-file"), or None if there is no
+        such argument.  If more than one argument has the given key then the first of them is
+        returned.
+        """
+        return self._arguments_by_key.get(key)
+
+    def find_positional_argument(self):
+        """
+        Returns the argument whose values are the positional arguments specified on the command
+        line, that is, the first argument whose type is TYPE_POSITIONAL_LIST, or None if there is no
+        such argument.
+        """
+        for argument in self.arguments:
+            if argument.is_positional():
+                return argument
+        return None
+
+    def find_repeatable_arguments(self):
+        """
+        Returns a tuple of the arguments whose type is TYPE_REPEATABLE_STRING_VALUE, in the order
+        in which they are specified.
+        """
+        return tuple(x for x in self.arguments if x.type == x.TYPE_REPEATABLE_STRING_VALUE)
+
+    def canonical_form(self):
+        """
+        Returns a string that represents this specification, such that two specifications are
+        equal if, and only if, their canonical forms are equal.  It depends only on the arguments
+        and not on the formatting of the specification file from which they were parsed, such as
+        whitespace, comments, the order of XML attributes or the use of included files.
+        """
+        import json
+        data = {
+            "arguments": [x.canonical_data() for x in self.arguments],
+            "help_argument": (
+                None if self.help_argument is None else self.help_argument.canonical_data()),
+        }
+        # options are only included if they differ from their default values, so that adding an
+        # option does not change the canonical forms of existing specifications
+        if self.response_files:
+            data["response_files"] = True
+        return json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+    def fingerprint(self):
+        """
+        Returns a string whose value is the hexadecimal SHA-256 digest of canonical_form(), which
+        is suitable for use as a cache key that changes only when the meaning of the specification
+        changes.
+        """
+        if self._fingerprint is None:
+            import hashlib
+            fingerprint = hashlib.sha256(self.canonical_form().encode("ascii")).hexdigest()
+            object.__setattr__(self, "_fingerprint", fingerprint)
+        return self._fingerprint
+
+    def __setattr__(self, name, value):
+        raise AttributeError("{} objects are immutable".format(type(self).__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError("{} objects are immutable".format(type(self).__name__))
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(
+                self, "_hash", hash((self.arguments, self.help_argument, self.response_files)))
+        return self._hash
 
     def __eq__(self, other):
         try:
             other_arguments = other.arguments
             other_help_argument = other.help_argument
+            other_response_files = other.response_files
         except AttributeError:
             return False
         else:
             return (
                 self.arguments == other_arguments and
-                self.help_argument == other_help_argument
+                self.help_argument == other_help_argument and
+                self.response_files == other_response_files
             )
 
     def __ne__(self, other):
@@ -55,28 +151,97 @@ class ArgumentParserSpec:
         return (
             "ArgumentParserSpec("
             "arguments={0.arguments!r}, "
-            "help_argument={0.help_argument!r}"
+            "help_argument={0.help_argument!r}, "
+            "response_files={0.response_files!r}"
             ")"
         ).format(self)
 
+    class Builder:
+        """
+        Builds an ArgumentParserSpec programmatically, without a cligen XML specification file.
+        Example:
+            builder = ArgumentParserSpec.Builder()
+            builder.add_argument(keys=("-i", "--input-file"), help_text="The file to read")
+            builder.add_help_argument()
+            argspec = builder.build()
+        """
+
+        DEFAULT_HELP_KEYS = ("-h", "--help")
+        DEFAULT_HELP_TEXT = "Print the help information then exit"
+
+        def __init__(self):
+            self.arguments = []
+            self.help_argument = None
+            self.response_files = False
+
+        def add_argument(self, keys, help_text=None, type=None):
+            """
+            Adds an argument to the specification being built, after those already added.
+            *keys*, *help_text* and *type* have the same meanings as the arguments of the same
+            names of ArgumentParserSpec.Argument.__init__(), except that *help_text* may be
+            omitted and *type* may be omitted or None to use TYPE_STRING_VALUE.
+            Returns the ArgumentParserSpec.Argument object that was added.
+            """
+            if type is None:
+                type = ArgumentParserSpec.Argument.TYPE_STRING_VALUE
+            argument = ArgumentParserSpec.Argument(keys=keys, type=type, help_text=help_text)
+            self.arguments.append(argument)
+            return argument
+
+        def add_help_argument(self, keys=None, help_text=None):
+            """
+            Adds an argument that prints the help screen when specified, after those already
+            added, and makes it the help argument of the specification being built.
+            *keys* and *help_text* may be None (the default) to use DEFAULT_HELP_KEYS and
+            DEFAULT_HELP_TEXT, respectively.
+            Returns the ArgumentParserSpec.Argument object that was added.
+            """
+            argument = self.add_argument(
+                keys=keys if keys is not None else self.DEFAULT_HELP_KEYS,
+                help_text=help_text if help_text is not None else self.DEFAULT_HELP_TEXT,
+                type=ArgumentParserSpec.Argument.TYPE_BUILTIN_HELP,
+            )
+            self.help_argument = argument
+            return argument
+
+        def build(self):
+            """
+            Creates and returns an ArgumentParserSpec with the arguments added to this object.
+            """
+            return ArgumentParserSpec(
+                arguments=self.arguments,
+                help_argument=self.help_argument,
+                response_files=self.response_files,
+            )
+
     class Argument:
 
         TYPE_STRING_VALUE = "string"
         TYPE_BUILTIN_HELP = "help"
+        # an option that may be specified more than once, whose value is the list of the values
+        # specified to it, in order
+        TYPE_REPEATABLE_STRING_VALUE = "repeatable-string"
+        # the list of the positional arguments, including all arguments after "--"; its keys are
+        # not matched with the command-line arguments, and serve only to name it
+        TYPE_POSITIONAL_LIST = "positional-list"
+
+        __slots__ = ("keys", "type", "help_text", "_hash")
 
         def __init__(self, keys, type, help_text):
             """
             Initializes a new instance of this class.
-            *keys* must be a list or tuple of strings, each of which defines the keys that map to
-            this argument when specified on the command line (e.g. ["-o", "--output-file"]).
+            *keys* must be an iterable of strings, each of which defines the keys that map to
+            this argument when specified on the command line (e.g. ["-o", "--output-file"]); they
+            are interned and stored as a tuple.
             *type* the type of this argument; must be one of the TYPE_ constants defined in this
             class.
             *help_text* must be a string whose value is the text that will be displayed on a help
             screen to document this argument; may be None if no help is available.
             """
-            self.keys = keys
-            self.type = type
-            self.help_text = help_text
+            object.__setattr__(self, "keys", tuple(sys.intern(x) for x in keys))
+            object.__setattr__(self, "type", type)
+            object.__setattr__(self, "help_text", help_text)
+            object.__setattr__(self, "_hash", None)
 
         def supports_values(self):
             """
@@ -90,6 +255,27 @@ class ArgumentParserSpec:
             else:
                 return True
 
+        def is_list(self):
+            """
+            Returns whether or not the value of this argument is a list of the values specified to
+            it, rather than the last value specified to it.
+            """
+            return self.type in (self.TYPE_REPEATABLE_STRING_VALUE, self.TYPE_POSITIONAL_LIST)
+
+        def is_positional(self):
+            """
+            Returns whether or not the values of this argument are the positional arguments, rather
+            than values that follow one of its keys on the command line.
+            """
+            return self.type == self.TYPE_POSITIONAL_LIST
+
+        def canonical_data(self):
+            """
+            Returns a JSON-serializable object that represents this argument, for use in
+            ArgumentParserSpec.canonical_form().
+            """
+            return {"keys": list(self.keys), "type": self.type, "help_text": self.help_text}
+
         def __eq__(self, other):
             try:
                 other_keys = other.keys
@@ -107,6 +293,17 @@ class ArgumentParserSpec:
         def __ne__(self, other):
             return not self.__eq__(other)
 
+        def __setattr__(self, name, value):
+            raise AttributeError("{} objects are immutable".format(type(self).__name__))
+
+        def __delattr__(self, name):
+            raise AttributeError("{} objects are immutable".format(type(self).__name__))
+
+        def __hash__(self):
+            if self._hash is None:
+                object.__setattr__(self, "_hash", hash((self.keys, self.type, self.help_text)))
+            return self._hash
+
         def __str__(self):
             return "/".join(self.keys)
 
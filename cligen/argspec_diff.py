@@ -0,0 +1,165 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Comparison of ArgumentParserSpec objects in terms of their arguments.
+"""
+
+
+class ArgumentSpecDiff:
+    """
+    The differences between two ArgumentParserSpec objects, listing the arguments that were added,
+    removed and changed, and the options that were changed.  An argument of the new specification
+    is matched with the first unmatched argument of the old specification that has one of its
+    keys, so that changing some, but not all, of the keys of an argument is reported as a change
+    rather than as a removal and an addition.
+    Example:
+        diff = ArgumentSpecDiff(old_argspec, new_argspec)
+        if diff:
+            print(diff)
+    """
+
+    def __init__(self, old_argspec, new_argspec):
+        """
+        Initializes a new instance of this class.
+        *old_argspec* and *new_argspec* must be the ArgumentParserSpec objects to compare.
+        """
+        self.old_argspec = old_argspec
+        self.new_argspec = new_argspec
+        # the arguments of new_argspec that do not match any argument of old_argspec
+        self.added = []
+        # the arguments of old_argspec that do not match any argument of new_argspec
+        self.removed = []
+        # Change objects for the matching arguments that differ, in the order of new_argspec
+        self.changed = []
+        # whether the matching arguments are in a different order in new_argspec
+        self.reordered = False
+        # the names of the options (attributes of ArgumentParserSpec other than its arguments) whose
+        # values differ, in the order of OPTION_DESCRIPTIONS
+        self.changed_options = [
+            name for name in self.OPTION_DESCRIPTIONS
+            if getattr(old_argspec, name) != getattr(new_argspec, name)
+        ]
+
+        old_indices_by_key = {}
+        for (index, argument) in enumerate(old_argspec.arguments):
+            for key in argument.keys:
+                old_indices_by_key.setdefault(key, []).append(index)
+
+        matched_old_indices = set()
+        last_old_index = -1
+        for new_argument in new_argspec.arguments:
+            old_index = self._match(new_argument, old_indices_by_key, matched_old_indices)
+            if old_index is None:
+                self.added.append(new_argument)
+                continue
+
+            matched_old_indices.add(old_index)
+            if old_index < last_old_index:
+                self.reordered = True
+            last_old_index = old_index
+
+            old_argument = old_argspec.arguments[old_index]
+            attribute_names = self._changed_attribute_names(old_argument, new_argument)
+            if attribute_names:
+                self.changed.append(self.Change(old_argument, new_argument, attribute_names))
+
+        self.removed.extend(
+            argument for (index, argument) in enumerate(old_argspec.arguments)
+            if index not in matched_old_indices
+        )
+
+    OPTION_DESCRIPTIONS = {
+        "response_files": "response files",
+    }
+
+    @staticmethod
+    def _match(argument, old_indices_by_key, matched_old_indices):
+        """
+        Returns the index of the first unmatched old argument that has one of the keys of the given
+        argument, or None if there is no such argument.
+        """
+        candidate_indices = [
+            index
+            for key in argument.keys
+            for index in old_indices_by_key.get(key, ())
+            if index not in matched_old_indices
+        ]
+        return min(candidate_indices) if candidate_indices else None
+
+    def _changed_attribute_names(self, old_argument, new_argument):
+        attribute_names = [
+            name for name in ("keys", "type", "help_text")
+            if getattr(old_argument, name) != getattr(new_argument, name)
+        ]
+        if ((old_argument is self.old_argspec.help_argument) !=
+                (new_argument is self.new_argspec.help_argument)):
+            attribute_names.append("help_argument")
+        return tuple(attribute_names)
+
+    def __bool__(self):
+        return bool(
+            self.added or self.removed or self.changed or self.reordered or self.changed_options)
+
+    def lines(self):
+        """
+        Returns a list of strings, each of which concisely describes one of the differences, in a
+        form suitable for printing, such as in the log of a continuous integration build.
+        """
+        lines = []
+        lines.extend("removed argument {}".format(x) for x in self.removed)
+        lines.extend("added argument {}".format(x) for x in self.added)
+        lines.extend("{}".format(x) for x in self.changed)
+        if self.reordered:
+            lines.append("reordered arguments")
+        lines.extend(
+            "changed option {} from {} to {}".format(
+                self.OPTION_DESCRIPTIONS[x], getattr(self.old_argspec, x),
+                getattr(self.new_argspec, x))
+            for x in self.changed_options
+        )
+        return lines
+
+    def __str__(self):
+        return "\n".join(self.lines())
+
+    class Change:
+
+        ATTRIBUTE_DESCRIPTIONS = {
+            "keys": "keys",
+            "type": "type",
+            "help_text": "help text",
+            "help_argument": "help argument",
+        }
+
+        def __init__(self, old_argument, new_argument, attribute_names):
+            """
+            Initializes a new instance of this class.
+            *old_argument* and *new_argument* must be the ArgumentParserSpec.Argument objects of
+            the old and new specifications, respectively, that were matched.
+            *attribute_names* must be a tuple of strings whose values are the names of the
+            attributes of the arguments that differ ("keys", "type" or "help_text"), followed by
+            "help_argument" if only one of them is the help argument of its specification.
+            """
+            self.old_argument = old_argument
+            self.new_argument = new_argument
+            self.attribute_names = attribute_names
+
+        def __str__(self):
+            descriptions = [self.ATTRIBUTE_DESCRIPTIONS[x] for x in self.attribute_names]
+            if "keys" in self.attribute_names:
+                return "changed argument {} to {} ({})".format(
+                    self.old_argument, self.new_argument, ", ".join(descriptions))
+            return "changed argument {} ({})".format(self.new_argument, ", ".join(descriptions))
@@ -0,0 +1,128 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Detection of problems in ArgumentParserSpec objects that would produce broken generated code.
+"""
+
+
+class ArgumentSpecValidator:
+    """
+    Checks an ArgumentParserSpec for problems, such as two arguments with the same key.
+    Every argument and key is visited once and looked up in hash tables, so the time taken grows
+    linearly with the size of the specification, and all problems are found in a single pass.
+    """
+
+    def __init__(self, variable_name_func=None, reserved_variable_names=()):
+        """
+        Initializes a new instance of this class.
+        *variable_name_func* must be a callable that takes an ArgumentParserSpec.Argument object
+        and returns a string whose value is the name of the variable that stores the argument's
+        value in the generated code, such as the argument_variable_name() method of
+        cligen.targets.Jinja2TargetLanguageBase; may be None (the default) to not check variable
+        names.
+        *reserved_variable_names* must be an iterable of strings whose values are the names that
+        the variables of arguments must not have because the generated code uses them for other
+        purposes, such as the RESERVED_VARIABLE_NAMES attribute of
+        cligen.targets.Jinja2TargetLanguageBase; ignored if *variable_name_func* is None.
+        """
+        self.variable_name_func = variable_name_func
+        self.reserved_variable_names = frozenset(reserved_variable_names)
+
+    def validate(self, argspec):
+        """
+        Checks the given ArgumentParserSpec for problems.
+        Raises self.Error if one or more problems are found, whose *problems* attribute is the list
+        returned from find_problems().
+        """
+        problems = self.find_problems(argspec)
+        if problems:
+            raise self.Error(problems)
+
+    def find_problems(self, argspec):
+        """
+        Returns a list of strings whose values describe the problems in the given
+        ArgumentParserSpec, in the order of the arguments in which they occur; the list is empty if
+        there are no problems.
+        """
+        problems = []
+        arguments_by_key = {}
+        arguments_by_variable_name = {}
+        positional_argument = None
+
+        for (index, argument) in enumerate(argspec.arguments):
+            if not argument.keys:
+                problems.append("argument #{} has no keys".format(index + 1))
+                continue
+
+            if argument.is_positional():
+                if positional_argument is None:
+                    positional_argument = argument
+                else:
+                    problems.append(
+                        "argument {} is a positional argument, as is argument {} (at most one "
+                        "argument may be)".format(argument, positional_argument))
+
+            for key in argument.keys:
+                if argument.is_positional():
+                    if self.is_option(key):
+                        problems.append(
+                            "key of positional argument {} is an option: \"{}\" (must not start "
+                            "with \"-\")".format(argument, key))
+                elif not self.is_option(key):
+                    problems.append(
+                        "key of argument {} is not an option: \"{}\" (must start with \"-\" "
+                        "followed by a character other than \"-\")".format(argument, key))
+
+                other_argument = arguments_by_key.setdefault(key, argument)
+                if other_argument is not argument:
+                    problems.append("key {} of argument {} is also a key of argument {}".format(
+                        key, argument, other_argument))
+
+            if self.variable_name_func is not None:
+                variable_name = self.variable_name_func(argument)
+                if not variable_name:
+                    problems.append(
+                        "argument {} has no variable name (its keys must contain at least one "
+                        "letter or digit)".format(argument))
+                    continue
+
+                if variable_name in self.reserved_variable_names:
+                    problems.append(
+                        "variable name of argument {} is reserved for use by the generated code: "
+                        "{}".format(argument, variable_name))
+
+                other_argument = arguments_by_variable_name.setdefault(variable_name, argument)
+                if other_argument is not argument:
+                    problems.append(
+                        "variable name of argument {} is the same as that of argument {}: "
+                        "{}".format(argument, other_argument, variable_name))
+
+        return problems
+
+    @staticmethod
+    def is_option(key):
+        """
+        Returns whether or not the given argument key is an option, that is, a string that starts
+        with "-" followed by at least one character other than "-"; other command-line arguments
+        are treated as positional arguments by the generated code.
+        """
+        return key.startswith("-") and key.strip("-") != ""
+
+    class Error(Exception):
+
+        def __init__(self, problems):
+            super().__init__("; ".join(problems))
+            self.problems = problems
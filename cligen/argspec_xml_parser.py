@@ -17,66 +17,228 @@
 The parser for the cligen XML specification file.
 """
 
-import xml.etree.ElementTree
+import collections
+import os
+import threading
 
 from cligen.argspec import ArgumentParserSpec
+from cligen.xml_backend import ElementTreeXmlBackend
+from cligen.xml_backend import default_xml_backend
+from cligen.xml_limits import XmlLimits
 
 
 class ArgumentSpecParser:
 
     XML_NAMESPACE = "http://schemas.cligen.io/arguments"
 
-    def parse_string(self, xml_string):
-        try:
-            root_element = xml.etree.ElementTree.fromstring(xml_string)
-        except xml.etree.ElementTree.ParseError as e:
-            raise self.XmlParseError("{}".format(e))
-        else:
-            return self._parse_document(root_element)
+    # incremented whenever a change to this class changes the ArgumentParserSpec objects that it
+    # produces, so that those cached from earlier versions are not used
+    VERSION = "2"
+
+    def __init__(self, xml_backend=None, include_cache=None, limits=None):
+        """
+        Initializes a new instance of this class.
+        *xml_backend* must be the cligen.xml_backend.XmlBackend object with which to parse XML
+        documents; may be None (the default) to use the one returned from
+        cligen.xml_backend.default_xml_backend().  Regardless of the backend, the results and the
+        messages of the errors raised are those of the ElementTreeXmlBackend.
+        *include_cache* must be the IncludedFileCache object in which to cache the files included
+        by the parsed documents; may be None (the default) to use the one shared by all instances
+        of this class in this process.
+        *limits* must be the cligen.xml_limits.XmlLimits object whose limits the parsed documents,
+        and the files that they include, must not exceed; may be None (the default) to use an
+        XmlLimits object with the default limits.  Exceeding a limit raises self.CligenXmlError.
+        """
+        if xml_backend is None:
+            xml_backend = default_xml_backend()
+        if include_cache is None:
+            include_cache = SHARED_INCLUDE_CACHE
+        if limits is None:
+            limits = XmlLimits()
+        self.xml_backend = xml_backend
+        self.include_cache = include_cache
+        self.limits = limits
+        # the absolute paths of the files included by the most recently parsed document
+        self.included_file_paths = ()
+        self._base_dir = None
+        self._include_stack = ()
+        # the depth to which the document being parsed is nested in included files; 0 if it is not
+        # an included file
+        self._include_depth = 0
+
+    def parse_string(self, xml_string, base_dir=None):
+        """
+        Parses the given cligen XML specification, which must be a string or bytes.
+        *base_dir* must be a string whose value is the path of the directory relative to which the
+        paths of included files are resolved; may be None (the default) to use the current
+        directory.
+        Returns the ArgumentParserSpec object that the specification specifies.
+        Raises self.Error if parsing it fails.
+        """
+        return self._parse_spec(self._parse_string, xml_string, base_dir, ())
 
-    def parse_file(self, path):
+    def parse_file(self, path, base_dir=None):
+        """
+        Parses the cligen XML specification file at the given path, which may also be a file object
+        opened in binary mode from which to read the file.
+        The file is parsed incrementally, and each child element of the root element is discarded
+        as soon as it has been processed, so that the memory required does not grow with the number
+        of arguments in the file.
+        *base_dir* must be a string whose value is the path of the directory relative to which the
+        paths of included files are resolved; may be None (the default) to use the directory
+        containing the file if *path* is a string, or the current directory otherwise.
+        Returns the ArgumentParserSpec object that the file specifies.
+        Raises IOError if reading the file fails or self.Error if parsing it fails.
+        """
+        include_stack = ()
+        if isinstance(path, str):
+            include_stack = (os.path.realpath(path),)
+            if base_dir is None:
+                base_dir = os.path.dirname(os.path.abspath(path))
+        return self._parse_spec(self._parse_file, path, base_dir, include_stack)
+
+    def _parse_spec(self, parse_func, source, base_dir, include_stack):
+        self._base_dir = base_dir
+        self._include_stack = include_stack
+        data = self._parse(parse_func, source)
+        self.included_file_paths = tuple(data.included_file_states)
+        return self._create_argspec(data)
+
+    def _parse(self, parse_func, source):
+        """
+        Returns parse_func(xml_backend, source), invoked with self.xml_backend.  If that backend is
+        not the ElementTreeXmlBackend and it reports that the document is not well-formed or is not
+        supported then the document is parsed again with the ElementTreeXmlBackend, so that the
+        results and the messages of the errors do not depend on the backend.
+        """
+        xml_backend = self.xml_backend
         try:
-            doc = xml.etree.ElementTree.parse(path)
-        except xml.etree.ElementTree.ParseError as e:
-            raise self.XmlParseError("{}".format(e))
-        else:
-            root_element = doc.getroot()
-            return self._parse_document(root_element)
+            if not isinstance(xml_backend, ElementTreeXmlBackend):
+                try:
+                    return parse_func(xml_backend, source)
+                except (xml_backend.ParseError, xml_backend.UnsupportedDocument):
+                    xml_backend = ElementTreeXmlBackend()
+                    if hasattr(source, "seek"):
+                        source.seek(0)
+
+            try:
+                return parse_func(xml_backend, source)
+            except xml_backend.ParseError as e:
+                raise self.XmlParseError("{}".format(e))
+        except self.limits.LimitExceeded as e:
+            raise self.CligenXmlError("{}".format(e))
+
+    def _parse_string(self, xml_backend, xml_string):
+        self.limits.check_string(xml_string)
+        root_element = xml_backend.fromstring(xml_string)
+        return self._parse_document(root_element)
+
+    def _parse_fragment(self, path):
+        """
+        Parses the file at the given path, which was included by the document being parsed, with
+        a new parser so that the state of this parser is not disturbed.
+        Returns a ParsedFragment object.
+        """
+        parser = type(self)(
+            xml_backend=self.xml_backend, include_cache=self.include_cache, limits=self.limits)
+        parser._base_dir = os.path.dirname(path)
+        parser._include_stack = self._include_stack + (path,)
+        parser._include_depth = self._include_depth + 1
+        file_state = IncludedFileCache.file_state(path)
+        data = parser._parse(parser._parse_file, path)
+        return self.ParsedFragment(
+            arguments=tuple(data.arguments),
+            file_states=((path, file_state),) + tuple(data.included_file_states.items()),
+            element_count=data.element_count,
+            include_depth=data.include_depth + 1,
+        )
+
+    def _parse_file(self, xml_backend, source):
+        with self.limits.open(source) as f:
+            return self._parse_events(xml_backend.iterparse(f))
+
+    def _parse_events(self, events):
+        limits = self.limits
+        data = self.ParsedData()
+        # errors in the contents of the document are raised only after the entire document has been
+        # parsed successfully, so that XML syntax errors take precedence, as in parse_string(); the
+        # exceeding of limits, however, is raised immediately
+        error = None
+        root = None
+        depth = 0
+
+        for (event, element) in events:
+            if event == "start":
+                depth += 1
+                data.element_count += 1
+                limits.check_element_count(data.element_count)
+                limits.check_depth(depth)
+                if depth == 1:
+                    root = element
+                    try:
+                        self._check_root_element(root)
+                    except self.CligenXmlError as e:
+                        error = e
+                continue
+
+            depth -= 1
+            if depth == 1:
+                if error is None:
+                    try:
+                        self._parse_root_child_element(element, data)
+                    except self.CligenXmlError as e:
+                        error = e
+                del root[:]
+
+        if error is not None:
+            raise error
+        return data
 
     def _parse_document(self, root):
-        ns = {"cligen", self.XML_NAMESPACE}
+        self._check_root_element(root)
         data = self.ParsedData()
+        data.element_count = sum(1 for x in root.iter())
+        for element in root:
+            self._parse_root_child_element(element, data)
+        return data
 
+    def _check_root_element(self, root):
         expected_root_tag = self._qualified_tag("cligen")
         if root.tag != expected_root_tag:
             raise self.CligenXmlError(
                 "incorrect tag name of XML root element: {} (expected {})".format(
                     root.tag, expected_root_tag))
 
-        for element in root:
-            if self._is_qualified_tag(element, "argument"):
-                argument = self._parse_argument(element)
-                data.arguments.append(argument)
-            elif self._is_qualified_tag(element, "options"):
-                self._parse_options(element, data.options)
+    def _parse_root_child_element(self, element, data):
+        if self._is_qualified_tag(element, "argument"):
+            argument = self._parse_argument(element)
+            data.arguments.append(argument)
+        elif self._is_qualified_tag(element, "options"):
+            self._parse_options(element, data.options)
+        elif self._is_qualified_tag(element, "include"):
+            self._parse_include(element, data)
 
+    def _create_argspec(self, data):
+        builder = ArgumentParserSpec.Builder()
+        builder.arguments.extend(data.arguments)
+        builder.help_argument = data.help_argument
+        builder.response_files = data.options.response_files
         if data.options.default_help_argument:
-            help_argument = ArgumentParserSpec.Argument(
-                keys=("-h", "--help"),
-                type=ArgumentParserSpec.Argument.TYPE_BUILTIN_HELP,
-                help_text="Print the help information then exit",
-            )
-            data.arguments.append(help_argument)
-            data.help_argument = help_argument
-
-        return ArgumentParserSpec(
-            arguments=tuple(data.arguments),
-            help_argument=data.help_argument,
-        )
+            builder.add_help_argument()
+        return builder.build()
+
+    # the values of the "type" element of an argument, which are those of the corresponding
+    # ArgumentParserSpec.Argument.TYPE_ constants
+    ARGUMENT_TYPES = (
+        ArgumentParserSpec.Argument.TYPE_STRING_VALUE,
+        ArgumentParserSpec.Argument.TYPE_REPEATABLE_STRING_VALUE,
+        ArgumentParserSpec.Argument.TYPE_POSITIONAL_LIST,
+    )
 
     def _parse_argument(self, root):
         keys = []
         help_text = None
+        type = ArgumentParserSpec.Argument.TYPE_STRING_VALUE
 
         for element in root:
             if self._is_qualified_tag(element, "key"):
@@ -84,28 +246,87 @@ class ArgumentSpecParser:
                 keys.append(key)
             elif self._is_qualified_tag(element, "help"):
                 help_text = self._element_text(element)
+            elif self._is_qualified_tag(element, "type"):
+                type = self._element_text(element, default_value="").lower()
+                if type not in self.ARGUMENT_TYPES:
+                    raise self.CligenXmlError(
+                        "invalid text in element {}: {} (expected {})".format(
+                            element.tag, type, " or ".join(
+                                "\"{}\"".format(x) for x in self.ARGUMENT_TYPES)))
 
         return ArgumentParserSpec.Argument(
             keys=tuple(keys),
-            type=ArgumentParserSpec.Argument.TYPE_STRING_VALUE,
+            type=type,
             help_text=help_text,
         )
 
     def _parse_options(self, root, options):
         for element in root:
             if self._is_qualified_tag(element, "add-builtin-help-argument"):
-                value = self._element_text(element, default_value="").lower()
-                if value == "true":
-                    options.default_help_argument = True
-                elif value == "false":
-                    options.default_help_argument = False
-                else:
-                    raise self.CligenXmlError(
-                        "invalid text in element {}: {} (expected \"true\" or \"false\")".format(
-                            element.tag, value))
+                options.default_help_argument = self._element_bool(element)
+            elif self._is_qualified_tag(element, "response-files"):
+                options.response_files = self._element_bool(element)
 
         return options
 
+    def _element_bool(self, element):
+        value = self._element_text(element, default_value="").lower()
+        if value == "true":
+            return True
+        elif value == "false":
+            return False
+        else:
+            raise self.CligenXmlError(
+                "invalid text in element {}: {} (expected \"true\" or \"false\")".format(
+                    element.tag, value))
+
+    def _parse_include(self, element, data):
+        """
+        Adds the arguments of the cligen XML specification file referenced by the "href" attribute
+        of the given "include" element to the given ParsedData, in place of the element.  The
+        options of the included file are ignored.
+        The elements of the included file, and of the files that it includes, are added to the
+        number of elements of the document, and checked against the limit, each time that the file
+        is included, even if it was parsed only once; otherwise, a small document that includes a
+        file many times, which in turn includes another file many times, and so on, could produce
+        an arbitrarily large ArgumentParserSpec.
+        """
+        href = element.get("href")
+        if not href:
+            raise self.CligenXmlError("element {} must have a non-empty href attribute".format(
+                element.tag))
+
+        base_dir = self._base_dir if self._base_dir is not None else os.getcwd()
+        path = os.path.realpath(os.path.join(base_dir, href))
+        if path in self._include_stack:
+            raise self.CligenXmlError("file includes itself: {}".format(path))
+        self.limits.check_include_depth(self._include_depth + 1)
+
+        try:
+            fragment = self.include_cache.get(path, self._parse_fragment)
+        except IOError as e:
+            raise self.CligenXmlError("reading included file failed: {} ({})".format(
+                path, e.strerror))
+        except self.XmlParseError as e:
+            raise self.XmlParseError("{}: {}".format(path, e))
+        except self.CligenXmlError as e:
+            raise self.CligenXmlError("{}: {}".format(path, e))
+
+        # a cached fragment was parsed without regard to the files including it
+        for (fragment_path, file_state) in fragment.file_states:
+            if fragment_path in self._include_stack:
+                raise self.CligenXmlError("file includes itself: {}".format(fragment_path))
+
+        # a cached fragment may have been parsed at a lesser depth, so check the depth again
+        self.limits.check_include_depth(self._include_depth + fragment.include_depth)
+        data.element_count += fragment.element_count
+        self.limits.check_element_count(data.element_count)
+        data.include_depth = max(data.include_depth, fragment.include_depth)
+
+        data.arguments.extend(fragment.arguments)
+        for (fragment_path, file_state) in fragment.file_states:
+            data.included_file_states.setdefault(fragment_path, file_state)
+
     @classmethod
     def _qualified_tag(cls, tag):
         return "{{{}}}{}".format(cls.XML_NAMESPACE, tag)
@@ -139,8 +360,96 @@ class ArgumentSpecParser:
             self.arguments = []
             self.help_argument = None
             self.options = self.Options()
+            # maps the path of each file included, directly or indirectly, to its state, as returned
+            # from IncludedFileCache.file_state(), in the order in which the files were included; a
+            # file included many times is stored once, so that checking whether the files were
+            # modified takes time proportional to the number of distinct files included
+            self.included_file_states = collections.OrderedDict()
+            # the number of elements of the document, including those of the included files
+            self.element_count = 0
+            # the depth to which the included files are nested; 0 if no files are included
+            self.include_depth = 0
 
         class Options:
 
             def __init__(self):
                 self.default_help_argument = True
+                self.response_files = False
+
+    class ParsedFragment:
+
+        def __init__(self, arguments, file_states, element_count, include_depth):
+            """
+            Initializes a new instance of this class.
+            *arguments* must be a tuple of the ArgumentParserSpec.Argument objects specified by an
+            included file.
+            *file_states* must be a tuple of (path, state) pairs, where *path* is the real path of
+            the included file or of a file that it includes, directly or indirectly, and *state*
+            is the value returned from IncludedFileCache.file_state() for that path before it was
+            parsed; the first pair is that of the included file and each path occurs only once.
+            *element_count* must be an int whose value is the number of elements of the included
+            file, including those of the files that it includes.
+            *include_depth* must be an int whose value is the depth to which the included file and
+            the files that it includes are nested, where the included file has a depth of 1.
+            """
+            self.arguments = arguments
+            self.file_states = file_states
+            self.element_count = element_count
+            self.include_depth = include_depth
+
+
+class IncludedFileCache:
+    """
+    Stores the results of parsing files included by cligen XML specification files, so that a file
+    included by many specification files, such as in a batch run, is parsed only once.
+    An entry is used only while the modification time and size of the file, and those of every file
+    that it includes, are unchanged.  The methods of this class are thread-safe.
+    """
+
+    def __init__(self):
+        self._fragments = {}
+        self._lock = threading.Lock()
+
+    def get(self, path, parse_func):
+        """
+        Returns the ArgumentSpecParser.ParsedFragment for the file with the given real path, from
+        the cache if it is current, or from parse_func(path) otherwise, in which case the result is
+        stored in the cache.
+        """
+        with self._lock:
+            fragment = self._fragments.get(path)
+
+        if fragment is not None and self.is_current(fragment):
+            return fragment
+
+        fragment = parse_func(path)
+        with self._lock:
+            self._fragments[path] = fragment
+        return fragment
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+
+    @classmethod
+    def is_current(cls, fragment):
+        """
+        Returns whether none of the files from which the given fragment was parsed have changed.
+        """
+        return all(cls.file_state(path) == state for (path, state) in fragment.file_states)
+
+    @staticmethod
+    def file_state(path):
+        """
+        Returns a value that changes when the file at the given path is modified, or None if the
+        file cannot be accessed.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+
+# the IncludedFileCache used by ArgumentSpecParser objects by default
+SHARED_INCLUDE_CACHE = IncludedFileCache()
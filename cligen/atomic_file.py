@@ -0,0 +1,60 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Writes files atomically, so that concurrent readers never see a partially-written file.
+"""
+
+import binascii
+import os
+
+
+def random_hex_string(num_bytes):
+    """
+    Returns a string whose value is the hexadecimal representation of the given number of random
+    bytes, suitable for making the names of temporary files unique.
+    """
+    return binascii.hexlify(os.urandom(num_bytes)).decode("ascii")
+
+
+def write_file_atomically(path, write, binary=True):
+    """
+    Writes a file to the given path by writing it to a uniquely-named temporary file in the same
+    directory, which is then renamed to the given path.  The directory is created if it does not
+    exist.
+    *write* must be a callable that accepts one argument, the file object opened for writing, and
+    writes the contents of the file to it.
+    *binary* must be True to open the file in binary mode or False to open it in text mode, encoding
+    its contents as UTF-8.
+    Raises IOError if writing the file fails, after deleting the temporary file.
+    """
+    temp_path = "{}.{}.tmp".format(path, random_hex_string(8))
+    try:
+        dir_path = os.path.dirname(path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        if binary:
+            f = open(temp_path, "xb")
+        else:
+            f = open(temp_path, "xt", encoding="utf8")
+        with f:
+            write(f)
+        os.replace(temp_path, path)
+    except IOError:
+        try:
+            os.unlink(temp_path)
+        except IOError:
+            pass
+        raise
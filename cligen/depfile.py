@@ -0,0 +1,63 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Writes Makefile-format dependency files (a.k.a. "depfiles") that tell build systems, such as Make
+and Ninja, which files the generated output files depend on.
+"""
+
+
+class DepfileWriter:
+
+    def format(self, output_file_paths, dependency_paths):
+        """
+        Returns a string whose value is the contents of a depfile in which each of the given output
+        files depends on all of the given dependencies.  A separate rule is emitted for each output
+        file since some build systems do not support rules with more than one target.
+        """
+        dependencies = "".join(" \\\n  {}".format(self.escape(x)) for x in dependency_paths)
+        rules = ("{}:{}\n".format(self.escape(x), dependencies) for x in output_file_paths)
+        return "".join(rules)
+
+    def write(self, path, output_file_paths, dependency_paths):
+        """
+        Writes a depfile to the given path, whose contents are those returned from format().
+        Raises self.Error if writing the file fails.
+        """
+        self.write_rules(path, [(output_file_paths, dependency_paths)])
+
+    def write_rules(self, path, rules):
+        """
+        Writes a depfile to the given path that contains the rules of several sets of output files.
+        *rules* must be an iterable of (output_file_paths, dependency_paths) pairs, each of which
+        is formatted by format().
+        Raises self.Error if writing the file fails.
+        """
+        contents = "".join(self.format(*rule) for rule in rules)
+        try:
+            with open(path, "wt", encoding="utf8", newline="\n") as f:
+                f.write(contents)
+        except IOError as e:
+            raise self.Error("error writing dependency file: {} ({})".format(path, e.strerror))
+
+    @staticmethod
+    def escape(path):
+        """
+        Escapes the characters in the given path that have special meaning in a Makefile.
+        """
+        return path.replace("$", "$$").replace("#", "\\#").replace(" ", "\\ ")
+
+    class Error(Exception):
+        pass
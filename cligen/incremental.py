@@ -0,0 +1,212 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Support for skipping the generation of output files whose inputs have not changed.
+"""
+
+import hashlib
+import json
+import os
+
+from cligen.atomic_file import write_file_atomically
+
+
+class BuildStamp:
+    """
+    A record of the inputs from which a set of output files was generated and of the state of those
+    output files immediately after they were generated.  If neither the inputs nor the output files
+    have changed since the stamp was written then generating the output files again would produce
+    identical results, and can be skipped.
+    """
+
+    # incremented whenever the format of stamp files changes incompatibly
+    FORMAT_VERSION = 1
+
+    def __init__(self, path, settings):
+        """
+        Initializes a new instance of this class.
+        *path* must be a string whose value is the path of the stamp file.
+        *settings* must be a tuple of strings (or None values) whose values are the settings,
+        other than the contents of the input files, that affect the generated output files, such
+        as the target language and character encoding.
+        """
+        self.path = path
+        self.settings = tuple(settings)
+
+    @classmethod
+    def for_output_files(cls, cache_dir, output_file_paths, settings):
+        """
+        Creates and returns the BuildStamp for the given output files, whose stamp file is stored
+        in the "stamps" subdirectory of the given cache directory.
+        """
+        output_file_paths = [os.path.abspath(x) for x in output_file_paths]
+        key = hashlib.sha256(json.dumps(output_file_paths).encode("utf8")).hexdigest()
+        path = os.path.join(cache_dir, "stamps", "{}.json".format(key))
+        return cls(path=path, settings=settings)
+
+    def fingerprint(self, input_file_paths):
+        """
+        Calculates and returns a string that changes whenever the settings of this object or the
+        path or contents of any of the given input files change.
+        Returns None if any of the input files cannot be read.
+        """
+        h = hashlib.sha256()
+        h.update(json.dumps([self.FORMAT_VERSION, self.settings]).encode("utf8"))
+        for path in input_file_paths:
+            try:
+                with open(path, "rb") as f:
+                    contents = f.read()
+            except IOError:
+                return None
+            h.update(b"\0")
+            h.update(os.path.abspath(path).encode("utf8", "surrogateescape"))
+            h.update(b"\0")
+            h.update(hashlib.sha256(contents).digest())
+        return h.hexdigest()
+
+    def is_up_to_date(self):
+        """
+        Returns whether the stamp file exists, the input files recorded in it have not changed and
+        the output files recorded in it have not been modified since it was written.
+        """
+        try:
+            with open(self.path, "rt", encoding="utf8") as f:
+                data = json.load(f)
+            if data["format_version"] != self.FORMAT_VERSION:
+                return False
+            input_file_paths = data["input_files"]
+            expected_fingerprint = data["fingerprint"]
+            output_file_states = data["output_files"]
+        except (IOError, ValueError, KeyError, TypeError):
+            return False
+
+        if self.fingerprint(input_file_paths) != expected_fingerprint:
+            return False
+
+        return self._output_files_unchanged(output_file_states)
+
+    def spec_fingerprint(self, argspec, dependency_paths):
+        """
+        Calculates and returns a string that changes whenever the settings of this object, the
+        meaning of the given ArgumentParserSpec (as opposed to the formatting of the specification
+        file from which it was parsed) or the contents of any of the given dependency files, such
+        as those used by the target language, change.
+        Returns None if any of the dependency files cannot be read.
+        """
+        dependencies_fingerprint = self.fingerprint(dependency_paths)
+        if dependencies_fingerprint is None:
+            return None
+        h = hashlib.sha256()
+        h.update(dependencies_fingerprint.encode("ascii"))
+        h.update(b"\0")
+        h.update(argspec.fingerprint().encode("ascii"))
+        return h.hexdigest()
+
+    def is_spec_up_to_date(self, spec_fingerprint):
+        """
+        Returns whether the stamp file exists, the given value, which must have been returned from
+        spec_fingerprint(), is the one recorded in it and the output files recorded in it have not
+        been modified since it was written.  If so then the input files have changed only in ways
+        that do not affect the output files, such as the formatting of the specification file.
+        """
+        if spec_fingerprint is None:
+            return False
+
+        try:
+            with open(self.path, "rt", encoding="utf8") as f:
+                data = json.load(f)
+            if data["format_version"] != self.FORMAT_VERSION:
+                return False
+            expected_spec_fingerprint = data.get("spec_fingerprint")
+            output_file_states = data["output_files"]
+        except (IOError, ValueError, KeyError, TypeError, AttributeError):
+            return False
+
+        if spec_fingerprint != expected_spec_fingerprint:
+            return False
+
+        return self._output_files_unchanged(output_file_states)
+
+    def _output_files_unchanged(self, output_file_states):
+        for output_file_state in output_file_states:
+            (path, size, mtime_ns) = output_file_state
+            if self._output_file_state(path) != [path, size, mtime_ns]:
+                return False
+        return True
+
+    def input_file_paths(self):
+        """
+        Returns a list containing the absolute paths of the input files recorded in the stamp file,
+        or None if it cannot be read.
+        """
+        try:
+            with open(self.path, "rt", encoding="utf8") as f:
+                data = json.load(f)
+            return list(data["input_files"])
+        except (IOError, ValueError, KeyError, TypeError):
+            return None
+
+    def write(self, fingerprint, input_file_paths, output_file_paths, spec_fingerprint=None):
+        """
+        Writes the stamp file.
+        *fingerprint* must be the value that fingerprint() returned for *input_file_paths* before
+        the output files were generated; if None then the stamp file is deleted instead so that the
+        next generation will not be skipped.
+        *input_file_paths* must be an iterable of strings whose values are the paths of the files
+        from which the output files were generated.
+        *output_file_paths* must be an iterable of strings whose values are the paths of the
+        generated output files.
+        *spec_fingerprint* must be the value that spec_fingerprint() returned for the specification
+        from which the output files were generated; may be None (the default) if it is unknown.
+        Failures are silently ignored, since they merely cause the next generation not to be
+        skipped.
+        """
+        if fingerprint is None:
+            self.delete()
+            return
+
+        output_file_states = [self._output_file_state(x) for x in output_file_paths]
+        if None in output_file_states:
+            self.delete()
+            return
+
+        data = {
+            "format_version": self.FORMAT_VERSION,
+            "fingerprint": fingerprint,
+            "input_files": [os.path.abspath(x) for x in input_file_paths],
+            "output_files": output_file_states,
+            "spec_fingerprint": spec_fingerprint,
+        }
+
+        try:
+            write_file_atomically(self.path, lambda f: json.dump(data, f), binary=False)
+        except IOError:
+            pass
+
+    def delete(self):
+        try:
+            os.unlink(self.path)
+        except IOError:
+            pass
+
+    @staticmethod
+    def _output_file_state(path):
+        path = os.path.abspath(path)
+        try:
+            st = os.stat(path)
+        except IOError:
+            return None
+        return [path, st.st_size, st.st_mtime_ns]
@@ -17,44 +17,489 @@
 The "main application" class for the cligen command-line utility.
 """
 
-from cligen.argspec_xml_parser import ArgumentSpecParser
+import collections
+import io
+import os
+import sys
+import threading
+import time
+
+import cligen
 
 
 class CligenApplication:
 
     def __init__(
-            self, source_file_path, output_file_paths, target_language, inline, encoding, newline):
+            self, source_file_path, output_file_paths, target_language, inline, encoding, newline,
+            cache_dir=None, incremental=False, xml_backend=None, depfile_path=None):
         self.source_file_path = source_file_path
         self.output_file_paths = output_file_paths
         self.target_language = target_language
         self.inline = inline
         self.encoding = encoding
         self.newline = newline
+        self.cache_dir = cache_dir
+        self.incremental = incremental
+        self.xml_backend = xml_backend
+        self.depfile_path = depfile_path
+        # the paths of the files included by the source file, known once it has been read
+        self.included_file_paths = ()
 
-    def run(self):
-        argspec = self.read_source_file()
-        self.generate_output_files(argspec)
+    def run(self, read_source_file=None):
+        """
+        Generates the output files and, if a depfile path was specified, the depfile.
+        *read_source_file* must be a callable that takes no arguments and returns the
+        ArgumentParserSpec read from the source file, raising self.Error on failure; may be None
+        (the default) to use self.read_source_file().
+        Raises self.Error on failure.
+        """
+        self.generate(read_source_file)
+        if self.depfile_path is not None:
+            self.write_depfile()
+
+    def generate(self, read_source_file=None):
+        if read_source_file is None:
+            read_source_file = self.read_source_file
+
+        if not self.incremental:
+            argspec = read_source_file()
+            self.generate_output_files(argspec)
+            return
+
+        build_stamp = self.build_stamp()
+        if build_stamp.is_up_to_date():
+            self.included_file_paths = self.included_file_paths_from_stamp(build_stamp)
+            return
+
+        input_file_paths = self.input_file_paths()
+        fingerprint = build_stamp.fingerprint(input_file_paths)
+        argspec = read_source_file()
+        if self.included_file_paths:
+            # the included files only become known once the source file has been read
+            input_file_paths = self.input_file_paths()
+            fingerprint = build_stamp.fingerprint(input_file_paths)
+        # a change to the input files that does not change the meaning of the specification, such
+        # as reformatting it, leaves the output files untouched
+        spec_fingerprint = build_stamp.spec_fingerprint(
+            argspec, self.target_language.dependency_paths())
+        if not build_stamp.is_spec_up_to_date(spec_fingerprint):
+            self.generate_output_files(argspec)
+        build_stamp.write(
+            fingerprint, input_file_paths, self.resolved_output_file_paths(),
+            spec_fingerprint=spec_fingerprint)
+
+    def write_depfile(self):
+        from cligen.depfile import DepfileWriter
+        writer = DepfileWriter()
+        try:
+            writer.write(
+                path=self.depfile_path,
+                output_file_paths=self.resolved_output_file_paths(),
+                dependency_paths=self.input_file_paths(),
+            )
+        except writer.Error as e:
+            raise self.Error("{}".format(e))
+
+    def depfile_rule(self):
+        """
+        Returns a (output_file_paths, dependency_paths) pair suitable for use as an element of the
+        *rules* argument of DepfileWriter.write_rules() that lists the output files of this
+        application and the files on which they depend.
+        """
+        return (self.resolved_output_file_paths(), self.input_file_paths())
+
+    def build_stamp(self):
+        """
+        Returns the BuildStamp that records the inputs from which the output files of this
+        application were most recently generated.  Must only be invoked if self.cache_dir is not
+        None.
+        """
+        from cligen.argspec_xml_parser import ArgumentSpecParser
+        from cligen.incremental import BuildStamp
+        # the versions change whenever a change to cligen could change the generated code, such as
+        # a change to how specification files are parsed
+        settings = (
+            cligen.__version__,
+            ArgumentSpecParser.VERSION,
+            self.target_language.key,
+            self.encoding,
+            self.newline,
+            "inline" if self.inline else "",
+        )
+        return BuildStamp.for_output_files(
+            cache_dir=self.cache_dir,
+            output_file_paths=self.resolved_output_file_paths(),
+            settings=settings,
+        )
+
+    def included_file_paths_from_stamp(self, build_stamp):
+        """
+        Returns a tuple containing the paths of the files included by the source file, as
+        recorded in the given BuildStamp.
+        """
+        recorded_paths = build_stamp.input_file_paths()
+        if recorded_paths is None:
+            return ()
+        other_paths = set(os.path.abspath(x) for x in self.input_file_paths())
+        return tuple(x for x in recorded_paths if x not in other_paths)
+
+    def input_file_paths(self):
+        """
+        Returns a tuple containing the paths of the files whose contents affect the generated
+        output files: the source file, followed by the files that it includes, if it has been read,
+        followed by the files used by the target language.
+        """
+        return (
+            (self.source_file_path,) +
+            tuple(self.included_file_paths) +
+            tuple(self.target_language.dependency_paths())
+        )
+
+    def resolved_output_file_paths(self):
+        return self.target_language.resolve_output_file_paths(self.output_file_paths)
 
     def read_source_file(self):
-        parser = ArgumentSpecParser()
+        """
+        Reads and parses the source file and returns the ArgumentParserSpec that it specifies, and
+        sets self.included_file_paths to the paths of the files that it includes.
+        If self.cache_dir is not None then the result is loaded from the cache of parsed
+        specification files in that directory, if present, and stored in it otherwise.
+        Raises self.Error on failure.
+        """
+        from cligen.argspec_xml_parser import ArgumentSpecParser
+        parser = ArgumentSpecParser(xml_backend=self.xml_backend)
+
+        base_dir = os.path.dirname(os.path.abspath(self.source_file_path))
+        if self.cache_dir is None:
+            spec_file = self.source_file_path
+            spec_cache = None
+        else:
+            try:
+                with open(self.source_file_path, "rb") as f:
+                    spec_bytes = f.read()
+            except IOError as e:
+                raise self.Error("reading file failed: {} ({})".format(
+                    self.source_file_path, e.strerror))
+
+            from cligen.spec_cache import SpecCache
+            spec_cache = SpecCache(os.path.join(self.cache_dir, "specs"), parser.VERSION)
+            spec_cache_key = spec_cache.key(spec_bytes, base_dir)
+            entry = spec_cache.load_entry(spec_cache_key)
+            if entry is not None:
+                (argspec, self.included_file_paths) = entry
+                return argspec
+            spec_file = io.BytesIO(spec_bytes)
+
         try:
-            return parser.parse_file(self.source_file_path)
+            argspec = parser.parse_file(spec_file, base_dir=base_dir)
         except IOError as e:
             raise self.Error("reading file failed: {} ({})".format(
                 self.source_file_path, e.strerror))
         except parser.Error as e:
             raise self.Error("parsing file failed: {} ({})".format(self.source_file_path, e))
 
+        self.included_file_paths = parser.included_file_paths
+        if spec_cache is not None:
+            spec_cache.store(spec_cache_key, argspec, self.included_file_paths)
+
+        return argspec
+
+    def validate(self, argspec):
+        """
+        Checks the given ArgumentParserSpec, which was read from the source file, for problems that
+        would cause the generated code to be broken.
+        Raises self.Error if any are found, whose message lists all of them.
+        """
+        from cligen.argspec_validator import ArgumentSpecValidator
+        validator = ArgumentSpecValidator(
+            variable_name_func=getattr(self.target_language, "argument_variable_name", None),
+            reserved_variable_names=getattr(self.target_language, "RESERVED_VARIABLE_NAMES", ()))
+        try:
+            validator.validate(argspec)
+        except validator.Error as e:
+            raise self.Error("invalid specification file: {} ({})".format(
+                self.source_file_path, e))
+
     def generate_output_files(self, argspec):
+        self.validate(argspec)
         try:
             self.target_language.generate(
                 argspec=argspec,
                 output_file_paths=self.output_file_paths,
                 encoding=self.encoding,
                 newline=self.newline,
+                cache_dir=self.cache_dir,
             )
         except self.target_language.Error as e:
             raise self.Error("{}".format(e))
 
     class Error(Exception):
         pass
+
+
+class CligenMultiTargetApplication:
+    """
+    Runs CligenApplication objects that generate the code of different target languages from the
+    same source file.  The source file is read at most once and shared among them, and they run
+    concurrently in a pool of threads.  A failure of one application is reported and does not
+    prevent the remaining applications from running.
+    """
+
+    def __init__(self, applications, jobs=None, depfile_path=None, stderr=None):
+        """
+        Initializes a new instance of this class.
+        *applications* must be an iterable of CligenApplication objects to run, all of which must
+        have the same source file; none of them should have a depfile path.
+        *jobs* must be an int whose value is the maximum number of applications to run
+        concurrently; may be None (the default) to run all of them concurrently.
+        *depfile_path* must be a string whose value is the path of a depfile to write that lists the
+        output files of all of the applications; may be None (the default) to not write a depfile.
+        *stderr* must be a file opened in write-text mode to which the failures of the individual
+        applications will be reported; may be None (the default) to use sys.stderr.
+        """
+        self.applications = tuple(applications)
+        self.jobs = jobs
+        self.depfile_path = depfile_path
+        self.stderr = stderr if stderr is not None else sys.stderr
+
+    @property
+    def source_file_path(self):
+        return self.applications[0].source_file_path
+
+    def run(self):
+        import concurrent.futures
+        read_source_file = self.shared_source_file_reader()
+        max_workers = self.jobs if self.jobs is not None else max(len(self.applications), 1)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(x.run, read_source_file) for x in self.applications]
+
+        errors = []
+        for future in futures:
+            try:
+                future.result()
+            except CligenApplication.Error as e:
+                # a failure to read the source file is raised by every application; report it once
+                if not any(e is x for x in errors):
+                    print("ERROR: {}".format(e), file=self.stderr)
+                errors.append(e)
+
+        if errors:
+            raise self.Error("generating code for {} of {} target languages failed".format(
+                len(errors), len(self.applications)))
+
+        if self.depfile_path is not None:
+            self.write_depfile()
+
+    def shared_source_file_reader(self):
+        """
+        Returns a callable suitable for the *read_source_file* argument of CligenApplication.run()
+        that reads the source file the first time that it is invoked, from whichever thread, and
+        returns the same ArgumentParserSpec, or raises the same error, every time.
+        """
+        lock = threading.Lock()
+        results = []
+
+        def read_source_file():
+            with lock:
+                if not results:
+                    reader = self.applications[0]
+                    try:
+                        results.append((reader.read_source_file(), None))
+                    except CligenApplication.Error as e:
+                        results.append((None, e))
+                    for application in self.applications:
+                        application.included_file_paths = reader.included_file_paths
+                (argspec, error) = results[0]
+            if error is not None:
+                raise error
+            return argspec
+
+        return read_source_file
+
+    def input_file_paths(self):
+        """
+        Returns a tuple containing the paths of the files whose contents affect the output files of
+        any of the applications, without duplicates.
+        """
+        input_file_paths = []
+        for application in self.applications:
+            input_file_paths.extend(application.input_file_paths())
+        return tuple(collections.OrderedDict.fromkeys(input_file_paths))
+
+    def write_depfile(self):
+        from cligen.depfile import DepfileWriter
+        writer = DepfileWriter()
+        try:
+            writer.write_rules(
+                path=self.depfile_path,
+                rules=[x.depfile_rule() for x in self.applications],
+            )
+        except writer.Error as e:
+            raise self.Error("{}".format(e))
+
+    class Error(Exception):
+        pass
+
+
+class CligenBatchApplication:
+    """
+    Runs a sequence of CligenApplication objects in the same process, so that the target languages
+    and their compiled templates are shared among them.  A failure of one application is reported
+    and does not prevent the remaining applications from running.
+    """
+
+    def __init__(self, applications, stderr=None):
+        """
+        Initializes a new instance of this class.
+        *applications* must be an iterable of CligenApplication objects to run.
+        *stderr* must be a file opened in write-text mode to which the failures of the individual
+        applications will be reported; may be None (the default) to use sys.stderr.
+        """
+        self.applications = tuple(applications)
+        self.stderr = stderr if stderr is not None else sys.stderr
+
+    def run(self):
+        failure_count = 0
+        for application in self.applications:
+            try:
+                application.run()
+            except application.Error as e:
+                failure_count += 1
+                print("ERROR: {}".format(e), file=self.stderr)
+
+        if failure_count > 0:
+            raise self.Error("compiling {} of {} specification files failed".format(
+                failure_count, len(self.applications)))
+
+    class Error(Exception):
+        pass
+
+
+class CligenWatchApplication:
+    """
+    Runs applications, then runs each of them again whenever any of the files that affect its
+    output files change, until interrupted by the user.  Since all of this happens in one process,
+    the target languages and their compiled templates are loaded only once.
+    """
+
+    def __init__(self, applications, watcher=None, debounce_time=0.05, stdout=None, stderr=None):
+        """
+        Initializes a new instance of this class.
+        *applications* must be an iterable of objects, such as CligenApplication objects, that have
+        a run() method and an input_file_paths() method that returns the paths of the files whose
+        changes should cause run() to be invoked again.
+        *watcher* must be a cligen.watch.FileWatcher object to use to detect changes to files; may
+        be None (the default) to use the one returned from cligen.watch.new_file_watcher().
+        *debounce_time* must be a number whose value is the number of seconds for which to wait
+        for further changes after a file changes before running the affected applications, so that
+        several changes in quick succession, such as those made by a text editor when saving a
+        file, cause them to run only once.
+        *stdout* and *stderr* must be files opened in write-text mode to which to report progress
+        and failures, respectively; may be None (the default) to use sys.stdout and sys.stderr.
+        """
+        self.applications = tuple(applications)
+        self.watcher = watcher
+        self.debounce_time = debounce_time
+        self.stdout = stdout if stdout is not None else sys.stdout
+        self.stderr = stderr if stderr is not None else sys.stderr
+
+    def run(self):
+        """
+        Runs the applications, then runs them again as their input files change, until
+        interrupted by the user.
+        Raises self.Error if watching the files fails or if any of the applications fails the
+        first time that it runs because one of its input files does not exist, since that file
+        could never be modified.
+        """
+        watcher = self.watcher
+        if watcher is None:
+            from cligen.watch import new_file_watcher
+            try:
+                watcher = new_file_watcher()
+            except OSError as e:
+                raise self.Error("watching files for changes failed: {}".format(e))
+
+        try:
+            failed_applications = self.run_applications(self.applications)
+            self.check_input_files_exist(failed_applications)
+            while True:
+                input_file_paths = self.input_file_paths()
+                watcher.set_paths(input_file_paths)
+                print("Watching {} files for changes; press Ctrl+C to stop".format(
+                    len(input_file_paths)), file=self.stdout)
+                changed_paths = self.wait_for_changes(watcher)
+                self.run_applications(self.affected_applications(changed_paths))
+        except OSError as e:
+            raise self.Error("watching files for changes failed: {}".format(e))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
+
+    def check_input_files_exist(self, applications):
+        """
+        Raises self.Error if any of the input files of any of the given applications does not
+        exist.
+        """
+        for application in applications:
+            for path in application.input_file_paths():
+                if not os.path.exists(path):
+                    raise self.Error("input file not found: {}".format(path))
+
+    def input_file_paths(self):
+        """
+        Returns a set containing the absolute paths of the input files of all of the applications.
+        """
+        return set(os.path.abspath(x) for x in self._all_input_file_paths())
+
+    def _all_input_file_paths(self):
+        for application in self.applications:
+            yield from application.input_file_paths()
+
+    def wait_for_changes(self, watcher):
+        """
+        Waits for one or more files to change, then continues waiting until no more files change
+        for self.debounce_time seconds.
+        Returns a set containing the absolute paths of the files that changed.
+        """
+        changed_paths = set(watcher.wait())
+        while True:
+            more_changed_paths = watcher.wait(self.debounce_time)
+            if not more_changed_paths:
+                return changed_paths
+            changed_paths.update(more_changed_paths)
+
+    def affected_applications(self, changed_paths):
+        """
+        Returns a list containing the applications for which any of the given absolute paths is an
+        input file.
+        """
+        affected_applications = []
+        for application in self.applications:
+            input_file_paths = set(os.path.abspath(x) for x in application.input_file_paths())
+            if not input_file_paths.isdisjoint(changed_paths):
+                affected_applications.append(application)
+        return affected_applications
+
+    def run_applications(self, applications):
+        """
+        Runs the given applications, reporting any failures instead of raising them so that the
+        other applications still run and watching continues.
+        Returns a list containing the applications that failed.
+        """
+        failed_applications = []
+        for application in applications:
+            start_time = time.perf_counter()
+            try:
+                application.run()
+            except application.Error as e:
+                failed_applications.append(application)
+                print("ERROR: {}".format(e), file=self.stderr)
+            else:
+                elapsed_time = (time.perf_counter() - start_time) * 1000
+                print("Generated code from {} in {:.0f} ms".format(
+                    application.source_file_path, elapsed_time), file=self.stdout)
+        return failed_applications
+
+    class Error(Exception):
+        pass
@@ -21,9 +21,13 @@ import argparse
 import codecs
 import collections
 import os
+import shlex
 import sys
 
 from cligen.main_app import CligenApplication
+from cligen.main_app import CligenBatchApplication
+from cligen.main_app import CligenMultiTargetApplication
+from cligen.main_app import CligenWatchApplication
 from cligen.targets import TargetRegistry
 
 
@@ -37,27 +41,39 @@ class ArgumentParser(argparse.ArgumentParser):
         self._add_arguments()
 
     def _add_arguments(self):
+        self.default_source_file = "cligen.xml"
         self.arg_source_file = self.add_argument(
             "source_file",
-            default="cligen.xml",
             nargs="?",
-            help="""The cligen specification file to compile (default: %(default)s)"""
+            help="""The cligen specification file to compile (default: {})""".format(
+                self.default_source_file)
         )
 
         self.arg_output_files = self.add_argument(
             "-o", "--output-file",
-            action="append",
+            action=self.OutputFileAction,
             dest="output_files",
             help="""The file to which to write the command-line arguments parser;
             some target languages require more than one output file, in which case this argument
             must be specified multiple times;
+            when more than one target language is specified, this argument applies to the
+            target language specified most recently before it, or to the first target language if
+            specified before any;
             if not specified, default values specific to the target language will be used"""
         )
 
+        # the list of valid values is filled in by format_help() since enumerating the target
+        # languages requires discovering those installed as plugins, which is too slow to do on
+        # every invocation
+        self.language_help_format = """The target language whose command-line arguments parser
+            to generate; may be specified more than once to generate the command-line arguments
+            parsers of several target languages from the same specification file, which is then
+            parsed only once; valid values are: {}"""
         self.arg_language = self.add_argument(
             "-l", "--language",
-            help="""The target language whose command-line arguments parser to generate;
-            valid values are: {}""".format(", ".join(sorted(self.targets)))
+            action=self.LanguageAction,
+            dest="languages",
+            help=self.language_help_format,
         )
 
         self.arg_inline = self.add_argument(
@@ -119,6 +135,100 @@ class ArgumentParser(argparse.ArgumentParser):
                 "/".join(self.arg_encoding.option_strings))
         )
 
+        self.cache_dir_environment_variable = "CLIGEN_CACHE_DIR"
+        self.arg_cache_dir = self.add_argument(
+            "--cache-dir",
+            help="""The directory in which to cache intermediate results, such as compiled
+            templates and parsed specification files, so that subsequent invocations run faster;
+            if not specified then the value of the {} environment variable is used, if
+            set""".format(
+                self.cache_dir_environment_variable)
+        )
+
+        self.arg_no_cache_dir = self.add_argument(
+            "--no-cache-dir",
+            action="store_const",
+            const="",
+            dest="cache_dir",
+            help="""Do not cache intermediate results in any directory, even if {} was previously
+            specified or the {} environment variable is set""".format(
+                "/".join(self.arg_cache_dir.option_strings), self.cache_dir_environment_variable)
+        )
+
+        self.arg_incremental = self.add_argument(
+            "--incremental",
+            action="store_true",
+            default=False,
+            help="""Skip generating the output files if the source file, the target language,
+            the options that affect the generated code and the output files themselves are all
+            unchanged since the output files were last generated with this option;
+            output files whose contents would not change are not rewritten, preserving their
+            modification times; requires {} or the {} environment variable to be set""".format(
+                "/".join(self.arg_cache_dir.option_strings), self.cache_dir_environment_variable)
+        )
+
+        self.arg_no_incremental = self.add_argument(
+            "--no-incremental",
+            dest="incremental",
+            action="store_false",
+            help="""Reverse the effects of {} if previously specified""".format(
+                "/".join(self.arg_incremental.option_strings))
+        )
+
+        self.arg_depfile = self.add_argument(
+            "--depfile",
+            help="""Also write a Makefile-format dependency file to the given path, which
+            lists the source file, the templates and the modules of the target language as the
+            dependencies of each output file, for use by build systems such as Make and Ninja"""
+        )
+
+        self.xml_backend_names = ("etree", "lxml")
+        self.arg_xml_backend = self.add_argument(
+            "--xml-backend",
+            choices=self.xml_backend_names,
+            help="""The XML parser with which to parse the specification file: etree for the
+            xml.etree.ElementTree module of the Python standard library, or lxml for the lxml
+            package, which must be installed; both produce the same results (default: etree)"""
+        )
+
+        self.arg_jobs = self.add_argument(
+            "-j", "--jobs",
+            type=int,
+            help="""The maximum number of target languages whose code to generate concurrently
+            when more than one is specified (default: the number of target languages)"""
+        )
+
+        self.arg_batch_file = self.add_argument(
+            "--batch",
+            dest="batch_file",
+            help="""Compile many cligen specification files in one invocation;
+            the given file must contain one line per specification file to compile, each of which
+            contains the command-line arguments to use for that specification file, quoted as they
+            would be in a POSIX shell;
+            options specified on the command line, such as {}, apply to every line of the file
+            unless overridden on the line; blank lines and lines starting with # are ignored;
+            a failure to compile one specification file does not prevent the others from being
+            compiled""".format("/".join(self.arg_language.option_strings))
+        )
+
+        self.arg_watch = self.add_argument(
+            "--watch",
+            action="store_true",
+            default=False,
+            help="""After generating the output files, keep running and generate them again
+            whenever the source file or any of the templates of the target language changes;
+            when combined with {}, only the specification files whose inputs changed are compiled
+            again; press Ctrl+C to stop""".format("/".join(self.arg_batch_file.option_strings))
+        )
+
+        self.arg_no_watch = self.add_argument(
+            "--no-watch",
+            dest="watch",
+            action="store_false",
+            help="""Reverse the effects of {} if previously specified""".format(
+                "/".join(self.arg_watch.option_strings))
+        )
+
         self.arg_sample_xml = self.add_argument(
             "--sample-xml",
             nargs=0,
@@ -128,11 +238,23 @@ class ArgumentParser(argparse.ArgumentParser):
         )
 
     def parse_args(self, args=None):
-        namespace = self.Namespace(self)
-        super().parse_args(args=args, namespace=namespace)
+        namespace = self.parse_namespace(args)
         app = namespace.create_application()
         return app
 
+    def parse_namespace(self, args=None, namespace=None):
+        """
+        Parses the given command-line arguments into a Namespace object, without creating the
+        application.  If *namespace* is not None then it is the Namespace object into which to
+        store the parsed arguments; any attributes that it already has will be used in place of the
+        default values of the corresponding arguments.
+        Returns the Namespace object into which the parsed arguments were stored.
+        """
+        if namespace is None:
+            namespace = self.Namespace(self)
+        super().parse_args(args=args, namespace=namespace)
+        return namespace
+
     def exit(self, status=0, message=None):
         raise self.Error(message=message, exit_code=status)
 
@@ -144,6 +266,13 @@ class ArgumentParser(argparse.ArgumentParser):
             file = self.stdout
         self._print_message(self.format_usage(), file)
 
+    def format_help(self):
+        # list only the target languages that are known without discovering those provided by
+        # other installed packages, since discovering them would slow down --help
+        target_keys = sorted(self.targets.loaded_keys())
+        self.arg_language.help = self.language_help_format.format(", ".join(target_keys))
+        return super().format_help()
+
     def print_help(self, file=None):
         if file is None:
             file = self.stdout
@@ -155,6 +284,34 @@ class ArgumentParser(argparse.ArgumentParser):
                 file = self.stdout
             file.write(message)
 
+    class LanguageAction(argparse.Action):
+        """
+        Appends the specified target language to the list of target languages whose code to
+        generate.
+        """
+
+        def __call__(self, parser, namespace, values, option_string=None):
+            languages = list(getattr(namespace, self.dest) or ())
+            languages.append(values)
+            setattr(namespace, self.dest, languages)
+
+    class OutputFileAction(argparse.Action):
+        """
+        Appends the specified output file to the list of output files of the target language that
+        was specified most recently, or of the first target language if none has been specified yet.
+        The output files are stored as a list containing a list of output files for each target
+        language.
+        """
+
+        def __call__(self, parser, namespace, values, option_string=None):
+            language_count = len(namespace.languages or ())
+            language_index = max(language_count - 1, 0)
+            output_files = [list(x) for x in (getattr(namespace, self.dest) or ())]
+            while len(output_files) <= language_index:
+                output_files.append([])
+            output_files[language_index].append(values)
+            setattr(namespace, self.dest, output_files)
+
     class PrintSampleXmlAction(argparse.Action):
 
         def __call__(self, parser, namespace, values, option_string=None):
@@ -170,25 +327,154 @@ class ArgumentParser(argparse.ArgumentParser):
         def __init__(self, parser):
             self.parser = parser
 
+        # The attributes whose values are used for each line of the batch file unless overridden.
+        BATCH_INHERITED_ATTRIBUTES = (
+            "inline", "encoding", "newline", "cache_dir", "incremental", "jobs",
+            "xml_backend")
+
         def create_application(self):
-            source_file_path = self.source_file
-            target_language = self.get_target_language()
+            if self.batch_file is not None:
+                return self.create_batch_application()
+
+            source_file_path = self.get_source_file()
+            target_languages = self.get_target_languages()
             inline = self.inline
-            output_file_paths = self.get_output_files(target_language, inline)
             encoding = self.get_encoding()
             newline = self.get_newline()
+            cache_dir = self.get_cache_dir()
+            incremental = self.get_incremental(cache_dir)
+            jobs = self.get_jobs()
+            xml_backend = self.get_xml_backend()
+
+            output_files = list(self.output_files or ())
+            while len(output_files) < len(target_languages):
+                output_files.append(None)
+
+            applications = []
+            for (target_language, cur_output_files) in zip(target_languages, output_files):
+                applications.append(CligenApplication(
+                    source_file_path=source_file_path,
+                    output_file_paths=self.get_output_files(
+                        target_language, cur_output_files, inline),
+                    target_language=target_language,
+                    inline=inline,
+                    encoding=encoding,
+                    newline=newline,
+                    cache_dir=cache_dir,
+                    incremental=incremental,
+                    xml_backend=xml_backend,
+                    depfile_path=self.depfile if len(target_languages) == 1 else None,
+                ))
+
+            self.check_output_files_distinct(applications)
+
+            if len(applications) == 1:
+                application = applications[0]
+            else:
+                application = CligenMultiTargetApplication(
+                    applications=applications,
+                    jobs=jobs,
+                    depfile_path=self.depfile,
+                )
+
+            if self.watch:
+                return CligenWatchApplication([application])
+            return application
+
+        def check_output_files_distinct(self, applications):
+            """
+            Reports an error if any two of the given CligenApplication objects, or any one of them,
+            would write the same output file, since the applications run concurrently and the
+            contents of the file would depend on which wrote it last.
+            """
+            applications_by_path = {}
+            for application in applications:
+                if application.inline and application.output_file_paths:
+                    output_file_paths = application.output_file_paths
+                else:
+                    output_file_paths = application.resolved_output_file_paths()
+
+                for output_file_path in output_file_paths:
+                    real_path = os.path.realpath(output_file_path)
+                    other_application = applications_by_path.setdefault(real_path, application)
+                    if other_application is application:
+                        continue
+                    self.parser.error(
+                        "languages {} and {} would both write the output file {}; specify "
+                        "different output files with {}".format(
+                            other_application.target_language.name,
+                            application.target_language.name, output_file_path,
+                            "/".join(self.parser.arg_output_files.option_strings)))
+
+        def create_batch_application(self):
+            batch_option = "/".join(self.parser.arg_batch_file.option_strings)
+            if self.source_file is not None:
+                self.parser.error("{} must not be specified when {} is specified".format(
+                    self.parser.arg_source_file.dest, batch_option))
+            elif self.output_files:
+                self.parser.error("{} must not be specified when {} is specified".format(
+                    "/".join(self.parser.arg_output_files.option_strings), batch_option))
+            elif self.depfile is not None:
+                self.parser.error("{} must not be specified when {} is specified".format(
+                    "/".join(self.parser.arg_depfile.option_strings), batch_option))
+
+            applications = []
+            for (line_number, args) in self.read_batch_file():
+                namespace = self.parser.Namespace(self.parser)
+                for name in self.BATCH_INHERITED_ATTRIBUTES:
+                    setattr(namespace, name, getattr(self, name))
+
+                try:
+                    self.parser.parse_namespace(args, namespace)
+                    if namespace.batch_file is not None:
+                        self.parser.error("{} must not be specified in a batch file".format(
+                            batch_option))
+                    elif namespace.watch:
+                        self.parser.error("{} must not be specified in a batch file".format(
+                            "/".join(self.parser.arg_watch.option_strings)))
+                    # the target languages are inherited only if none are specified on the line,
+                    # since they accumulate rather than override
+                    if namespace.languages is None:
+                        namespace.languages = self.languages
+                    application = namespace.create_application()
+                except self.parser.Error as e:
+                    self.parser.error("invalid arguments on line {} of {}: {}".format(
+                        line_number, self.batch_file, e))
+
+                applications.append(application)
+
+            if self.watch:
+                return CligenWatchApplication(applications)
+            return CligenBatchApplication(applications)
+
+        def read_batch_file(self):
+            """
+            Reads the batch file, generating a (line_number, args) pair for each non-blank line,
+            where *args* is the list of command-line arguments specified on that line.
+            """
+            try:
+                with open(self.batch_file, "rt", encoding="utf8") as f:
+                    lines = f.readlines()
+            except IOError as e:
+                self.parser.exit(1, "reading batch file failed: {} ({})".format(
+                    self.batch_file, e.strerror))
 
-            return CligenApplication(
-                source_file_path=source_file_path,
-                output_file_paths=output_file_paths,
-                target_language=target_language,
-                inline=inline,
-                encoding=encoding,
-                newline=newline,
-            )
-
-        def get_output_files(self, target_language, inline):
-            output_files = self.output_files
+            for (line_index, line) in enumerate(lines):
+                try:
+                    args = shlex.split(line, comments=True)
+                except ValueError as e:
+                    self.parser.error("invalid syntax on line {} of {}: {}".format(
+                        line_index + 1, self.batch_file, e))
+                if args:
+                    yield (line_index + 1, args)
+
+        def get_source_file(self):
+            source_file = self.source_file
+            if source_file is None:
+                source_file = self.parser.default_source_file
+            return source_file
+
+        def get_output_files(self, target_language, output_files, inline):
             if output_files is None or len(output_files) == 0:
                 return None
 
@@ -214,12 +500,15 @@ class ArgumentParser(argparse.ArgumentParser):
 
             return output_files
 
-        def get_target_language(self):
-            target_language_key = self.language
-            if target_language_key is None:
+        def get_target_languages(self):
+            target_language_keys = self.languages
+            if not target_language_keys:
                 self.parser.error("{} not specified".format(
                     "/".join(self.parser.arg_language.option_strings)))
 
+            return tuple(self.get_target_language(x) for x in target_language_keys)
+
+        def get_target_language(self, target_language_key):
             try:
                 return self.parser.targets[target_language_key]
             except KeyError:
@@ -254,6 +543,42 @@ class ArgumentParser(argparse.ArgumentParser):
                         newline_name,
                         ", ".join(self.parser.newline_names)))
 
+        def get_jobs(self):
+            jobs = self.jobs
+            if jobs is not None and jobs < 1:
+                self.parser.error("invalid value specified for {}: {} (must be at least 1)".format(
+                    "/".join(self.parser.arg_jobs.option_strings), jobs))
+            return jobs
+
+        def get_xml_backend(self):
+            """
+            Returns the cligen.xml_backend.XmlBackend object with which to parse the specification
+            file, or None to use the default.
+            """
+            if self.xml_backend != "lxml":
+                return None
+            from cligen.xml_backend import LxmlXmlBackend
+            try:
+                return LxmlXmlBackend()
+            except LxmlXmlBackend.Unavailable as e:
+                self.parser.error("invalid value specified for {}: {} ({})".format(
+                    "/".join(self.parser.arg_xml_backend.option_strings), self.xml_backend, e))
+
+        def get_cache_dir(self):
+            cache_dir = self.cache_dir
+            if cache_dir is None:
+                cache_dir = os.environ.get(self.parser.cache_dir_environment_variable)
+            return cache_dir if cache_dir else None
+
+        def get_incremental(self, cache_dir):
+            incremental = self.incremental
+            if incremental and cache_dir is None:
+                self.parser.error("{} requires {} or the {} environment variable to be set".format(
+                    "/".join(self.parser.arg_incremental.option_strings),
+                    "/".join(self.parser.arg_cache_dir.option_strings),
+                    self.parser.cache_dir_environment_variable))
+            return incremental
+
     class Error(Exception):
 
         def __init__(self, message, exit_code):
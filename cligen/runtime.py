@@ -0,0 +1,182 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Loading of command-line argument parsers from cligen specification files at runtime, for
+applications that would rather not generate the parser's code ahead of time.
+Example:
+    import cligen.runtime
+    ArgumentParser = cligen.runtime.load_parser("cligen.xml")
+    parsed_args = ArgumentParser().parse()
+"""
+
+import marshal
+import os
+import sys
+import types
+
+import cligen
+
+
+def load_parser(spec_path, cache_dir=None):
+    """
+    Returns the ArgumentParser class that the Python code generated from the cligen specification
+    file at the given path defines, using a default ParserLoader.
+    See ParserLoader.load_parser() for details.
+    """
+    return ParserLoader().load_parser(spec_path, cache_dir=cache_dir)
+
+
+class ParserLoader:
+    """
+    Generates Python argument parsers from cligen specification files and compiles them in memory.
+    The compiled code is cached in a file in a "__pycache__" directory, as Python does for the
+    compiled code of modules, and is used for as long as the versions of cligen and Python and the
+    modification times and sizes of the specification file, the files that it includes and the
+    modules and templates of cligen's Python target language are unchanged.  Loading a cached
+    parser therefore costs about as much as importing a module of generated code: the specification
+    file is not read, and none of cligen's XML parser, template engine or hashing modules are
+    imported.
+    """
+
+    # incremented whenever the format of the cache files changes incompatibly
+    FORMAT_VERSION = 2
+
+    def load_parser(self, spec_path, cache_dir=None):
+        """
+        Returns the ArgumentParser class that the Python code generated from the cligen
+        specification file at the given path defines.
+        *cache_dir* must be a string whose value is the path of the directory in which to cache the
+        compiled code; may be None (the default) to use the "__pycache__" subdirectory of the
+        directory containing the specification file.  Failure to write the cache is silently
+        ignored, since it merely causes the code to be generated again the next time.
+        Raises self.Error if reading or parsing the specification file, or generating the code,
+        fails.
+        """
+        spec_path = os.path.abspath(spec_path)
+        (spec_dir, spec_file_name) = os.path.split(spec_path)
+        if cache_dir is None:
+            cache_dir = os.path.join(spec_dir, "__pycache__")
+        cache_file_path = os.path.join(cache_dir, "{}.cligen.{}.pyc".format(
+            spec_file_name, sys.implementation.cache_tag))
+
+        code = self._load_code(cache_file_path, spec_path)
+        if code is None:
+            spec_state = self.file_state(spec_path)
+            (code, dependency_paths) = self._generate_code(spec_path)
+            file_states = [(spec_path, spec_state)]
+            file_states.extend((x, self.file_state(x)) for x in dependency_paths)
+            self._store_code(cache_file_path, file_states, code)
+
+        module = types.ModuleType("cligen_parser")
+        module.__file__ = spec_path
+        exec(code, module.__dict__)
+        return module.ArgumentParser
+
+    def _cache_header(self, spec_path):
+        """
+        Returns a tuple that identifies the specification file at the given path and the versions
+        of the software with which its cached code was compiled.
+        """
+        return (self.FORMAT_VERSION, cligen.__version__, sys.version, spec_path)
+
+    def _load_code(self, path, spec_path):
+        """
+        Returns the code object stored in the cache file at the given path, or None if it does not
+        exist, is corrupt, was stored by a different version of cligen or Python, or any of the
+        files from which the code was generated have changed.
+        """
+        try:
+            with open(path, "rb") as f:
+                (header, file_states, code) = marshal.load(f)
+        except (IOError, EOFError, ValueError, TypeError):
+            return None
+
+        if header != self._cache_header(spec_path) or not isinstance(code, types.CodeType):
+            return None
+        for (file_path, file_state) in file_states:
+            if file_state is None or self.file_state(file_path) != file_state:
+                return None
+        return code
+
+    def _store_code(self, path, file_states, code):
+        """
+        Writes the given code object, which was generated from the files with the given
+        (path, state) pairs, to the cache file at the given path, atomically.
+        """
+        if any(file_state is None for (file_path, file_state) in file_states):
+            return
+
+        from cligen.atomic_file import write_file_atomically
+        data = (self._cache_header(file_states[0][0]), tuple(file_states), code)
+        try:
+            write_file_atomically(path, lambda f: marshal.dump(data, f))
+        except IOError:
+            pass
+
+    @staticmethod
+    def file_state(path):
+        """
+        Returns a value that changes when the file at the given path is modified, or None if the
+        file cannot be accessed.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _generate_code(self, spec_path):
+        """
+        Parses the specification file at the given path, generates the Python code of its parser
+        and compiles it.
+        Returns a (code, dependency_paths) pair whose values are the compiled code object and the
+        paths of the files, other than the specification file, from which it was generated: those
+        included by the specification file followed by the modules and templates of the target
+        language.
+        """
+        from cligen.argspec_validator import ArgumentSpecValidator
+        from cligen.argspec_xml_parser import ArgumentSpecParser
+        from cligen.target_python import PythonTargetLanguage
+
+        parser = ArgumentSpecParser()
+        try:
+            argspec = parser.parse_file(spec_path)
+        except IOError as e:
+            raise self.Error("reading file failed: {} ({})".format(spec_path, e.strerror))
+        except parser.Error as e:
+            raise self.Error("parsing file failed: {} ({})".format(spec_path, e))
+
+        target_language = PythonTargetLanguage()
+        validator = ArgumentSpecValidator(
+            target_language.argument_variable_name, target_language.RESERVED_VARIABLE_NAMES)
+        try:
+            validator.validate(argspec)
+        except validator.Error as e:
+            raise self.Error("invalid specification file: {} ({})".format(spec_path, e))
+
+        try:
+            (source,) = target_language.generate_to_strings(argspec, newline="\n")
+        except target_language.Error as e:
+            raise self.Error("{}".format(e))
+
+        filename = "<parser generated by cligen from {}>".format(spec_path)
+        code = compile(source, filename, "exec", dont_inherit=True)
+        dependency_paths = list(parser.included_file_paths)
+        dependency_paths.extend(target_language.dependency_paths())
+        return (code, dependency_paths)
+
+    class Error(Exception):
+        pass
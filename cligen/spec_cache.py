@@ -0,0 +1,210 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+A persistent cache of parsed cligen specification files.
+"""
+
+import hashlib
+import json
+import os
+
+import cligen
+from cligen.argspec import ArgumentParserSpec
+from cligen.atomic_file import write_file_atomically
+
+
+class SpecCache:
+    """
+    Stores ArgumentParserSpec objects in files in a directory, keyed by a hash of the contents of
+    the specification files from which they were parsed, so that a specification file that has not
+    changed does not need to be parsed again.  The least recently used entries are deleted when the
+    total size of the entries exceeds a maximum size.  The cache may be used concurrently by
+    multiple processes: entries are written atomically, and a missing or corrupt entry is treated
+    as a cache miss.
+    """
+
+    # incremented whenever the format of the cache files changes incompatibly
+    FORMAT_VERSION = 3
+
+    DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, dir_path, parser_version, max_size=None):
+        """
+        Initializes a new instance of this class.
+        *dir_path* must be a string whose value is the path of the directory in which to store the
+        cache files; it will be created if it does not exist.
+        *parser_version* must be a string whose value identifies the version of the parser that
+        parses the specification files, so that entries created by other versions are not used.
+        *max_size* must be an int whose value is the maximum total size, in bytes, of the cache
+        files; may be None (the default) to use DEFAULT_MAX_SIZE.
+        """
+        self.dir_path = dir_path
+        self.parser_version = parser_version
+        self.max_size = max_size if max_size is not None else self.DEFAULT_MAX_SIZE
+
+    def key(self, spec_bytes, base_dir=None):
+        """
+        Returns a string whose value is the key of the entry for a specification file whose
+        contents are the given bytes.
+        *base_dir* must be a string whose value is the absolute path of the directory relative to
+        which the paths of the files included by the specification file are resolved; may be None
+        (the default) if they are resolved relative to the current directory.
+        """
+        h = hashlib.sha256()
+        h.update(json.dumps(
+            [self.FORMAT_VERSION, cligen.__version__, self.parser_version, base_dir],
+        ).encode("utf8", "surrogateescape"))
+        h.update(b"\0")
+        h.update(spec_bytes)
+        return h.hexdigest()
+
+    def load(self, key):
+        """
+        Returns the ArgumentParserSpec stored in the entry with the given key, or None if there is
+        no such entry, it cannot be read, or any of the files included by the specification file
+        have changed.
+        """
+        entry = self.load_entry(key)
+        return None if entry is None else entry[0]
+
+    def load_entry(self, key):
+        """
+        Returns a (argspec, included_file_paths) pair whose values are the ArgumentParserSpec and
+        the tuple of the paths of the included files stored in the entry with the given key, or
+        None under the same conditions as load().
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path, "rt", encoding="utf8") as f:
+                data = json.load(f)
+            argspec = self.deserialize(data)
+            included_files = [(x_path, digest) for (x_path, digest) in data["included_files"]]
+        except (IOError, ValueError, KeyError, IndexError, TypeError):
+            return None
+
+        for (included_file_path, digest) in included_files:
+            if self._file_digest(included_file_path) != digest:
+                return None
+
+        # record the use of the entry so that it is not evicted before less recently used ones
+        try:
+            os.utime(path)
+        except IOError:
+            pass
+
+        return (argspec, tuple(x_path for (x_path, digest) in included_files))
+
+    def store(self, key, argspec, included_file_paths=()):
+        """
+        Stores the given ArgumentParserSpec in the entry with the given key, then deletes the least
+        recently used entries if the total size of the entries exceeds the maximum size.
+        *included_file_paths* must be an iterable of strings whose values are the paths of the
+        files included by the specification file from which the ArgumentParserSpec was parsed.
+        Failures are silently ignored, since they merely cause the specification file to be parsed
+        again the next time that it is needed.
+        """
+        data = self.serialize(argspec)
+        data["included_files"] = []
+        for included_file_path in included_file_paths:
+            digest = self._file_digest(included_file_path)
+            if digest is None:
+                return
+            data["included_files"].append([included_file_path, digest])
+
+        path = self._entry_path(key)
+        try:
+            write_file_atomically(
+                path, lambda f: json.dump(data, f, separators=(",", ":")), binary=False)
+        except IOError:
+            return
+
+        self.evict()
+
+    def evict(self):
+        """
+        Deletes the least recently used entries until the total size of the entries does not
+        exceed the maximum size.
+        """
+        entries = []
+        try:
+            file_names = os.listdir(self.dir_path)
+        except IOError:
+            return
+        for file_name in file_names:
+            if file_name.endswith(".json"):
+                path = os.path.join(self.dir_path, file_name)
+                try:
+                    st = os.stat(path)
+                except IOError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, path))
+
+        total_size = sum(size for (mtime_ns, size, path) in entries)
+        entries.sort()
+        for (mtime_ns, size, path) in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except IOError:
+                pass
+            total_size -= size
+
+    @staticmethod
+    def serialize(argspec):
+        """
+        Returns a JSON-serializable object that represents the given ArgumentParserSpec.
+        """
+        arguments = [[list(x.keys), x.type, x.help_text] for x in argspec.arguments]
+        help_argument_index = None
+        for (i, argument) in enumerate(argspec.arguments):
+            if argument is argspec.help_argument:
+                help_argument_index = i
+        return {
+            "arguments": arguments,
+            "help_argument": help_argument_index,
+            "response_files": argspec.response_files,
+        }
+
+    @staticmethod
+    def deserialize(data):
+        """
+        Returns the ArgumentParserSpec that is represented by the given object, which must have been
+        returned from serialize().
+        """
+        arguments = tuple(
+            ArgumentParserSpec.Argument(keys=tuple(keys), type=type, help_text=help_text)
+            for (keys, type, help_text) in data["arguments"]
+        )
+        help_argument_index = data["help_argument"]
+        help_argument = None if help_argument_index is None else arguments[help_argument_index]
+        return ArgumentParserSpec(
+            arguments=arguments,
+            help_argument=help_argument,
+            response_files=data["response_files"],
+        )
+
+    def _entry_path(self, key):
+        return os.path.join(self.dir_path, "{}.json".format(key))
+
+    @staticmethod
+    def _file_digest(path):
+        try:
+            with open(path, "rb") as f:
+                contents = f.read()
+        except IOError:
+            return None
+        return hashlib.sha256(contents).hexdigest()
@@ -22,7 +22,21 @@ from cligen.targets import Jinja2TargetLanguageBase
 
 class PythonTargetLanguage(Jinja2TargetLanguageBase):
 
-    def __init__(self):
+    # whether or not the generated code is optimized for parsing speed at the expense of the
+    # flexibility of its ParsedArguments objects; see PythonFastTargetLanguage
+    FAST = False
+
+    # the names of the members of the generated ParsedArguments class, which the attributes that
+    # store the values of arguments would hide or, with __slots__, conflict with
+    RESERVED_VARIABLE_NAMES = frozenset((
+        "print",
+        "_DEFAULT_VALUES",
+        "__getattr__",
+        "__init__",
+        "__slots__",
+    ))
+
+    def __init__(self, key="python", name="python"):
         output_file = self.OutputFileInfo(
             name="source file",
             default_value="cligen.py",
@@ -30,7 +44,94 @@ class PythonTargetLanguage(Jinja2TargetLanguageBase):
         )
 
         super().__init__(
-            key="python",
-            name="python",
+            key=key,
+            name=name,
             output_files=(output_file,),
         )
+
+    # the number of bytes of UTF-8-encoded text, such as the help screen, above which the generated
+    # code stores the text compressed
+    LARGE_TEXT_SIZE = 4096
+
+    # the maximum number of characters of a string or bytes literal on each line of generated code
+    LITERAL_LINE_LENGTH = 76
+
+    def is_large_text(self, text):
+        """
+        Returns whether or not the given string is large enough that the generated code stores it
+        compressed rather than as a string literal.
+        """
+        return len(text.encode("utf8")) > self.LARGE_TEXT_SIZE
+
+    def string_literal(self, text):
+        """
+        Returns a string whose value is a Python string literal whose value is the given string.
+        The literal contains only printable ASCII characters, using escape sequences for any other
+        characters, so that it has the same value in Python 2, with unicode_literals, and Python 3
+        regardless of the encoding of the generated code.
+        """
+        return "\"{}\"".format("".join(self._escaped_char(c) for c in text))
+
+    def string_literal_lines(self, text):
+        """
+        Returns a list of strings whose values are Python string literals, as returned from
+        string_literal(), one per line of the given string, that together, when concatenated, have
+        the value of the given string.
+        """
+        return [self.string_literal(x) for x in text.splitlines(True) or [""]]
+
+    @staticmethod
+    def _escaped_char(c):
+        if c in ("\\", "\""):
+            return "\\" + c
+        elif c == "\n":
+            return "\\n"
+        elif " " <= c <= "~":
+            return c
+        elif c <= "\xff":
+            return "\\x{:02x}".format(ord(c))
+        elif c <= "\uffff":
+            return "\\u{:04x}".format(ord(c))
+        else:
+            return "\\U{:08x}".format(ord(c))
+
+    def compressed_bytes_literal_lines(self, text):
+        """
+        Returns a list of strings whose values are Python bytes literals that together, when
+        concatenated, have the value of the given string encoded with UTF-8, compressed with zlib
+        and then encoded with base64.
+        """
+        import base64
+        import zlib
+        data = base64.b64encode(zlib.compress(text.encode("utf8"), 9)).decode("ascii")
+        line_length = self.LITERAL_LINE_LENGTH
+        return [
+            "b\"{}\"".format(data[i:i + line_length]) for i in range(0, len(data), line_length)
+        ] or ["b\"\""]
+
+    def _create_template_environment(self, bytecode_cache):
+        env = super()._create_template_environment(bytecode_cache)
+        env.filters["string_literal"] = self.string_literal
+        env.filters["string_literal_lines"] = self.string_literal_lines
+        env.filters["compressed_bytes_literal_lines"] = self.compressed_bytes_literal_lines
+        env.tests["large_text"] = self.is_large_text
+        env.globals["fast"] = self.FAST
+        return env
+
+
+class PythonFastTargetLanguage(PythonTargetLanguage):
+    """
+    A variant of the Python target language whose generated parsers are optimized for applications
+    that parse a great many command lines, such as services that parse the arguments of submitted
+    jobs.  The parser's public API is the same, except that its ParsedArguments class defines
+    __slots__, so attributes other than those of the arguments cannot be set on its instances.
+    Parsing creates no objects other than the ParsedArguments object and the exceptions that it
+    raises: the arguments are parsed by a single loop over their indexes rather than by an iterator
+    object and a method call per argument, and the attributes of arguments that are not specified
+    are never set, taking their default values from the class instead.
+    """
+
+    FAST = True
+
+    def __init__(self):
+        super().__init__(key="python-fast", name="python (fast)")
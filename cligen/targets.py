@@ -17,28 +17,141 @@
 Registry for supported target languages for cligen.
 """
 
+import codecs
+import collections.abc
 import os
 import re
+import stat
+import sys
+import threading
 
 import fakeable
-import jinja2
+
+from cligen.atomic_file import random_hex_string
 
 
 class TargetRegistry(metaclass=fakeable.Fakeable):
+    """
+    Discovers the available target languages.
+    The built-in target languages are listed in a static index and target languages provided by
+    other installed packages are discovered via the "cligen.targets" entry point group; in both
+    cases, the module that implements a target language is only imported when that target language
+    is actually used, keeping the startup time of cligen independent of the number of target
+    languages and of the cost of importing their dependencies (e.g. Jinja2).
+    """
+
+    # The built-in target languages, as (key, module name, class name) tuples.
+    BUILTIN_TARGETS = (
+        ("c", "cligen.target_c", "CTargetLanguage"),
+        ("java", "cligen.target_java", "JavaTargetLanguage"),
+        ("python", "cligen.target_python", "PythonTargetLanguage"),
+        ("python-fast", "cligen.target_python", "PythonFastTargetLanguage"),
+    )
+
+    # The name of the entry point group in which other packages can register target languages; the
+    # name of each entry point is the key of the target language and its object must be a callable,
+    # such as a TargetLanguageBase subclass, that returns a TargetLanguageBase object when invoked
+    # with no arguments.
+    ENTRY_POINT_GROUP = "cligen.targets"
 
     def __init__(self):
         self.targets = {}
 
     def load(self):
-        return {x.key: x for x in self._load_targets()}
+        """
+        Returns a Targets object that maps the key of each available target language to its
+        TargetLanguageBase object.
+        """
+        factories = collections.OrderedDict()
+        for (key, module_name, class_name) in self.BUILTIN_TARGETS:
+            factories[key] = self._builtin_target_factory(module_name, class_name)
+        return self.Targets(factories, self._load_entry_point_factories)
+
+    @staticmethod
+    def _builtin_target_factory(module_name, class_name):
+        def factory():
+            # use __import__() rather than importlib.import_module() so that the import is
+            # reported by "python -X importtime", like any other import statement
+            module = __import__(module_name, fromlist=(class_name,))
+            cls = getattr(module, class_name)
+            return cls()
+        return factory
+
+    def _load_entry_point_factories(self):
+        try:
+            import importlib.metadata
+        except ImportError:
+            return {}
+
+        entry_points = importlib.metadata.entry_points()
+        if hasattr(entry_points, "select"):
+            entry_points = entry_points.select(group=self.ENTRY_POINT_GROUP)
+        else:
+            entry_points = entry_points.get(self.ENTRY_POINT_GROUP, ())
+
+        return {x.name: self._entry_point_factory(x) for x in entry_points}
+
+    @staticmethod
+    def _entry_point_factory(entry_point):
+        def factory():
+            return entry_point.load()()
+        return factory
 
-    def _load_targets(self):
-        import cligen.target_c
-        yield cligen.target_c.CTargetLanguage()
-        import cligen.target_java
-        yield cligen.target_java.JavaTargetLanguage()
-        import cligen.target_python
-        yield cligen.target_python.PythonTargetLanguage()
+    class Targets(collections.abc.Mapping):
+        """
+        A read-only mapping from the key of each available target language to its
+        TargetLanguageBase object, which is created on first access.
+        """
+
+        def __init__(self, factories, load_plugin_factories):
+            """
+            Initializes a new instance of this class.
+            *factories* must be a dict that maps keys to callables that create the corresponding
+            TargetLanguageBase objects when invoked with no arguments.
+            *load_plugin_factories* must be a callable that returns a dict like *factories* for
+            additional target languages; it is only invoked if a key that is not in *factories*
+            is looked up or if all keys are enumerated, since invoking it may be slow.
+            """
+            self._factories = factories
+            self._load_plugin_factories = load_plugin_factories
+            self._plugin_factories_loaded = False
+            self._targets = {}
+
+        def __getitem__(self, key):
+            try:
+                return self._targets[key]
+            except KeyError:
+                pass
+
+            if key not in self._factories:
+                self._load_plugins()
+            target = self._factories[key]()
+            self._targets[key] = target
+            return target
+
+        def __iter__(self):
+            self._load_plugins()
+            return iter(self._factories)
+
+        def __len__(self):
+            self._load_plugins()
+            return len(self._factories)
+
+        def loaded_keys(self):
+            """
+            Returns a list of strings whose values are the keys of the built-in target languages
+            and, if they have already been discovered, of the target languages provided by other
+            installed packages; unlike enumerating this object, never discovers them, since doing
+            so may be slow.
+            """
+            return list(self._factories)
+
+        def _load_plugins(self):
+            if self._plugin_factories_loaded:
+                return
+            self._plugin_factories_loaded = True
+            for (key, factory) in self._load_plugin_factories().items():
+                self._factories.setdefault(key, factory)
 
 
 class TargetLanguageBase:
@@ -59,7 +172,7 @@ class TargetLanguageBase:
         self.name = name
         self.output_files = output_files
 
-    def generate(self, argspec, output_file_paths, encoding, newline):
+    def generate(self, argspec, output_file_paths, encoding, newline, cache_dir=None):
         """
         Generates the output files based on the given input.
         *argspec* must be a cligen.argspec.ArgumentParserSpec object that specifies the command-
@@ -73,15 +186,66 @@ class TargetLanguageBase:
         line in the output file; may be None, in which case the newline sequence will be detected
         from the output file, if it already exists; if it does not exist then the system default
         newline character sequence retrieved from os.linesep will be used.
+        *cache_dir* must be a string whose value is the path of a directory in which to persist
+        intermediate results (e.g. compiled templates) for re-use by future invocations; may be
+        None (the default) to only cache such results in memory.
+        An output file that already exists with exactly the contents that would be written to it is
+        left untouched, preserving its modification time; otherwise, it is replaced atomically so
+        that other processes never observe a partially-written file.
         Raises self.Error if an error occurs.
         """
         if encoding is None:
             encoding = "utf8"
         output_files = self._resolved_output_files(output_file_paths, encoding, newline)
         output_files = tuple(output_files)
-        self._generate(argspec=argspec, encoding=encoding, output_files=output_files)
+        self._generate(
+            argspec=argspec, encoding=encoding, output_files=output_files, cache_dir=cache_dir)
 
-    def _generate(self, argspec, encoding, output_files):
+    def generate_to_strings(self, argspec, encoding=None, newline=None, cache_dir=None):
+        """
+        Generates the contents of the output files in memory, without reading or writing any files
+        other than those used to cache intermediate results in *cache_dir*.
+        *argspec* and *cache_dir* have the same meanings as the arguments of the same names to
+        generate().
+        *encoding* must be a string whose value is the character encoding with which to encode the
+        generated code (e.g. "utf8"); may be None (the default) to return the generated code as
+        strings rather than bytes.
+        *newline* must be a string whose value is the character sequence to use to create a new
+        line in the generated code; may be None (the default) to use os.linesep.
+        Returns a tuple containing the contents of each output file, as strings or, if *encoding*
+        is not None, bytes, corresponding to the output_files list that was given to __init__().
+        Raises self.Error if an error occurs.
+        """
+        if newline is None:
+            newline = os.linesep
+
+        contents = []
+        for (info, text) in zip(self.output_files, self._generate_strings(argspec, cache_dir)):
+            text = text.replace("\n", newline)
+            if encoding is not None:
+                try:
+                    text = text.encode(encoding)
+                except UnicodeEncodeError as e:
+                    raise self.Error(
+                        "unable to encode generated code using encoding {}: {} ({})".format(
+                            encoding, info.name, e))
+            contents.append(text)
+        return tuple(contents)
+
+    def _generate_strings(self, argspec, cache_dir):
+        """
+        To be implemented by subclasses to generate the code in memory.
+        This method is called by generate_to_strings().
+        *argspec* and *cache_dir* are the values for the arguments of the same names that were
+        specified to generate_to_strings().
+        Returns an iterable of strings, each of which is the contents of the output file at the
+        same index of the output_files list that was given to __init__(), using "\n" as the newline
+        character sequence.
+        Raises self.Error if an error occurs.
+        """
+        raise NotImplementedError()
+
+    def _generate(self, argspec, encoding, output_files, cache_dir):
         """
         To be implemented by subclasses to generate the code.
         This method is called by generate() after validating and resolving its arguments.
@@ -91,20 +255,51 @@ class TargetLanguageBase:
         *encoding* is a string whose value is the name of the character encoding to use in the
         generated files.
         *output_files* is an iterable of self._OutputFile objects representing the output files.
+        *cache_dir* is the value for the argument of the same name that was specified to
+        generate(); unlike the other arguments, this one may be None.
         Raises self.Error if an error occurs.
         """
         raise NotImplementedError()
 
-    def _resolved_output_files(self, output_file_paths, encoding, newline):
+    def resolve_output_file_paths(self, output_file_paths):
+        """
+        Returns a tuple containing the paths of the output files that generate() would write if
+        given the specified *output_file_paths*, which has the same meaning as the argument of the
+        same name to generate().
+        Raises RuntimeError if *output_file_paths* has an incorrect number of elements.
+        """
         output_file_infos = tuple(self.output_files)
 
         if output_file_paths is None:
-            output_file_paths = [x.default_value for x in output_file_infos]
-        else:
-            output_file_paths = tuple(output_file_paths)
-            if len(output_file_paths) != len(output_file_infos):
-                raise RuntimeError("len(output_file_paths)=={} (expected {})".format(
-                    len(output_file_paths), len(output_file_infos)))
+            return tuple(x.default_value for x in output_file_infos)
+
+        output_file_paths = tuple(output_file_paths)
+        if len(output_file_paths) != len(output_file_infos):
+            raise RuntimeError("len(output_file_paths)=={} (expected {})".format(
+                len(output_file_paths), len(output_file_infos)))
+        return output_file_paths
+
+    def dependency_paths(self):
+        """
+        Returns a tuple containing the paths of the files, other than the argument specification,
+        whose contents affect the code generated by this object.  This implementation returns the
+        source files of the modules that define this object's class and its base classes;
+        subclasses that read other files (e.g. templates) should extend the returned tuple.
+        """
+        paths = []
+        for cls in type(self).__mro__:
+            module = sys.modules.get(cls.__module__)
+            path = getattr(module, "__file__", None)
+            if path is not None:
+                path = os.path.abspath(path)
+                if path not in paths:
+                    paths.append(path)
+        return tuple(paths)
+
+    def _resolved_output_files(self, output_file_paths, encoding, newline):
+        output_file_infos = tuple(self.output_files)
+        output_file_paths = self.resolve_output_file_paths(output_file_paths)
+        detected_newlines = {}
 
         for i in range(len(output_file_infos)):
             path = output_file_paths[i]
@@ -112,7 +307,14 @@ class TargetLanguageBase:
             if newline is not None:
                 cur_newline = newline
             else:
-                cur_newline = self._detect_newline(path, encoding)
+                # several output files may be written to the same file, which only needs to be read
+                # once to detect its newline character sequence
+                real_path = os.path.realpath(path)
+                try:
+                    cur_newline = detected_newlines[real_path]
+                except KeyError:
+                    cur_newline = self._detect_newline(path, encoding)
+                    detected_newlines[real_path] = cur_newline
 
             yield self._OutputFile(
                 path=path,
@@ -120,20 +322,35 @@ class TargetLanguageBase:
                 info=info,
             )
 
+    # The maximum number of bytes to read from the beginning of a file when determining its newline
+    # character sequence, so that the time taken does not grow with the size of the file; if no
+    # newline character sequence is found within this many bytes then os.linesep is used.
+    DETECT_NEWLINE_MAX_BYTES = 1024 * 1024
+
+    # The number of bytes to read from a file at a time when determining its newline character
+    # sequence.
+    DETECT_NEWLINE_CHUNK_SIZE = 8192
+
+    _NEWLINE_PATTERN = re.compile("\r\n?|\n")
+    _NEWLINE_BYTES_PATTERN = re.compile(b"\r\n?|\n")
+
     @classmethod
     def _detect_newline(cls, path, encoding):
         """
         Helper method for use by subclasses to determine the newline character sequence in use in
-        a given file.  If the file does not exist or contains no newline character sequences then
-        os.linesep is returned.  If the file cannot be read then Error is raised.
+        a given file.  If the file does not exist or contains no newline character sequences within
+        its first DETECT_NEWLINE_MAX_BYTES bytes then os.linesep is returned.  If the file cannot be
+        read, or the characters preceding the first newline cannot be decoded using the given
+        encoding, then Error is raised.
         """
         try:
-            with open(path, "rt", encoding=encoding, newline="") as f:
-                for line in f:
-                    match = re.search(r"([\r\n]+$)", line)
-                    if match is not None:
-                        newline = match.group(1)
-                        return newline
+            with open(path, "rb") as f:
+                # the bytes of "\r" and "\n" never occur within other characters in ASCII-compatible
+                # encodings, so there is no need to decode the file to search it for them
+                if "\r\n".encode(encoding) == b"\r\n":
+                    newline = cls._scan_newline_bytes(f, encoding)
+                else:
+                    newline = cls._scan_newline_text(f, encoding)
         except FileNotFoundError:
             return os.linesep
         except IOError as e:
@@ -145,6 +362,80 @@ class TargetLanguageBase:
                 "unable to decode characters from file using encoding {}: {} ({})".format(
                     encoding, path, e))
 
+        if newline is None:
+            return os.linesep
+        return newline
+
+    @classmethod
+    def _scan_newline_bytes(cls, f, encoding):
+        """
+        Returns the first newline character sequence in the given binary file, which must be
+        encoded using an ASCII-compatible encoding, or None if there is none within its first
+        DETECT_NEWLINE_MAX_BYTES bytes.  Only the bytes preceding the newline are decoded, solely to
+        verify that the file is encoded using the given encoding.
+        Raises UnicodeDecodeError if decoding those bytes fails.
+        """
+        decoder = codecs.getincrementaldecoder(encoding)()
+        pending_data = b""
+        max_bytes = cls.DETECT_NEWLINE_MAX_BYTES
+        num_bytes_read = 0
+
+        while True:
+            data = f.read(min(cls.DETECT_NEWLINE_CHUNK_SIZE, max_bytes - num_bytes_read))
+            num_bytes_read += len(data)
+            at_eof = not data
+            at_end = (at_eof or num_bytes_read >= max_bytes)
+            data = pending_data + data
+
+            match = cls._NEWLINE_BYTES_PATTERN.search(data)
+            if match is None:
+                decoder.decode(data, final=at_eof)
+                if at_end:
+                    return None
+                pending_data = b""
+                continue
+
+            decoder.decode(data[:match.start()])
+            # a "\r" at the end of the data read so far may be the start of a "\r\n"
+            if match.group() == b"\r" and match.end() == len(data) and not at_end:
+                pending_data = b"\r"
+                continue
+
+            return match.group().decode("ascii")
+
+    @classmethod
+    def _scan_newline_text(cls, f, encoding):
+        """
+        Returns the first newline character sequence in the given binary file, which is decoded
+        using the given encoding, or None if there is none within its first
+        DETECT_NEWLINE_MAX_BYTES bytes.
+        Raises UnicodeDecodeError if decoding fails.
+        """
+        decoder = codecs.getincrementaldecoder(encoding)()
+        pending_text = ""
+        max_bytes = cls.DETECT_NEWLINE_MAX_BYTES
+        num_bytes_read = 0
+
+        while True:
+            data = f.read(min(cls.DETECT_NEWLINE_CHUNK_SIZE, max_bytes - num_bytes_read))
+            num_bytes_read += len(data)
+            at_end = (not data or num_bytes_read >= max_bytes)
+            text = pending_text + decoder.decode(data, final=not data)
+
+            match = cls._NEWLINE_PATTERN.search(text)
+            if match is None:
+                if at_end:
+                    return None
+                pending_text = ""
+                continue
+
+            # a "\r" at the end of the text decoded so far may be the start of a "\r\n"
+            if match.group() == "\r" and match.end() == len(text) and not at_end:
+                pending_text = "\r"
+                continue
+
+            return match.group()
+
     class OutputFileInfo:
 
         def __init__(self, name, default_value):
@@ -190,6 +481,20 @@ class Jinja2TargetLanguageBase(TargetLanguageBase):
     objects.
     """
 
+    # The Jinja2 environments shared by all instances in this process, so that each template is
+    # loaded and compiled at most once per process; the keys are (class, key, cache_dir) tuples.
+    _environments = {}
+
+    # The TemplateBytecodeCache objects shared by all environments, keyed by cache directory.
+    _bytecode_caches = {}
+
+    _environments_lock = threading.Lock()
+
+    # The names that the generated code uses for purposes other than storing the values of
+    # arguments, such as the names of methods of the class whose attributes store those values,
+    # and that argument_variable_name() must therefore not return.
+    RESERVED_VARIABLE_NAMES = frozenset()
+
     def argument_variable_name(self, arg):
         """
         Convert an ArgumentParserSpec.Argument to a string that is to be used as the variable name
@@ -221,7 +526,79 @@ class Jinja2TargetLanguageBase(TargetLanguageBase):
                 largest = s
         return largest
 
-    def _generate(self, argspec, encoding, output_files):
+    def dependency_paths(self):
+        """
+        Returns the paths of the modules returned by the superclass implementation followed by the
+        paths of the templates of the output files and of every template that they reference.
+        """
+        import jinja2.meta
+
+        paths = list(super().dependency_paths())
+        env = self.template_environment()
+        pending_template_names = [x.template_name for x in self.output_files]
+        loaded_template_names = set()
+
+        while pending_template_names:
+            template_name = pending_template_names.pop(0)
+            if template_name in loaded_template_names:
+                continue
+            loaded_template_names.add(template_name)
+            (source, path, uptodate) = env.loader.get_source(env, template_name)
+            paths.append(os.path.abspath(path))
+            referenced_template_names = jinja2.meta.find_referenced_templates(env.parse(source))
+            pending_template_names.extend(x for x in referenced_template_names if x is not None)
+
+        return tuple(paths)
+
+    def _generate(self, argspec, encoding, output_files, cache_dir):
+        env = self.template_environment(cache_dir)
+
+        for output_file in output_files:
+            self._generate_output_file(
+                argspec=argspec,
+                env=env,
+                template_name=output_file.info.template_name,
+                output_file_path=output_file.path,
+                output_file_newline=output_file.newline,
+                output_file_encoding=encoding,
+            )
+
+    def _generate_strings(self, argspec, cache_dir):
+        env = self.template_environment(cache_dir)
+        for output_file_info in self.output_files:
+            template = env.get_template(output_file_info.template_name)
+            yield template.render(argspec=argspec)
+
+    def template_environment(self, cache_dir=None):
+        """
+        Returns the jinja2.Environment object to use to load the templates for this object.
+        The environment is created on first use and then shared by every instance with the same
+        class and key for the lifetime of the process.  Compiled templates are cached in memory
+        and, if *cache_dir* is not None, in the "templates" subdirectory of *cache_dir*.
+        """
+        environment_key = (type(self), self.key, cache_dir)
+        with self._environments_lock:
+            try:
+                return self._environments[environment_key]
+            except KeyError:
+                pass
+
+            try:
+                bytecode_cache = self._bytecode_caches[cache_dir]
+            except KeyError:
+                from cligen.template_cache import TemplateBytecodeCache
+                bytecode_cache_dir = None if cache_dir is None else \
+                    os.path.join(cache_dir, "templates")
+                bytecode_cache = TemplateBytecodeCache(bytecode_cache_dir)
+                self._bytecode_caches[cache_dir] = bytecode_cache
+
+            env = self._create_template_environment(bytecode_cache)
+            self._environments[environment_key] = env
+            return env
+
+    def _create_template_environment(self, bytecode_cache):
+        import jinja2
+
         env = jinja2.Environment(
             keep_trailing_newline=True,
             autoescape=False,
@@ -229,43 +606,153 @@ class Jinja2TargetLanguageBase(TargetLanguageBase):
             trim_blocks=True,
             undefined=jinja2.StrictUndefined,
             loader=jinja2.PackageLoader("cligen"),
+            bytecode_cache=bytecode_cache,
         )
 
         env.filters["varname"] = self.argument_variable_name
         env.filters["most_descriptive_key"] = self.most_descriptive_key
         env.filters["joined_keys"] = self.joined_keys
 
-        for output_file in output_files:
-            self._generate_output_file(
-                argspec=argspec,
-                env=env,
-                template_name=output_file.info.template_name,
-                output_file_path=output_file.path,
-                output_file_newline=output_file.newline,
-                output_file_encoding=encoding,
-            )
+        return env
 
     def _generate_output_file(
             self, argspec, env, template_name, output_file_path, output_file_encoding,
             output_file_newline):
+        """
+        Renders the given template and writes the result to the given output file.
+        The generated code is rendered, newline-translated, encoded and written incrementally, so
+        the memory required does not grow with the size of the generated code.  It is written to a
+        temporary file in the same directory as the output file, which is then renamed to the
+        output file, so that the output file is left intact if generation fails and concurrent
+        readers never see a partially-written file.  If the output file already has exactly the
+        generated contents then it is left untouched, preserving its modification time.
+        """
         template = env.get_template(template_name)
-        output = template.render(argspec=argspec)
-        output_fixed_newlines = output.replace("\n", output_file_newline)
-        try:
-            output_fixed_newlines_bytes = output_fixed_newlines.encode(output_file_encoding)
-        except UnicodeEncodeError as e:
-            raise self.Error(
-                "unable to encode generated code using encoding {}: {} ({})".format(
-                    output_file_encoding, output_file_path, e
-                ))
+        chunks = template.generate(argspec=argspec)
+        chunks = self._translated_newline_chunks(chunks, output_file_newline)
+
+        real_path = os.path.realpath(output_file_path)
+        (dir_path, file_name) = os.path.split(real_path)
+        temp_path = os.path.join(dir_path, ".{}.{}.tmp".format(file_name, random_hex_string(6)))
 
         try:
-            with open(output_file_path, "wb") as f:
-                f.write(output_fixed_newlines_bytes)
+            try:
+                self._write_encoded_chunks(
+                    chunks, temp_path, output_file_path, output_file_encoding)
+                if self._files_equal(temp_path, real_path):
+                    return
+                self._copy_file_mode(real_path, temp_path)
+                os.replace(temp_path, real_path)
+            finally:
+                try:
+                    os.unlink(temp_path)
+                except IOError:
+                    pass
         except IOError as e:
             raise self.Error("error writing generated code to file: {} ({})".format(
                 output_file_path, e.strerror))
 
+    # The number of characters of generated code to accumulate from the template before translating
+    # newlines, encoding and writing them; bounds the memory used to generate each output file.
+    GENERATED_CODE_CHUNK_SIZE = 65536
+
+    def _translated_newline_chunks(self, chunks, newline):
+        """
+        Generates the strings from the given iterable, joined into strings of about
+        GENERATED_CODE_CHUNK_SIZE characters, with each "\n" replaced by the given newline.
+        """
+        pending_chunks = []
+        pending_length = 0
+        for chunk in chunks:
+            pending_chunks.append(chunk)
+            pending_length += len(chunk)
+            if pending_length >= self.GENERATED_CODE_CHUNK_SIZE:
+                yield "".join(pending_chunks).replace("\n", newline)
+                pending_chunks = []
+                pending_length = 0
+
+        if pending_chunks:
+            yield "".join(pending_chunks).replace("\n", newline)
+
+    def _write_encoded_chunks(self, chunks, path, output_file_path, encoding):
+        """
+        Encodes the strings from the given iterable and writes them to a new file at the given
+        path, which must not already exist.
+        Raises self.Error if encoding fails, reporting *output_file_path* as the file that could not
+        be written and the position of the offending character as if the strings were encoded all
+        at once.  Raises IOError if writing the file fails.
+        """
+        encoder = codecs.getincrementalencoder(encoding)()
+        position = 0
+        with open(path, "xb") as f:
+            for chunk in chunks:
+                try:
+                    f.write(encoder.encode(chunk))
+                except UnicodeEncodeError as e:
+                    raise self.Error(
+                        "unable to encode generated code using encoding {}: {} ({})".format(
+                            encoding, output_file_path, self._encode_error_message(e, position)
+                        ))
+                position += len(chunk)
+            f.write(encoder.encode("", final=True))
+
+    @staticmethod
+    def _encode_error_message(e, position):
+        """
+        Returns the message of the given UnicodeEncodeError, which was raised when encoding a
+        string that started at the given position of the entire generated code, worded as if the
+        entire generated code had been encoded at once.
+        """
+        if position == 0:
+            return "{}".format(e)
+
+        start = e.start + position
+        end = e.end + position
+        if e.end - e.start == 1:
+            c = ord(e.object[e.start])
+            if c <= 0xff:
+                escaped_c = "\\x{:02x}".format(c)
+            elif c <= 0xffff:
+                escaped_c = "\\u{:04x}".format(c)
+            else:
+                escaped_c = "\\U{:08x}".format(c)
+            return "'{}' codec can't encode character '{}' in position {}: {}".format(
+                e.encoding, escaped_c, start, e.reason)
+        else:
+            return "'{}' codec can't encode characters in position {}-{}: {}".format(
+                e.encoding, start, end - 1, e.reason)
+
+    @staticmethod
+    def _files_equal(path1, path2):
+        """
+        Returns whether the files at the given paths both exist and have identical contents.
+        """
+        try:
+            if os.path.getsize(path1) != os.path.getsize(path2):
+                return False
+            with open(path1, "rb") as f1, open(path2, "rb") as f2:
+                while True:
+                    data1 = f1.read(65536)
+                    data2 = f2.read(65536)
+                    if data1 != data2:
+                        return False
+                    elif not data1:
+                        return True
+        except IOError:
+            return False
+
+    @staticmethod
+    def _copy_file_mode(src_path, dest_path):
+        """
+        Sets the permission bits of the file at *dest_path* to those of the file at *src_path*, if
+        it exists, so that replacing the latter with the former does not change its permissions.
+        """
+        try:
+            mode = os.stat(src_path).st_mode
+        except FileNotFoundError:
+            return
+        os.chmod(dest_path, stat.S_IMODE(mode))
+
     class OutputFileInfo(TargetLanguageBase.OutputFileInfo):
 
         def __init__(self, name, default_value, template_name):
@@ -0,0 +1,95 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+A cache of compiled Jinja2 templates, shared by all target languages in a process.
+"""
+
+import os
+import threading
+
+import jinja2
+
+from cligen.atomic_file import write_file_atomically
+
+
+class TemplateBytecodeCache(jinja2.BytecodeCache):
+    """
+    A Jinja2 bytecode cache that keeps compiled templates in memory for the lifetime of the process
+    and, optionally, persists them to a directory so that subsequent processes can skip template
+    compilation altogether.  Jinja2 keys each compiled template by the template's name and the hash
+    of its source code, so a modified template is never served stale bytecode.
+    """
+
+    def __init__(self, dir_path=None):
+        """
+        Initializes a new instance of this class.
+        *dir_path* must be a string whose value is the path of the directory in which to persist
+        compiled templates; may be None to only cache compiled templates in memory.  The directory
+        will be created if it does not exist.
+        """
+        self.dir_path = dir_path
+        self._bytecodes = {}
+        self._lock = threading.Lock()
+
+    def load_bytecode(self, bucket):
+        with self._lock:
+            bytecode = self._bytecodes.get(bucket.key)
+
+        if bytecode is not None:
+            bucket.bytecode_from_string(bytecode)
+        if bucket.code is not None or self.dir_path is None:
+            return
+
+        path = self._bytecode_file_path(bucket)
+        try:
+            with open(path, "rb") as f:
+                bytecode = f.read()
+        except IOError:
+            return
+
+        bucket.bytecode_from_string(bytecode)
+        if bucket.code is not None:
+            with self._lock:
+                self._bytecodes[bucket.key] = bytecode
+
+    def dump_bytecode(self, bucket):
+        bytecode = bucket.bytecode_to_string()
+        with self._lock:
+            self._bytecodes[bucket.key] = bytecode
+
+        if self.dir_path is not None:
+            self._write_bytecode_file(bucket, bytecode)
+
+    def clear(self):
+        with self._lock:
+            self._bytecodes.clear()
+
+    def _write_bytecode_file(self, bucket, bytecode):
+        """
+        Writes the given bytecode to the cache directory.
+        The bytecode is written to a temporary file that is then renamed into place, so that other
+        processes sharing the cache directory never see a partially-written file.  Failures are
+        silently ignored since the cache is merely an optimization.
+        """
+        path = self._bytecode_file_path(bucket)
+        try:
+            write_file_atomically(path, lambda f: f.write(bytecode))
+        except IOError:
+            pass
+
+    def _bytecode_file_path(self, bucket):
+        file_name = "{}.cache".format(bucket.key)
+        return os.path.join(self.dir_path, file_name)
@@ -6,8 +6,33 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+{% if argspec.response_files %}
+import os
+import re
+{% endif %}
 import sys
 
+{% set positional_arg = argspec.find_positional_argument() %}
+{% set repeatable_args = argspec.find_repeatable_arguments() %}
+{# the help screen, rendered once at generation time rather than every time that it is printed #}
+{% macro render_help_text() %}
+The following command-line arguments are recognized:
+{% for arg in argspec.arguments %}
+
+{% for key in arg.keys %}
+{{key}}
+{% endfor %}
+{% if arg.help_text %}
+    {{arg.help_text}}
+{% endif %}
+{% endfor %}
+{% if argspec.response_files %}
+
+@path
+    Read additional command-line arguments from the file at the given path
+{% endif %}
+{% endmacro %}
+{% set help_text = render_help_text() %}
 
 class ArgumentParser(object):
     """
@@ -50,12 +75,21 @@ class ArgumentParser(object):
         """
         if args is None:
             args = sys.argv[1:]
+        {% if fast %}
+        {% elif argspec.response_files %}
+        arg_iterator = self._ArgumentIterator(self._expand_response_files(args))
+        {% else %}
         arg_iterator = self._ArgumentIterator(args)
+        {% endif %}
 
         parsed_args = self.ParsedArguments()
         try:
+            {% if fast %}
+            self._parse_args(args, parsed_args)
+            {% else %}
             while arg_iterator.has_next():
                 self._parse_arg(arg_iterator, parsed_args)
+            {% endif %}
         except self.ExitApplicationSuccessfully as e:
             if no_exit:
                 raise
@@ -73,31 +107,125 @@ class ArgumentParser(object):
 
         return parsed_args
 
+    {% if fast %}
+    def _parse_args(self, args, parsed_args):
+        {% if argspec.response_files %}
+        # a single loop over the arguments, with all state in local variables, so that parsing
+        # invokes no methods for each argument other than those of the generator that expands the
+        # response files
+        {% else %}
+        # a single loop over the indexes of the arguments, with all state in local variables, so
+        # that parsing creates no objects and invokes no methods for each argument, other than to
+        # append values to lists
+        {% endif %}
+        attribute_names = self._ATTRIBUTE_NAMES
+        help_keys = self._HELP_KEYS
+        {% if repeatable_args %}
+        list_attribute_names = self._LIST_ATTRIBUTE_NAMES
+        {% endif %}
+        {% if positional_arg %}
+        positional_values = parsed_args.{{ positional_arg|varname }}
+        {% endif %}
+        {% if argspec.response_files %}
+        args = self._expand_response_files(args)
+        for arg in args:
+        {% else %}
+        arg_count = len(args)
+        index = 0
+        while index < arg_count:
+            arg = args[index]
+            index += 1
+        {% endif %}
+            attribute_name = attribute_names.get(arg)
+            if attribute_name is not None:
+                {% if argspec.response_files %}
+                value = next(args, None)
+                if value is None:
+                    raise self.ArgumentValueMissing("{} must be followed by a value".format(arg))
+                {% else %}
+                if index >= arg_count:
+                    raise self.ArgumentValueMissing("{} must be followed by a value".format(arg))
+                value = args[index]
+                index += 1
+                {% endif %}
+                {% if repeatable_args %}
+                if attribute_name in list_attribute_names:
+                    getattr(parsed_args, attribute_name).append(value)
+                else:
+                    setattr(parsed_args, attribute_name, value)
+                {% else %}
+                setattr(parsed_args, attribute_name, value)
+                {% endif %}
+            elif arg in help_keys:
+                self.print_help()
+                raise self.ExitApplicationSuccessfully()
+            {% if positional_arg %}
+            elif arg == "--":
+                {% if argspec.response_files %}
+                # all of the remaining arguments are positional
+                positional_values.extend(args)
+                {% else %}
+                # all of the remaining arguments are positional, and are copied with a single slice
+                # rather than one at a time
+                positional_values.extend(args[index:])
+                {% endif %}
+                break
+            elif arg.startswith("-") and arg != "-":
+                raise self.UnknownArgument("unknown argument: {}".format(arg))
+            else:
+                positional_values.append(arg)
+            {% else %}
+            elif arg.startswith("-"):
+                raise self.UnknownArgument("unknown argument: {}".format(arg))
+            else:
+                raise self.UnexpectedArgument("unexpected argument: {}".format(arg))
+            {% endif %}
+
+    # maps the keys of the arguments that take a value to the names of the attributes of
+    # ParsedArguments in which their values are stored; if more than one argument has the same key
+    # then the first of them is used
+    _ATTRIBUTE_NAMES = {
+        {% for arg in argspec.arguments if arg.supports_values() and not arg.is_positional() %}
+        {% for key in arg.keys if key.startswith("-") and argspec.find_argument(key) is sameas arg %}
+        {{ key|string_literal }}: {{ arg|varname|string_literal }},
+        {% endfor %}
+        {% endfor %}
+    }
+
+    {% if repeatable_args %}
+    # the names of the attributes of ParsedArguments whose values are lists to which the values of
+    # their arguments are appended
+    _LIST_ATTRIBUTE_NAMES = frozenset((
+        {% for arg in repeatable_args %}
+        {{ arg|varname|string_literal }},
+        {% endfor %}
+    ))
+
+    {% endif %}
+    # the keys of the builtin help argument
+    _HELP_KEYS = frozenset((
+        {% for arg in argspec.arguments if arg.type == arg.TYPE_BUILTIN_HELP %}
+        {% for key in arg.keys if key.startswith("-") and argspec.find_argument(key) is sameas arg %}
+        {{ key|string_literal }},
+        {% endfor %}
+        {% endfor %}
+    ))
+    {% else %}
     def _parse_arg(self, arg_iterator, parsed_args):
         arg = arg_iterator.peek()
         if arg is None:
             pass
         elif self._parse_positional_arg(arg_iterator, parsed_args):
             pass
-        {% for arg in argspec.arguments %}
-        elif self._parse_arg_{{ arg|varname }}(arg_iterator, parsed_args):
-            pass
-        {% endfor %}
         else:
-            raise self.UnknownArgument("unknown argument: {}".format(arg))
-
-    {% for arg in argspec.arguments %}
-    def _parse_arg_{{ arg|varname }}(self, arg_iterator, parsed_args):
-        arg = arg_iterator.peek()
-        if arg is None:
-            return False
-        {% for key in arg.keys %}
-        elif arg == "{{key}}":
+            parse_arg_func = self._PARSE_ARG_FUNCS.get(arg)
+            if parse_arg_func is None:
+                raise self.UnknownArgument("unknown argument: {}".format(arg))
             arg_iterator.advance()
-        {% endfor %}
-        else:
-            return False
+            parse_arg_func(self, arg, arg_iterator, parsed_args)
 
+    {% for arg in argspec.arguments if not arg.is_positional() %}
+    def _parse_arg_{{ arg|varname }}(self, arg, arg_iterator, parsed_args):
         {% if arg.type == arg.TYPE_BUILTIN_HELP %}
         self.print_help()
         raise self.ExitApplicationSuccessfully()
@@ -105,21 +233,138 @@ class ArgumentParser(object):
         value = arg_iterator.next()
         if value is None:
             raise self.ArgumentValueMissing("{} must be followed by a value".format(arg))
+        {% if arg.is_list() %}
+        parsed_args.{{ arg|varname }}.append(value)
+        {% else %}
         parsed_args.{{ arg|varname }} = value
-        return True
+        {% endif %}
         {% endif %}
 
     {% endfor %}
+    # maps each key to the function that parses the argument that it specifies, so that the argument
+    # specified by a key is found with a single lookup, regardless of the number of arguments; if
+    # more than one argument has the same key then the first of them is used
+    _PARSE_ARG_FUNCS = {
+        {% for arg in argspec.arguments if not arg.is_positional() %}
+        {% for key in arg.keys if argspec.find_argument(key) is sameas arg %}
+        {{ key|string_literal }}: _parse_arg_{{ arg|varname }},
+        {% endfor %}
+        {% endfor %}
+    }
 
     def _parse_positional_arg(self, arg_iterator, parsed_args):
         arg = arg_iterator.peek()
+        {% if positional_arg %}
+        if arg == "--":
+            # all of the remaining arguments are positional
+            arg_iterator.advance()
+            parsed_args.{{ positional_arg|varname }}.extend(arg_iterator.remaining())
+            return True
+        elif arg is None or (arg.startswith("-") and arg != "-"):
+            return False
+        else:
+            arg_iterator.advance()
+
+        parsed_args.{{ positional_arg|varname }}.append(arg)
+        return True
+        {% else %}
         if arg is None or arg.startswith("-"):
             return False
         else:
             arg_iterator.advance()
 
         raise self.UnexpectedArgument("unexpected argument: {}".format(arg))
+        {% endif %}
+    {% endif %}
+
+    {% if argspec.response_files %}
+    # the size, in bytes, at or above which a response file is memory-mapped rather than read into
+    # memory in its entirety
+    RESPONSE_FILE_MMAP_SIZE = 1024 * 1024
+
+    def _expand_response_files(self, args, response_file_paths=()):
+        """
+        Generates the given arguments, replacing each argument of the form "@path" with the
+        arguments in the response file at the given path, which are themselves expanded likewise.
+        Paths of response files are relative to the current directory.
+        *response_file_paths* must be a tuple of the real paths of the response files from which
+        the given arguments are read, used to detect response files that include themselves.
+        """
+        for arg in args:
+            if not arg.startswith("@") or arg == "@":
+                yield arg
+                continue
+
+            path = arg[1:]
+            real_path = os.path.realpath(path)
+            if real_path in response_file_paths:
+                raise self.ResponseFileError("response file includes itself: {}".format(path))
+
+            response_file_args = self._read_response_file(path)
+            response_file_paths_nested = response_file_paths + (real_path,)
+            for response_file_arg in self._expand_response_files(
+                    response_file_args, response_file_paths_nested):
+                yield response_file_arg
+
+    def _read_response_file(self, path):
+        """
+        Generates the arguments in the response file at the given path, which are separated by
+        whitespace and encoded with UTF-8.  Whitespace and quotes are included in an argument by
+        enclosing them in single or double quotes or by preceding them with a backslash.  The file
+        is read lazily, one argument at a time, and large files are memory-mapped, so that response
+        files with a great many arguments are never held in memory in their entirety.
+        """
+        try:
+            f = open(path, "rb")
+        except IOError as e:
+            raise self.ResponseFileError("unable to read response file: {} ({})".format(
+                path, e.strerror))
+
+        with f:
+            if os.fstat(f.fileno()).st_size < self.RESPONSE_FILE_MMAP_SIZE:
+                data = f.read()
+                mapped = False
+            else:
+                import mmap
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                mapped = True
+
+        try:
+            for match in self._RESPONSE_FILE_ARG_PATTERN.finditer(data):
+                arg = self._RESPONSE_FILE_QUOTING_PATTERN.sub(
+                    self._unquote_response_file_arg, match.group())
+                try:
+                    yield arg.decode("utf-8")
+                except UnicodeDecodeError as e:
+                    raise self.ResponseFileError("unable to decode response file: {} ({})".format(
+                        path, e))
+        finally:
+            if mapped:
+                data.close()
+
+    @classmethod
+    def _unquote_response_file_arg(cls, match):
+        (escaped_char, single_quoted, double_quoted) = match.groups()
+        if single_quoted is not None:
+            return single_quoted
+        elif double_quoted is not None:
+            return cls._RESPONSE_FILE_ESCAPE_PATTERN.sub(br"\1", double_quoted)
+        else:
+            return escaped_char
+
+    # an argument in a response file: a sequence of characters other than whitespace, quoted
+    # strings and backslash escapes; a missing closing quote is implied at the end of the file
+    _RESPONSE_FILE_ARG_PATTERN = re.compile(
+        br"""(?:[^\s"'\\]+|\\.?|"(?:[^"\\]|\\.?)*"?|'[^']*'?)+""", re.DOTALL)
 
+    # a backslash escape, single-quoted string or double-quoted string in an argument
+    _RESPONSE_FILE_QUOTING_PATTERN = re.compile(
+        br"""\\(.?)|'([^']*)'?|"((?:[^"\\]|\\.?)*)"?""", re.DOTALL)
+
+    # a backslash escape in a double-quoted string
+    _RESPONSE_FILE_ESCAPE_PATTERN = re.compile(br"\\(.?)", re.DOTALL)
+
+    {% endif %}
     @staticmethod
     def print_lines(lines, f):
         for line in lines:
@@ -135,7 +380,7 @@ class ArgumentParser(object):
     def get_invalid_args_lines(error):
         yield "ERROR: invalid command-line arguments: {}".format(error)
         {% if argspec.help_argument %}
-        yield "Run with {{ argspec.help_argument|most_descriptive_key}} for help"
+        yield {{ ("Run with " ~ argspec.help_argument|most_descriptive_key ~ " for help")|string_literal }}
         {% endif %}
 
     def print_error(self, error, f=None):
@@ -154,21 +399,42 @@ class ArgumentParser(object):
     def print_help(self, f=None):
         if f is None:
             f = self.stdout
-        lines = self.get_help_lines()
-        self.print_lines(lines, f)
+        f.write(self.get_help_text())
 
     @classmethod
     def get_help_lines(cls):
-        yield "The following command-line arguments are recognized:"
-        {% for arg in argspec.arguments %}
-        yield ""
-        {% for key in arg.keys %}
-        yield "{{key}}"
+        return cls.get_help_text().splitlines()
+
+    {% if help_text is large_text %}
+    # the help screen, compressed with zlib and encoded with base64 so that its size does not
+    # burden loading this module; it is only decompressed when it is needed
+    _HELP_TEXT_COMPRESSED = (
+        {% for line in help_text|compressed_bytes_literal_lines %}
+        {{ line }}
         {% endfor %}
-        {% if arg.help_text %}
-        yield "    {{arg.help_text}}"
-        {% endif %}
+    )
+
+    _help_text = None
+
+    @classmethod
+    def get_help_text(cls):
+        if cls._help_text is None:
+            import base64
+            import zlib
+            compressed_help_text = base64.b64decode(cls._HELP_TEXT_COMPRESSED)
+            cls._help_text = zlib.decompress(compressed_help_text).decode("utf-8")
+        return cls._help_text
+    {% else %}
+    _HELP_TEXT = (
+        {% for line in help_text|string_literal_lines %}
+        {{ line }}
         {% endfor %}
+    )
+
+    @classmethod
+    def get_help_text(cls):
+        return cls._HELP_TEXT
+    {% endif %}
 
     class ParsedArguments(object):
         """
@@ -176,13 +442,47 @@ class ArgumentParser(object):
         An instance of this class is returned from ArgumentParser.parse().
         """
 
+        {% if fast %}
+        # the attributes of the arguments that were not specified are never set, so reading them
+        # invokes __getattr__(), which returns their default values
+        __slots__ = (
+            {% for arg in argspec.arguments if arg.supports_values() %}
+            {{ arg|varname|string_literal }},
+            {% endfor %}
+        )
+
+        _DEFAULT_VALUES = {
+            {% for arg in argspec.arguments if arg.supports_values() and not arg.is_list() %}
+            {{ arg|varname|string_literal }}: None,
+            {% endfor %}
+        }
+        {% if positional_arg or repeatable_args %}
+
+        def __init__(self):
+            """
+            Initializes a new instance of this class, setting each attribute whose value is a list
+            to an empty list; the other attributes have their default values until they are set.
+            """
+            {% for arg in argspec.arguments if arg.is_list() %}
+            self.{{ arg|varname }} = []
+            {% endfor %}
+        {% endif %}
+
+        def __getattr__(self, name):
+            try:
+                return self._DEFAULT_VALUES[name]
+            except KeyError:
+                raise AttributeError("{!r} object has no attribute {!r}".format(
+                    type(self).__name__, name))
+        {% else %}
         def __init__(self):
             """
             Initializes a new instance of this class, setting each attribute to its default value.
             """
             {% for arg in argspec.arguments if arg.supports_values() %}
-            self.{{ arg|varname }} = None
+            self.{{ arg|varname }} = {{ "[]" if arg.is_list() else "None" }}
             {% endfor %}
+        {% endif %}
 
         def print(self, f=None):
             """
@@ -196,8 +496,47 @@ class ArgumentParser(object):
                 f = sys.stdout
 
             {% for arg in argspec.arguments if arg.supports_values() %}
-            print("{{ arg|most_descriptive_key }} {}".format("[not set]" if self.{{ arg|varname }} is None else self.{{ arg|varname }}), file=f)
+            print("{} {}".format({{ arg|most_descriptive_key|string_literal }}, "[not set]" if self.{{ arg|varname }} is None else self.{{ arg|varname }}), file=f)
             {% endfor %}
+    {% if fast %}
+    {% elif argspec.response_files %}
+
+    class _ArgumentIterator(object):
+
+        # reads the arguments from an iterator rather than indexing a sequence, so that arguments
+        # read from response files need not all be held in memory at once; the next argument is
+        # read when it is first needed, so that the errors raised when reading it are raised then
+        def __init__(self, args):
+            self.args = args
+            self.arg = None
+            self.arg_read = False
+
+        def peek(self):
+            if not self.arg_read:
+                self.arg = next(self.args, None)
+                self.arg_read = True
+            return self.arg
+
+        def next(self):
+            arg = self.peek()
+            self.advance()
+            return arg
+
+        def has_next(self):
+            return (self.peek() is not None)
+
+        def advance(self):
+            self.peek()
+            self.arg_read = False
+        {% if positional_arg %}
+
+        def remaining(self):
+            args = []
+            while self.has_next():
+                args.append(self.next())
+            return args
+        {% endif %}
+    {% else %}
 
     class _ArgumentIterator(object):
 
@@ -221,6 +560,15 @@ class ArgumentParser(object):
 
         def advance(self):
             self.index += 1
+        {% if positional_arg %}
+
+        def remaining(self):
+            # the remaining arguments are copied with a single slice rather than one at a time
+            args = self.args[self.index:]
+            self.index = len(self.args)
+            return args
+        {% endif %}
+    {% endif %}
 
     class Error(Exception):
         """
@@ -304,6 +652,14 @@ class ArgumentParser(object):
         be raised since it is an orphaned positional argument and the parser does not recognize
         positional arguments.
         """
+{% if argspec.response_files %}
+
+    class ResponseFileError(InvalidCommandLineArguments):
+        """
+        Exception raised if a response file specified by an argument of the form "@path" cannot
+        be read or decoded, or includes itself, directly or indirectly.
+        """
+{% endif %}
 
 
 # Allows this file to be run as an application to test parsing command-line arguments
@@ -0,0 +1,254 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Detection of changes to files, for regenerating output files when their inputs change.
+"""
+
+import ctypes
+import errno
+import os
+import select
+import struct
+import time
+
+
+def new_file_watcher():
+    """
+    Creates and returns a new file watcher, which is an InotifyFileWatcher if inotify is available
+    on this system or a PollingFileWatcher otherwise.
+    """
+    try:
+        return InotifyFileWatcher()
+    except InotifyFileWatcher.Error:
+        return PollingFileWatcher()
+
+
+class FileWatcher:
+    """
+    Base class for objects that report changes to a set of files.
+    """
+
+    def set_paths(self, paths):
+        """
+        Sets the files to watch.
+        *paths* must be an iterable of strings whose values are the absolute paths of the files to
+        watch.  Changes to files that were already being watched that occurred before this method
+        was invoked will still be reported by the next invocation of wait().
+        """
+        raise NotImplementedError()
+
+    def wait(self, timeout=None):
+        """
+        Waits for one or more of the watched files to change, for example by being modified,
+        replaced, created or deleted.
+        *timeout* must be a number whose value is the maximum number of seconds to wait; may be
+        None (the default) to wait indefinitely.
+        Returns a set containing the paths of the watched files that changed; the set is empty if
+        and only if the timeout elapsed before any of them changed.
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Releases the resources used by this object.
+        """
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class PollingFileWatcher(FileWatcher):
+    """
+    A FileWatcher that detects changes by periodically comparing the modification time, size and
+    inode number of each file with those that it had when it was last checked.
+    """
+
+    def __init__(self, interval=0.1):
+        """
+        Initializes a new instance of this class.
+        *interval* must be a number whose value is the number of seconds to wait between checks.
+        """
+        self.interval = interval
+        self._states = {}
+
+    def set_paths(self, paths):
+        states = {}
+        for path in paths:
+            try:
+                states[path] = self._states[path]
+            except KeyError:
+                states[path] = self._file_state(path)
+        self._states = states
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed_paths = set()
+            for (path, state) in self._states.items():
+                cur_state = self._file_state(path)
+                if cur_state != state:
+                    self._states[path] = cur_state
+                    changed_paths.add(path)
+
+            if changed_paths:
+                return changed_paths
+
+            if deadline is None:
+                time.sleep(self.interval)
+            else:
+                remaining_time = deadline - time.monotonic()
+                if remaining_time <= 0:
+                    return changed_paths
+                time.sleep(min(self.interval, remaining_time))
+
+    @staticmethod
+    def _file_state(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class InotifyFileWatcher(FileWatcher):
+    """
+    A FileWatcher that uses the Linux inotify API, which reports changes as soon as they happen
+    without the overhead of polling.  The directories containing the watched files are watched,
+    rather than the files themselves, so that files replaced by renaming another file over them,
+    as many text editors do when saving, continue to be watched.
+    """
+
+    # constants from sys/inotify.h
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ONLYDIR = 0x01000000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (
+        IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+        IN_ONLYDIR
+    )
+
+    # the layout of the fixed-size part of struct inotify_event: wd, mask, cookie and len
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self):
+        """
+        Initializes a new instance of this class.
+        Raises self.Error if inotify is not available.
+        """
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            self._inotify_init1 = libc.inotify_init1
+            self._inotify_add_watch = libc.inotify_add_watch
+            self._inotify_rm_watch = libc.inotify_rm_watch
+        except (OSError, AttributeError, TypeError) as e:
+            raise self.Error("inotify is not available ({})".format(e))
+
+        self._inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._inotify_rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+
+        self._fd = self._inotify_init1(self.IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise self.Error("inotify_init1() failed: {}".format(os.strerror(errno)))
+
+        self._paths = frozenset()
+        self._dir_paths_by_wd = {}
+        self._wds_by_dir_path = {}
+
+    def set_paths(self, paths):
+        self._paths = frozenset(paths)
+        dir_paths = set(os.path.dirname(x) for x in self._paths)
+
+        for dir_path in tuple(self._wds_by_dir_path):
+            if dir_path not in dir_paths:
+                wd = self._wds_by_dir_path.pop(dir_path)
+                del self._dir_paths_by_wd[wd]
+                self._inotify_rm_watch(self._fd, wd)
+
+        for dir_path in dir_paths:
+            if dir_path in self._wds_by_dir_path:
+                continue
+            wd = self._inotify_add_watch(self._fd, os.fsencode(dir_path), self.WATCH_MASK)
+            if wd >= 0:
+                self._wds_by_dir_path[dir_path] = wd
+                self._dir_paths_by_wd[wd] = dir_path
+                continue
+
+            # a directory that cannot be watched because it does not exist or is inaccessible is
+            # silently ignored, since the files in it cannot be modified either; but running out of
+            # watches or memory would cause changes to be missed, so is reported
+            error_code = ctypes.get_errno()
+            if error_code in (errno.ENOSPC, errno.ENOMEM):
+                raise OSError(error_code, "inotify_add_watch() failed: {}".format(
+                    os.strerror(error_code)), dir_path)
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining_time = None if deadline is None else max(deadline - time.monotonic(), 0)
+            (readable, _, _) = select.select([self._fd], [], [], remaining_time)
+            if not readable:
+                return set()
+
+            changed_paths = self._read_events()
+            if changed_paths:
+                return changed_paths
+
+    def _read_events(self):
+        """
+        Reads the pending events from the inotify file descriptor and returns a set containing the
+        paths of the watched files that they concern.
+        """
+        data = os.read(self._fd, 65536)
+        changed_paths = set()
+        offset = 0
+        while offset < len(data):
+            (wd, mask, cookie, name_length) = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+
+            if mask & self.IN_Q_OVERFLOW:
+                # events were lost, so any of the watched files may have changed
+                changed_paths.update(self._paths)
+                continue
+
+            dir_path = self._dir_paths_by_wd.get(wd)
+            if dir_path is not None and name:
+                path = os.path.join(dir_path, os.fsdecode(name))
+                if path in self._paths:
+                    changed_paths.add(path)
+
+        return changed_paths
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    class Error(Exception):
+        pass
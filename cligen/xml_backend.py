@@ -0,0 +1,153 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+The XML parsers with which cligen specification files can be parsed.
+Each backend produces ElementTree-compatible elements, in which tag names of elements in a
+namespace are formatted as "{namespace}tag" and comments and processing instructions are omitted.
+"""
+
+import io
+import xml.etree.ElementTree
+
+
+def default_xml_backend():
+    """
+    Creates and returns the XML backend to use when none is specified: an ElementTreeXmlBackend.
+    The LxmlXmlBackend is never the default, even if lxml is installed, since parsing cligen
+    specification files with it is slower end to end (see tests/benchmarks/parse_spec.py); it must
+    be specified explicitly to be used.
+    """
+    return ElementTreeXmlBackend()
+
+
+class XmlBackend:
+
+    def iterparse(self, source):
+        """
+        Parses an XML document incrementally, generating a ("start", element) pair when the start
+        tag of each element is parsed and an ("end", element) pair when its end tag is parsed.
+        *source* must be either a string whose value is the path of a file, or a file object opened
+        in binary mode, from which to read the XML document.
+        Raises self.ParseError if the document is not well-formed, self.UnsupportedDocument if
+        this backend cannot parse the document identically to the ElementTreeXmlBackend, or
+        IOError if reading the document fails.
+        """
+        raise NotImplementedError()
+
+    def fromstring(self, xml_string):
+        """
+        Parses the given XML document, which must be a string or bytes, and returns its root
+        element.
+        Raises self.ParseError or self.UnsupportedDocument under the same conditions as
+        iterparse().
+        """
+        raise NotImplementedError()
+
+    class Error(Exception):
+        pass
+
+    class ParseError(Error):
+        pass
+
+    class UnsupportedDocument(Error):
+        pass
+
+
+class ElementTreeXmlBackend(XmlBackend):
+    """
+    The XML backend that uses xml.etree.ElementTree from the Python standard library, which is
+    always available.  The messages of the errors that it raises are the ones that cligen reports.
+    """
+
+    def iterparse(self, source):
+        try:
+            yield from xml.etree.ElementTree.iterparse(source, events=("start", "end"))
+        except xml.etree.ElementTree.ParseError as e:
+            raise self.ParseError("{}".format(e))
+
+    def fromstring(self, xml_string):
+        try:
+            return xml.etree.ElementTree.fromstring(xml_string)
+        except xml.etree.ElementTree.ParseError as e:
+            raise self.ParseError("{}".format(e))
+
+
+class LxmlXmlBackend(XmlBackend):
+    """
+    The XML backend that uses the lxml package.  Although lxml parses XML faster than ElementTree,
+    the cost of creating its element proxies outweighs that gain when parsing cligen specification
+    files, so this backend is only used if specified explicitly.
+    Documents with a document type declaration are reported as unsupported, since lxml's treatment
+    of the entities that they may declare differs from that of ElementTree.  The messages of the
+    errors that it raises are those of lxml and differ from those of ElementTree.
+    """
+
+    def __init__(self):
+        """
+        Initializes a new instance of this class.
+        Raises self.Unavailable if lxml is not installed.
+        """
+        try:
+            import lxml.etree
+        except ImportError as e:
+            raise self.Unavailable("lxml is not installed ({})".format(e))
+        self._etree = lxml.etree
+
+    PARSER_OPTIONS = {
+        "remove_comments": True,
+        "remove_pis": True,
+        "resolve_entities": False,
+        "load_dtd": False,
+        "no_network": True,
+    }
+
+    def iterparse(self, source):
+        events = self._etree.iterparse(source, events=("start", "end"), **self.PARSER_OPTIONS)
+        try:
+            # only the first event needs to be checked, after which the events are passed through
+            # unchanged to keep the per-element overhead to a minimum
+            for (event, element) in events:
+                self._check_document(element)
+                yield (event, element)
+                break
+            yield from events
+        except self._etree.XMLSyntaxError as e:
+            raise self.ParseError("{}".format(e))
+
+    def fromstring(self, xml_string):
+        if isinstance(xml_string, str):
+            # lxml refuses to parse strings that contain an encoding declaration, which ElementTree
+            # ignores, so parse the encoded string instead, overriding any such declaration
+            xml_string = xml_string.encode("utf8")
+            parser = self._etree.XMLParser(encoding="utf8", **self.PARSER_OPTIONS)
+        else:
+            parser = self._etree.XMLParser(**self.PARSER_OPTIONS)
+
+        try:
+            root = self._etree.parse(io.BytesIO(xml_string), parser).getroot()
+        except self._etree.XMLSyntaxError as e:
+            raise self.ParseError("{}".format(e))
+
+        self._check_document(root)
+        return root
+
+    def _check_document(self, root):
+        if root.getroottree().docinfo.doctype:
+            raise self.UnsupportedDocument("documents with a document type declaration are not "
+                                           "supported by lxml backend")
+
+    class Unavailable(Exception):
+        pass
@@ -0,0 +1,423 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Limits on the resources that parsing an untrusted cligen specification file may consume.
+"""
+
+import codecs
+import io
+import os
+import re
+import xml.parsers.expat
+
+
+class XmlLimits:
+    """
+    Limits on the size of an XML document, the number of elements in it, the depth to which they
+    are nested and the amount of text produced by expanding the entities that it declares, so that
+    a hostile document, such as one that uses nested entities to expand to gigabytes of text (the
+    "billion laughs" attack), is rejected quickly instead of exhausting CPU and memory.
+    A document given as a string is checked in its entirety by check_string() before it is handed
+    to an XML backend.  The size and entities of a document read from a file are checked by open()
+    before it is handed to an XML backend, and the number and depth of its elements are checked by
+    the caller, as it processes the elements, using check_element_count() and check_depth().
+    The elements of the files that a document includes count towards the limit on the number of
+    elements of the document, once for each time that they are included, and the depth to which
+    included files may include other files is limited too, checked by the caller using
+    check_include_depth(), so that a document cannot exceed the limits by spreading its elements
+    over many included files.
+    Each limit may be None to not limit the corresponding resource.
+    """
+
+    DEFAULT_MAX_SIZE = 32 * 1024 * 1024
+    DEFAULT_MAX_ELEMENT_COUNT = 1000000
+    DEFAULT_MAX_DEPTH = 32
+    DEFAULT_MAX_ENTITY_EXPANSION = 1024 * 1024
+    DEFAULT_MAX_INCLUDE_DEPTH = 16
+
+    # the number of bytes to read from a file at a time while looking for entity declarations
+    CHUNK_SIZE = 64 * 1024
+
+    ENTITY_REFERENCE_PATTERN = re.compile(r"&([^#&;\s][^&;\s]*);")
+
+    def __init__(
+            self, max_size=DEFAULT_MAX_SIZE, max_element_count=DEFAULT_MAX_ELEMENT_COUNT,
+            max_depth=DEFAULT_MAX_DEPTH, max_entity_expansion=DEFAULT_MAX_ENTITY_EXPANSION,
+            max_include_depth=DEFAULT_MAX_INCLUDE_DEPTH):
+        """
+        Initializes a new instance of this class.
+        *max_size* must be an int whose value is the maximum size of a document, in bytes or, for a
+        document given as a str, in characters.
+        *max_element_count* must be an int whose value is the maximum number of elements in a
+        document, including the root element and the elements of the files that it includes.
+        *max_depth* must be an int whose value is the maximum depth to which elements may be
+        nested, where the root element has a depth of 1.
+        *max_entity_expansion* must be an int whose value is the maximum total number of
+        characters that the references to entities declared by a document may expand to.
+        *max_include_depth* must be an int whose value is the maximum depth to which included
+        files may be nested, where a file included by the document has a depth of 1.
+        """
+        self.max_size = max_size
+        self.max_element_count = max_element_count
+        self.max_depth = max_depth
+        self.max_entity_expansion = max_entity_expansion
+        self.max_include_depth = max_include_depth
+
+    def open(self, source):
+        """
+        Returns a file object opened in binary mode from which to read the XML document in the
+        given source, which must be either a string whose value is the path of a file or a file
+        object opened in binary mode.  Reading more than self.max_size bytes from the returned
+        file object raises self.LimitExceeded.
+        Raises self.LimitExceeded if the size of the file is known to exceed self.max_size or the
+        references to the entities that the document declares expand to more than
+        self.max_entity_expansion characters, or IOError if reading the document fails.
+        """
+        if isinstance(source, str):
+            f = open(source, "rb")
+            try:
+                self.check_size(os.fstat(f.fileno()).st_size)
+            except BaseException:
+                f.close()
+                raise
+        else:
+            f = source
+
+        reader = self.LimitedReader(f, self.max_size, close=(f is not source))
+        try:
+            self._check_file_entities(reader)
+        except BaseException:
+            reader.close()
+            raise
+        return reader
+
+    def check_string(self, xml_string):
+        """
+        Checks the given XML document, which must be a string or bytes, against all of the limits.
+        Since the document is checked before it is parsed into a tree, the number and depth of its
+        elements are counted by parsing it without building a tree, which takes a fraction of the
+        time taken to build one.
+        Raises self.LimitExceeded if any of the limits is exceeded.
+        """
+        self.check_size(len(xml_string))
+        if self.max_entity_expansion is not None:
+            self._check_string_entities(xml_string)
+        if self.max_element_count is not None or self.max_depth is not None:
+            self._check_elements(xml_string)
+
+    def _check_string_entities(self, xml_string):
+        if isinstance(xml_string, str):
+            # as when a string is given to an XML parser, any declared encoding is overridden
+            xml_bytes = xml_string.encode("utf-8", "surrogatepass")
+            entity_lengths = self._entity_lengths([xml_bytes], encoding="utf-8")
+        else:
+            xml_bytes = xml_string
+            entity_lengths = self._entity_lengths([xml_bytes])
+        if entity_lengths:
+            self._check_entity_references(xml_bytes, entity_lengths)
+
+    def check_size(self, size):
+        if self.max_size is not None and size > self.max_size:
+            raise self.LimitExceeded("size of document exceeds the limit of {} bytes".format(
+                self.max_size))
+
+    def check_element_count(self, element_count):
+        if self.max_element_count is not None and element_count > self.max_element_count:
+            raise self.LimitExceeded("number of elements exceeds the limit of {}".format(
+                self.max_element_count))
+
+    def check_depth(self, depth):
+        if self.max_depth is not None and depth > self.max_depth:
+            raise self.LimitExceeded("depth of nested elements exceeds the limit of {}".format(
+                self.max_depth))
+
+    def check_include_depth(self, include_depth):
+        if self.max_include_depth is not None and include_depth > self.max_include_depth:
+            raise self.LimitExceeded(
+                "depth of nested included files exceeds the limit of {}".format(
+                    self.max_include_depth))
+
+    def _check_elements(self, xml_string):
+        """
+        Checks the number and depth of the elements of the given XML document, which must be a
+        string or bytes whose entities have already been checked.  If the document is not
+        well-formed then checking stops at the error, which the XML backend reports.
+        """
+        element_count = 0
+        depth = 0
+
+        def on_start_element(name, attributes):
+            nonlocal element_count, depth
+            element_count += 1
+            depth += 1
+            self.check_element_count(element_count)
+            self.check_depth(depth)
+
+        def on_end_element(name):
+            nonlocal depth
+            depth -= 1
+
+        parser = xml.parsers.expat.ParserCreate()
+        parser.StartElementHandler = on_start_element
+        parser.EndElementHandler = on_end_element
+        try:
+            parser.Parse(xml_string, True)
+        except xml.parsers.expat.ExpatError:
+            pass
+
+    def _check_file_entities(self, reader):
+        """
+        Checks the expansion of the entities declared by the document read from the given
+        LimitedReader.  The bytes read are pushed back into the reader, to be read again by the XML
+        backend.  The document is only read in its entirety if it declares entities; otherwise,
+        reading stops at the start tag of the root element.
+        """
+        if self.max_entity_expansion is None:
+            return
+
+        chunks = []
+
+        def read_chunks():
+            while True:
+                chunk = reader.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                yield chunk
+
+        entity_lengths = self._entity_lengths(read_chunks())
+        if entity_lengths:
+            for chunk in read_chunks():
+                pass
+            self._check_entity_references(b"".join(chunks), entity_lengths)
+
+        reader.unread(b"".join(chunks))
+
+    def _entity_lengths(self, chunks, encoding=None):
+        """
+        Parses the prolog of the XML document whose contents are the given iterable of bytes, up to
+        the start tag of the root element, and returns an EntityLengths object that maps the name
+        of each general entity that it declares to the number of characters to which a reference
+        to it expands.  The returned object is empty if the document does not declare
+        entities or its prolog is not well-formed, in which case the XML backend reports the error.
+        Raises self.LimitExceeded if a single reference to any of the entities expands to more than
+        self.max_entity_expansion characters.
+        *encoding* must be a string whose value is the encoding of the document, overriding any
+        encoding that it declares; may be None (the default) to use the declared encoding.
+        """
+        entity_values = {}
+        entity_lengths = self.EntityLengths()
+
+        def on_xml_decl(version, encoding, standalone):
+            entity_lengths.encoding = encoding
+
+        def on_entity_decl(name, is_parameter_entity, value, *args):
+            if not is_parameter_entity and value is not None:
+                entity_values.setdefault(name, value)
+
+        def on_start_element(name, attributes):
+            entity_lengths.content_start = parser.CurrentByteIndex
+            raise self._PrologEnd()
+
+        parser = xml.parsers.expat.ParserCreate(encoding)
+        parser.XmlDeclHandler = on_xml_decl
+        parser.EntityDeclHandler = on_entity_decl
+        parser.StartElementHandler = on_start_element
+        try:
+            for chunk in chunks:
+                parser.Parse(chunk, False)
+        except self._PrologEnd:
+            pass
+        except xml.parsers.expat.ExpatError:
+            return self.EntityLengths()
+        if encoding is not None:
+            entity_lengths.encoding = encoding
+
+        for name in entity_values:
+            length = self._entity_length(name, entity_values, entity_lengths)
+            if self.max_entity_expansion is not None and length > self.max_entity_expansion:
+                raise self.LimitExceeded(
+                    "expansion of entity {} exceeds the limit of {} characters".format(
+                        name, self.max_entity_expansion))
+        return entity_lengths
+
+    def _entity_length(self, name, entity_values, entity_lengths):
+        """
+        Returns the number of characters to which a reference to the entity with the given name
+        expands, storing it, and those of the entities that it references, in the given
+        EntityLengths.  The values of the entities are traversed without recursion, so that a long
+        chain of entities cannot exhaust the stack, and a reference to an entity that references
+        itself, which the XML backend reports as an error, is counted as the text of the reference.
+        """
+        pending = [name]
+        visiting = set()
+        while pending:
+            current_name = pending[-1]
+            if current_name in entity_lengths:
+                pending.pop()
+                continue
+
+            value = entity_values[current_name]
+            referenced_names = [
+                x for x in self.ENTITY_REFERENCE_PATTERN.findall(value)
+                if x in entity_values and x not in entity_lengths
+            ]
+            if current_name not in visiting:
+                visiting.add(current_name)
+                unvisited_names = [x for x in referenced_names if x not in visiting]
+                if unvisited_names:
+                    pending.extend(unvisited_names)
+                    continue
+
+            pending.pop()
+            visiting.discard(current_name)
+            length = len(value)
+            for match in self.ENTITY_REFERENCE_PATTERN.finditer(value):
+                if match.group(1) in entity_lengths:
+                    length += entity_lengths[match.group(1)] - len(match.group(0))
+            entity_lengths[current_name] = length
+
+        return entity_lengths[name]
+
+    def _check_entity_references(self, xml_bytes, entity_lengths):
+        """
+        Raises self.LimitExceeded if the references to the given entities in the given XML
+        document, which must be bytes, expand to more than self.max_entity_expansion characters
+        in total.  Only references following the start tag of the root element are counted, since
+        those in the declarations of entities are accounted for by the given EntityLengths.
+        References in comments and CDATA sections, which are not expanded, are counted too, erring
+        on the side of caution.
+        """
+        xml_string = self._decode(xml_bytes, entity_lengths)
+        expansion = 0
+        for match in self.ENTITY_REFERENCE_PATTERN.finditer(xml_string):
+            expansion += entity_lengths.get(match.group(1), 0)
+            if expansion > self.max_entity_expansion:
+                raise self.LimitExceeded(
+                    "expansion of entities exceeds the limit of {} characters".format(
+                        self.max_entity_expansion))
+
+    @staticmethod
+    def _decode(xml_bytes, entity_lengths):
+        """
+        Decodes the part of the given XML document that follows the prolog, whose encoding and
+        extent were recorded in the given EntityLengths, for the sole purpose of finding the entity
+        references in it.
+        """
+        if xml_bytes.startswith(codecs.BOM_UTF16_LE):
+            encoding = "utf-16-le"
+        elif xml_bytes.startswith(codecs.BOM_UTF16_BE):
+            encoding = "utf-16-be"
+        elif entity_lengths.encoding is None:
+            encoding = "utf-8"
+        else:
+            encoding = entity_lengths.encoding
+        content = xml_bytes[entity_lengths.content_start:]
+        try:
+            return content.decode(encoding, "replace")
+        except LookupError:
+            return content.decode("latin-1")
+
+    class Error(Exception):
+        pass
+
+    class LimitExceeded(Error):
+        pass
+
+    class _PrologEnd(Exception):
+        pass
+
+    class EntityLengths(dict):
+
+        def __init__(self):
+            super().__init__()
+            # the encoding of the document, or None if it does not declare one
+            self.encoding = None
+            # the offset, in bytes, of the start tag of the root element of the document
+            self.content_start = 0
+
+    class LimitedReader(io.RawIOBase):
+        """
+        A file object that reads from another file object and raises XmlLimits.LimitExceeded if
+        more than a maximum number of bytes are read from it.
+        """
+
+        def __init__(self, f, max_size, close):
+            """
+            Initializes a new instance of this class.
+            *f* must be the file object, opened in binary mode, from which to read.
+            *max_size* must be an int whose value is the maximum number of bytes to read from *f*;
+            may be None to not limit it.
+            *close* must be a bool whose value is whether or not to close *f* when this object is
+            closed.
+            """
+            super().__init__()
+            self._file = f
+            self._max_size = max_size
+            self._close = close
+            self._size = 0
+            # the bytes pushed back by unread(), of which those before _unread_offset have been
+            # read again; an offset is kept, rather than slicing off the bytes as they are read, so
+            # that reading them in small chunks does not copy the remainder on every read
+            self._unread_data = b""
+            self._unread_offset = 0
+
+        def readable(self):
+            return True
+
+        def read(self, size=-1):
+            if size is None or size < 0:
+                data = self._unread_data[self._unread_offset:] + self._read_file(-1)
+                self._unread_data = b""
+                self._unread_offset = 0
+                return data
+
+            if self._unread_offset < len(self._unread_data):
+                start = self._unread_offset
+                self._unread_offset = min(start + size, len(self._unread_data))
+                data = self._unread_data[start:self._unread_offset]
+                if self._unread_offset == len(self._unread_data):
+                    self._unread_data = b""
+                    self._unread_offset = 0
+                return data
+
+            return self._read_file(size)
+
+        def _read_file(self, size):
+            data = self._file.read(size)
+            self._size += len(data)
+            if self._max_size is not None and self._size > self._max_size:
+                raise XmlLimits.LimitExceeded(
+                    "size of document exceeds the limit of {} bytes".format(self._max_size))
+            return data
+
+        def readinto(self, buffer):
+            data = self.read(len(buffer))
+            buffer[:len(data)] = data
+            return len(data)
+
+        def unread(self, data):
+            """
+            Pushes back the given bytes, so that they are returned by the next reads, before the
+            remaining bytes of the underlying file object.
+            """
+            self._unread_data = data + self._unread_data[self._unread_offset:]
+            self._unread_offset = 0
+
+        def close(self):
+            if not self.closed and self._close:
+                self._file.close()
+            super().close()
@@ -0,0 +1,95 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compares the time to detect the newline character sequence of large existing output files using
+TargetLanguageBase._detect_newline() with that of the line-by-line text-mode scan that it replaced.
+"""
+
+import argparse
+import os
+import re
+import tempfile
+import time
+
+from cligen.targets import TargetLanguageBase
+
+
+def main():
+    args = parse_arguments()
+    size = args.megabytes * 1024 * 1024
+
+    cases = (
+        ("newline at start", "ab\r\n" + ("x" * size)),
+        ("newline at end", ("x" * size) + "\r\n"),
+        ("no newline", "x" * size),
+    )
+
+    with tempfile.TemporaryDirectory() as temp_dir_path:
+        path = os.path.join(temp_dir_path, "test.txt")
+        print("{} MB files, {} iterations:".format(args.megabytes, args.iterations))
+        for encoding in ("utf8", "utf16"):
+            for (description, contents) in cases:
+                with open(path, "wb") as f:
+                    f.write(contents.encode(encoding))
+                old = time_detect_newline(detect_newline_text_mode, path, encoding, args.iterations)
+                new = time_detect_newline(
+                    TargetLanguageBase._detect_newline, path, encoding, args.iterations)
+                print("   {:5} {:16}: old {:9.3f} ms   new {:9.3f} ms".format(
+                    encoding, description, old, new))
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "-m", "--megabytes",
+        type=int,
+        default=8,
+        help="""The size, in megabytes, of the files to scan (default: %(default)s)"""
+    )
+
+    parser.add_argument(
+        "-n", "--iterations",
+        type=int,
+        default=10,
+        help="""The number of times to scan each file (default: %(default)s)"""
+    )
+
+    return parser.parse_args()
+
+
+def time_detect_newline(detect_newline, path, encoding, iterations):
+    start_time = time.perf_counter()
+    for i in range(iterations):
+        detect_newline(path, encoding)
+    end_time = time.perf_counter()
+    return (end_time - start_time) * 1000 / iterations
+
+
+def detect_newline_text_mode(path, encoding):
+    """
+    The implementation of TargetLanguageBase._detect_newline() prior to bounding the scan.
+    """
+    with open(path, "rt", encoding=encoding, newline="") as f:
+        for line in f:
+            match = re.search(r"([\r\n]+$)", line)
+            if match is not None:
+                return match.group(1)
+    return os.linesep
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measures the time per command-line argument taken by the parsers generated by the Python target
+languages, for specifications with various numbers of arguments.  Each parsed token is a key of
+the last argument in the specification, the worst case for a parser that compares the token with
+the keys of each argument in turn.  Also measures the time taken and memory allocated to parse a
+short command line, which dominate in applications that parse a great many command lines, and the
+time taken to parse a great many positional arguments, with and without a preceding "--".
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from cligen.argspec import ArgumentParserSpec
+from cligen.target_python import PythonFastTargetLanguage
+from cligen.target_python import PythonTargetLanguage
+
+
+def main():
+    args = parse_arguments()
+    target_languages = (PythonTargetLanguage(), PythonFastTargetLanguage())
+    print("{} tokens, {} iterations:".format(args.tokens, args.iterations))
+    for argument_count in args.argument_counts:
+        print("   {} arguments:".format(argument_count))
+        tokens = ["--argument-{}".format(argument_count - 1), "value"] * (args.tokens // 2)
+        short_tokens = ["-a0", "value", "--argument-{}".format(argument_count - 1), "value"]
+        for target_language in target_languages:
+            parser_class = generate_parser_class(target_language, argument_count)
+            elapsed_time = time_parse(parser_class, tokens, args.iterations)
+            short_elapsed_time = time_parse(parser_class, short_tokens, args.iterations * 1000)
+            allocated_memory = parse_allocated_memory(parser_class, short_tokens)
+            print("      {:13}: {:8.3f} us/token  {:8.3f} us/parse  {:6} bytes/parse".format(
+                target_language.key, elapsed_time * 1000000 / len(tokens),
+                short_elapsed_time * 1000000, allocated_memory))
+
+    paths = ["/path/to/file{}.txt".format(i) for i in range(args.tokens)]
+    print("   {} positional arguments:".format(len(paths)))
+    for target_language in target_languages:
+        parser_class = generate_parser_class(target_language, 1, positional=True)
+        elapsed_time = time_parse(parser_class, paths, args.iterations)
+        end_of_options_elapsed_time = time_parse(parser_class, ["--"] + paths, args.iterations)
+        print("      {:13}: {:8.3f} ms  after \"--\": {:8.3f} ms".format(
+            target_language.key, elapsed_time * 1000, end_of_options_elapsed_time * 1000))
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "-a", "--argument-counts",
+        type=int,
+        nargs="+",
+        default=[1, 10, 100, 300, 1000],
+        help="""The numbers of arguments in the specifications (default: %(default)s)"""
+    )
+
+    parser.add_argument(
+        "-t", "--tokens",
+        type=int,
+        default=10000,
+        help="""The number of command-line arguments to parse (default: %(default)s)"""
+    )
+
+    parser.add_argument(
+        "-n", "--iterations",
+        type=int,
+        default=5,
+        help="""The number of times to parse the command-line arguments (default: %(default)s)"""
+    )
+
+    return parser.parse_args()
+
+
+def generate_parser_class(target_language, argument_count, positional=False):
+    builder = ArgumentParserSpec.Builder()
+    for i in range(argument_count):
+        builder.add_argument(keys=["-a{}".format(i), "--argument-{}".format(i)])
+    if positional:
+        builder.add_argument(keys=["paths"], type=ArgumentParserSpec.Argument.TYPE_POSITIONAL_LIST)
+    builder.add_help_argument()
+    (source,) = target_language.generate_to_strings(builder.build(), newline="\n")
+    namespace = {"__name__": "generated_parser"}
+    exec(compile(source, "<generated>", "exec"), namespace)
+    return namespace["ArgumentParser"]
+
+
+def time_parse(parser_class, tokens, iterations):
+    """
+    Returns the average number of seconds that the given parser takes to parse the given tokens.
+    """
+    parser = parser_class()
+    parser.parse(tokens, no_exit=True)
+    start_time = time.perf_counter()
+    for i in range(iterations):
+        parser.parse(tokens, no_exit=True)
+    end_time = time.perf_counter()
+    return (end_time - start_time) / iterations
+
+
+def parse_allocated_memory(parser_class, tokens):
+    """
+    Returns the peak number of bytes allocated while the given parser parses the given tokens.
+    """
+    parser = parser_class()
+    parser.parse(tokens, no_exit=True)
+    tracemalloc.start()
+    parser.parse(tokens, no_exit=True)
+    (_, peak_memory) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak_memory
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compares the time and peak memory taken to parse cligen specification files of various sizes by
+ArgumentSpecParser.parse_file(), using each of the available XML backends, with those taken by
+building the entire document tree first.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree
+
+from cligen.argspec_xml_parser import ArgumentSpecParser
+from cligen.xml_backend import ElementTreeXmlBackend
+from cligen.xml_backend import LxmlXmlBackend
+
+
+def main():
+    args = parse_arguments()
+
+    parse_funcs = [
+        ("document tree", parse_file_tree),
+        ("ElementTree", parse_file_func(ElementTreeXmlBackend())),
+    ]
+    try:
+        parse_funcs.append(("lxml", parse_file_func(LxmlXmlBackend())))
+    except LxmlXmlBackend.Unavailable as e:
+        print("WARNING: {}".format(e))
+
+    with tempfile.TemporaryDirectory() as temp_dir_path:
+        path = os.path.join(temp_dir_path, "cligen.xml")
+        print("{} iterations:".format(args.iterations))
+        for argument_count in args.argument_counts:
+            write_spec_file(path, argument_count)
+            size = os.path.getsize(path) / (1024 * 1024)
+            print("   {} arguments ({:.1f} MB):".format(argument_count, size))
+            for (name, parse) in parse_funcs:
+                (elapsed_time, peak_memory) = time_parse(parse, path, args.iterations)
+                print("      {:13}: {:9.3f} ms  peak memory {:8.2f} MB".format(
+                    name, elapsed_time, peak_memory / (1024 * 1024)))
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "-a", "--argument-counts",
+        type=int,
+        nargs="+",
+        default=[100, 10000, 100000],
+        help="""The numbers of arguments in the specification files to parse
+        (default: %(default)s)"""
+    )
+
+    parser.add_argument(
+        "-n", "--iterations",
+        type=int,
+        default=3,
+        help="""The number of times to parse each file (default: %(default)s)"""
+    )
+
+    return parser.parse_args()
+
+
+def write_spec_file(path, argument_count):
+    with open(path, "wt", encoding="utf8") as f:
+        f.write("<cligen xmlns=\"{}\">\n".format(ArgumentSpecParser.XML_NAMESPACE))
+        for i in range(argument_count):
+            f.write(
+                "  <argument>\n"
+                "    <key>-a{0}</key>\n"
+                "    <key>--argument-{0}</key>\n"
+                "    <help>The help text of argument number {0}</help>\n"
+                "  </argument>\n".format(i)
+            )
+        f.write("</cligen>\n")
+
+
+def time_parse(parse, path, iterations):
+    """
+    Returns a (elapsed_time, peak_memory) pair whose values are the average number of milliseconds
+    that the given function takes to parse the given file and the peak number of bytes allocated.
+    """
+    tracemalloc.start()
+    parse(path)
+    (_, peak_memory) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start_time = time.perf_counter()
+    for i in range(iterations):
+        parse(path)
+    end_time = time.perf_counter()
+    return ((end_time - start_time) * 1000 / iterations, peak_memory)
+
+
+def parse_file_func(xml_backend):
+    def parse_file(path):
+        return ArgumentSpecParser(xml_backend=xml_backend).parse_file(path)
+    return parse_file
+
+
+def parse_file_tree(path):
+    """
+    The implementation of ArgumentSpecParser.parse_file() prior to parsing incrementally.
+    """
+    parser = ArgumentSpecParser(xml_backend=ElementTreeXmlBackend())
+    doc = xml.etree.ElementTree.parse(path)
+    return parser._create_argspec(parser._parse_document(doc.getroot()))
+
+
+if __name__ == "__main__":
+    main()
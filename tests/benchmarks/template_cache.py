@@ -0,0 +1,113 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compares the time to generate code with cold and warm template caches.
+"""
+
+import argparse
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+
+import cligen
+from cligen.argspec_xml_parser import ArgumentSpecParser
+from cligen.target_python import PythonTargetLanguage
+from cligen.targets import Jinja2TargetLanguageBase
+
+
+def main():
+    args = parse_arguments()
+    sample_xml_path = pathlib.Path(cligen.__file__).parent / "sample_cligen.xml"
+    argspec = ArgumentSpecParser().parse_file("{}".format(sample_xml_path))
+
+    with tempfile.TemporaryDirectory() as temp_dir_path_string:
+        temp_dir_path = pathlib.Path(temp_dir_path_string)
+        output_file_path = "{}".format(temp_dir_path / "cligen.py")
+
+        print("In-process generation, {} iterations:".format(args.iterations))
+        cold = time_in_process(argspec, output_file_path, args.iterations, warm=False)
+        warm = time_in_process(argspec, output_file_path, args.iterations, warm=True)
+        print("   cold (template compiled every time): {:8.3f} ms/generation".format(cold))
+        print("   warm (shared environment)          : {:8.3f} ms/generation".format(warm))
+
+        print("Separate processes, {} iterations:".format(args.processes))
+        cache_dir = "{}".format(temp_dir_path / "cache")
+        no_cache = time_processes(sample_xml_path, output_file_path, args.processes, None)
+        time_processes(sample_xml_path, output_file_path, 1, cache_dir)
+        with_cache = time_processes(sample_xml_path, output_file_path, args.processes, cache_dir)
+        print("   without --cache-dir                : {:8.3f} ms/process".format(no_cache))
+        print("   with warm --cache-dir              : {:8.3f} ms/process".format(with_cache))
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "-n", "--iterations",
+        type=int,
+        default=200,
+        help="""The number of in-process generations to time (default: %(default)s)"""
+    )
+
+    parser.add_argument(
+        "-p", "--processes",
+        type=int,
+        default=10,
+        help="""The number of cligen processes to time (default: %(default)s)"""
+    )
+
+    return parser.parse_args()
+
+
+def time_in_process(argspec, output_file_path, iterations, warm):
+    target = PythonTargetLanguage()
+    start_time = time.perf_counter()
+    for i in range(iterations):
+        if not warm:
+            Jinja2TargetLanguageBase._environments.clear()
+            Jinja2TargetLanguageBase._bytecode_caches.clear()
+        target.generate(
+            argspec=argspec,
+            output_file_paths=[output_file_path],
+            encoding="utf8",
+            newline="\n",
+        )
+    end_time = time.perf_counter()
+    return (end_time - start_time) * 1000 / iterations
+
+
+def time_processes(spec_xml_path, output_file_path, iterations, cache_dir):
+    args = [sys.executable, "-m", "cligen", "-l", "python", "-o", output_file_path]
+    if cache_dir is None:
+        args.append("--no-cache-dir")
+    else:
+        args.extend(["--cache-dir", cache_dir])
+    args.append("{}".format(spec_xml_path))
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(sys.path)
+    start_time = time.perf_counter()
+    for i in range(iterations):
+        subprocess.check_call(args, env=env)
+    end_time = time.perf_counter()
+    return (end_time - start_time) * 1000 / iterations
+
+
+if __name__ == "__main__":
+    main()
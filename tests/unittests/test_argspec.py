@@ -13,8 +13,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import sys
+import types
 import unittest
 
+import cligen
 from cligen.argspec import ArgumentParserSpec
 
 
@@ -23,19 +27,158 @@ class Test_ArgumentSpecParser(unittest.TestCase):
     DEFAULT_VALUE = object()
 
     def test___init___PositionalArgs(self):
-        arguments = object()
+        arguments = [self.new_Argument()]
         help_argument = object()
         x = ArgumentParserSpec(arguments, help_argument)
-        self.assertIs(arguments, x.arguments)
+        self.assertEqual(tuple(arguments), x.arguments)
         self.assertIs(help_argument, x.help_argument)
 
     def test___init___KeywordArgs(self):
-        arguments = object()
+        arguments = [self.new_Argument()]
         help_argument = object()
         x = ArgumentParserSpec(arguments=arguments, help_argument=help_argument)
-        self.assertIs(arguments, x.arguments)
+        self.assertEqual(tuple(arguments), x.arguments)
         self.assertIs(help_argument, x.help_argument)
 
+    def test___init___arguments_StoredAsTuple(self):
+        arguments = [self.new_Argument()]
+        x = ArgumentParserSpec(arguments=arguments, help_argument=None)
+        arguments.clear()
+        self.assertEqual(1, len(x.arguments))
+        self.assertIsInstance(x.arguments, tuple)
+
+    def test___init___response_files_DefaultsToFalse(self):
+        x = ArgumentParserSpec(arguments=[], help_argument=None)
+        self.assertIs(x.response_files, False)
+
+    def test___init___response_files(self):
+        x = ArgumentParserSpec(arguments=[], help_argument=None, response_files=True)
+        self.assertIs(x.response_files, True)
+
+    def test_find_argument_Found(self):
+        x = self.new_ArgumentParserSpec()
+        self.assertIs(x.arguments[1], x.find_argument("-o"))
+        self.assertIs(x.arguments[1], x.find_argument("--output-file"))
+        self.assertIs(x.help_argument, x.find_argument("--help"))
+
+    def test_find_positional_argument_Found(self):
+        builder = ArgumentParserSpec.Builder()
+        builder.add_argument(keys=["-i"])
+        positional_argument = builder.add_argument(
+            keys=["files"], type=ArgumentParserSpec.Argument.TYPE_POSITIONAL_LIST)
+        builder.add_argument(keys=["paths"], type=ArgumentParserSpec.Argument.TYPE_POSITIONAL_LIST)
+        self.assertIs(builder.build().find_positional_argument(), positional_argument)
+
+    def test_find_positional_argument_NotFound(self):
+        x = self.new_ArgumentParserSpec()
+        self.assertIsNone(x.find_positional_argument())
+
+    def test_find_repeatable_arguments_Found(self):
+        builder = ArgumentParserSpec.Builder()
+        arg1 = builder.add_argument(keys=["-D"], type=ArgumentParserSpec.Argument.TYPE_REPEATABLE_STRING_VALUE)
+        builder.add_argument(keys=["-i"])
+        builder.add_argument(keys=["files"], type=ArgumentParserSpec.Argument.TYPE_POSITIONAL_LIST)
+        arg2 = builder.add_argument(keys=["-I"], type=ArgumentParserSpec.Argument.TYPE_REPEATABLE_STRING_VALUE)
+        actual = builder.build().find_repeatable_arguments()
+        self.assertEqual(len(actual), 2)
+        self.assertIs(actual[0], arg1)
+        self.assertIs(actual[1], arg2)
+
+    def test_find_repeatable_arguments_NotFound(self):
+        x = self.new_ArgumentParserSpec()
+        self.assertEqual(x.find_repeatable_arguments(), ())
+
+    def test_find_argument_NotFound(self):
+        x = self.new_ArgumentParserSpec()
+        self.assertIsNone(x.find_argument("--foo"))
+
+    def test_find_argument_DuplicateKey(self):
+        arg1 = self.new_Argument(keys=["-a", "--all"])
+        arg2 = self.new_Argument(keys=["-b", "--all"])
+        x = ArgumentParserSpec(arguments=[arg1, arg2], help_argument=None)
+        self.assertIs(arg1, x.find_argument("--all"))
+        self.assertIs(arg2, x.find_argument("-b"))
+
+    def test_canonical_form(self):
+        x = self.new_ArgumentParserSpec(arguments=[self.new_Argument(keys=["-n"])], help_argument=None)
+        self.assertEqual(
+            x.canonical_form(),
+            '{"arguments":[{"help_text":null,"keys":["-n"],"type":"string"}],"help_argument":null}')
+
+    def test_canonical_form_IndependentOfFormatting(self):
+        from cligen.argspec_xml_parser import ArgumentSpecParser
+        xml1 = (
+            "<cligen xmlns=\"http://schemas.cligen.io/arguments\">"
+            "<argument><key>-i</key><help>The input file</help></argument>"
+            "</cligen>"
+        )
+        xml2 = (
+            "<?xml version=\"1.0\"?>\n"
+            "<!-- a comment -->\n"
+            "<c:cligen xmlns:c=\"http://schemas.cligen.io/arguments\">\n"
+            "  <c:argument>\n"
+            "    <c:help>\n      The input file\n    </c:help>\n"
+            "    <c:key> -i </c:key>\n"
+            "  </c:argument>\n"
+            "</c:cligen>\n"
+        )
+        x1 = ArgumentSpecParser().parse_string(xml1)
+        x2 = ArgumentSpecParser().parse_string(xml2)
+        self.assertEqual(x1.canonical_form(), x2.canonical_form())
+        self.assertEqual(x1.fingerprint(), x2.fingerprint())
+
+    def test_canonical_form_help_argument(self):
+        x1 = self.new_ArgumentParserSpec()
+        x2 = self.new_ArgumentParserSpec(arguments=x1.arguments, help_argument=None)
+        self.assertNotEqual(x1.canonical_form(), x2.canonical_form())
+
+    def test_canonical_form_response_files(self):
+        x = self.new_ArgumentParserSpec(arguments=[], help_argument=None, response_files=True)
+        self.assertEqual(x.canonical_form(), '{"arguments":[],"help_argument":null,"response_files":true}')
+
+    def test_canonical_form_ArgumentOrder(self):
+        x1 = self.new_ArgumentParserSpec()
+        x2 = self.new_ArgumentParserSpec(arguments=reversed(x1.arguments), help_argument=x1.help_argument)
+        self.assertNotEqual(x1.canonical_form(), x2.canonical_form())
+
+    def test_fingerprint_Equal(self):
+        x1 = self.new_ArgumentParserSpec()
+        x2 = self.new_ArgumentParserSpec()
+        self.assertEqual(x1.fingerprint(), x2.fingerprint())
+        self.assertRegex(x1.fingerprint(), "^[0-9a-f]{64}$")
+
+    def test_fingerprint_Unequal(self):
+        x1 = self.new_ArgumentParserSpec()
+        x2 = self.new_ArgumentParserSpec(arguments=[self.new_Argument()], help_argument=None)
+        self.assertNotEqual(x1.fingerprint(), x2.fingerprint())
+
+    def test_fingerprint_NonAsciiHelpText(self):
+        x = ArgumentParserSpec.Builder()
+        x.add_argument(keys=["-n"], help_text="\u00e9\ud800")
+        self.assertRegex(x.build().fingerprint(), "^[0-9a-f]{64}$")
+
+    def test___setattr___Raises(self):
+        x = self.new_ArgumentParserSpec()
+        with self.assertRaises(AttributeError):
+            x.arguments = ()
+        with self.assertRaises(AttributeError):
+            x.foo = 1
+
+    def test___delattr___Raises(self):
+        x = self.new_ArgumentParserSpec()
+        with self.assertRaises(AttributeError):
+            del x.help_argument
+
+    def test___dict___Absent(self):
+        x = self.new_ArgumentParserSpec()
+        self.assertFalse(hasattr(x, "__dict__"))
+
+    def test___hash___Equal(self):
+        x1 = self.new_ArgumentParserSpec()
+        x2 = self.new_ArgumentParserSpec()
+        self.assertEqual(hash(x1), hash(x2))
+        self.assertEqual(1, len({x1, x2}))
+
     def test___eq___Equal(self):
         x1 = self.new_ArgumentParserSpec()
         x2 = self.new_ArgumentParserSpec()
@@ -43,8 +186,7 @@ class Test_ArgumentSpecParser(unittest.TestCase):
 
     def test___eq___arguments_Missing(self):
         x1 = self.new_ArgumentParserSpec()
-        x2 = self.new_ArgumentParserSpec()
-        del x2.arguments
+        x2 = without_attribute(self.new_ArgumentParserSpec(), "arguments")
         self.assertFalse(x1 == x2)
 
     def test___eq___arguments_Unequal(self):
@@ -54,14 +196,24 @@ class Test_ArgumentSpecParser(unittest.TestCase):
 
     def test___eq___help_argument_Missing(self):
         x1 = self.new_ArgumentParserSpec()
-        x2 = self.new_ArgumentParserSpec()
-        del x2.help_argument
+        x2 = without_attribute(self.new_ArgumentParserSpec(), "help_argument")
         self.assertFalse(x1 == x2)
 
     def test___eq___help_argument_Unequal(self):
         x1 = self.new_ArgumentParserSpec()
-        x2 = self.new_ArgumentParserSpec(help_argument=object())
+        x2 = self.new_ArgumentParserSpec(help_argument=self.new_Argument(keys=["-?"]))
+        self.assertFalse(x1 == x2)
+
+    def test___eq___response_files_Missing(self):
+        x1 = self.new_ArgumentParserSpec()
+        x2 = without_attribute(self.new_ArgumentParserSpec(), "response_files")
+        self.assertFalse(x1 == x2)
+
+    def test___eq___response_files_Unequal(self):
+        x1 = self.new_ArgumentParserSpec()
+        x2 = self.new_ArgumentParserSpec(response_files=True)
         self.assertFalse(x1 == x2)
+        self.assertNotEqual(hash(x1), hash(x2))
 
     def test___ne___Equal(self):
         x1 = self.new_ArgumentParserSpec()
@@ -70,8 +222,7 @@ class Test_ArgumentSpecParser(unittest.TestCase):
 
     def test___ne___arguments_Missing(self):
         x1 = self.new_ArgumentParserSpec()
-        x2 = self.new_ArgumentParserSpec()
-        del x2.arguments
+        x2 = without_attribute(self.new_ArgumentParserSpec(), "arguments")
         self.assertTrue(x1 != x2)
 
     def test___ne___arguments_Unequal(self):
@@ -81,16 +232,15 @@ class Test_ArgumentSpecParser(unittest.TestCase):
 
     def test___ne___help_argument_Missing(self):
         x1 = self.new_ArgumentParserSpec()
-        x2 = self.new_ArgumentParserSpec()
-        del x2.help_argument
+        x2 = without_attribute(self.new_ArgumentParserSpec(), "help_argument")
         self.assertTrue(x1 != x2)
 
     def test___ne___help_argument_Unequal(self):
         x1 = self.new_ArgumentParserSpec()
-        x2 = self.new_ArgumentParserSpec(help_argument=object())
+        x2 = self.new_ArgumentParserSpec(help_argument=self.new_Argument(keys=["-?"]))
         self.assertTrue(x1 != x2)
 
-    def new_ArgumentParserSpec(self, arguments=DEFAULT_VALUE, help_argument=DEFAULT_VALUE):
+    def new_ArgumentParserSpec(self, arguments=DEFAULT_VALUE, help_argument=DEFAULT_VALUE, response_files=False):
         if arguments is self.DEFAULT_VALUE:
             input_file_argument = ArgumentParserSpec.Argument(
                 keys=["-i", "--input-file"],
@@ -117,29 +267,125 @@ class Test_ArgumentSpecParser(unittest.TestCase):
         return ArgumentParserSpec(
             arguments=arguments,
             help_argument=help_argument,
+            response_files=response_files,
         )
 
+    @staticmethod
+    def new_Argument(keys=("-n", "--name")):
+        return ArgumentParserSpec.Argument(
+            keys=keys,
+            type=ArgumentParserSpec.Argument.TYPE_STRING_VALUE,
+            help_text=None,
+        )
+
+
+class Test_ArgumentParserSpec_Builder(unittest.TestCase):
+
+    def test_build_NoArguments(self):
+        x = ArgumentParserSpec.Builder()
+        self.assertEqual(x.build(), ArgumentParserSpec(arguments=(), help_argument=None))
+
+    def test_add_argument(self):
+        x = ArgumentParserSpec.Builder()
+        argument = x.add_argument(keys=["-i", "--input-file"], help_text="The input file")
+        self.assertEqual(argument, ArgumentParserSpec.Argument(
+            keys=("-i", "--input-file"),
+            type=ArgumentParserSpec.Argument.TYPE_STRING_VALUE,
+            help_text="The input file",
+        ))
+        self.assertEqual(x.build().arguments, (argument,))
+
+    def test_add_argument_type(self):
+        x = ArgumentParserSpec.Builder()
+        argument = x.add_argument(keys=["-x"], type=ArgumentParserSpec.Argument.TYPE_BUILTIN_HELP)
+        self.assertEqual(argument.type, ArgumentParserSpec.Argument.TYPE_BUILTIN_HELP)
+        self.assertIsNone(argument.help_text)
+
+    def test_add_help_argument_Defaults(self):
+        x = ArgumentParserSpec.Builder()
+        x.add_argument(keys=["-i"])
+        help_argument = x.add_help_argument()
+        argspec = x.build()
+        self.assertEqual(help_argument.keys, ("-h", "--help"))
+        self.assertEqual(help_argument.type, ArgumentParserSpec.Argument.TYPE_BUILTIN_HELP)
+        self.assertEqual(help_argument.help_text, "Print the help information then exit")
+        self.assertIs(argspec.help_argument, help_argument)
+        self.assertIs(argspec.arguments[1], help_argument)
+
+    def test_add_help_argument_Custom(self):
+        x = ArgumentParserSpec.Builder()
+        help_argument = x.add_help_argument(keys=["-?"], help_text="Help!")
+        self.assertEqual(help_argument.keys, ("-?",))
+        self.assertEqual(help_argument.help_text, "Help!")
+
+    def test_build_response_files(self):
+        x = ArgumentParserSpec.Builder()
+        self.assertIs(x.build().response_files, False)
+        x.response_files = True
+        self.assertIs(x.build().response_files, True)
+
+    def test_build_SameAsParsed(self):
+        from cligen.argspec_xml_parser import ArgumentSpecParser
+        x = ArgumentParserSpec.Builder()
+        x.add_argument(keys=["-i", "--input-file"], help_text="The file from which to read")
+        x.add_argument(keys=["-o", "--output-file"], help_text="The file to which to write")
+        x.add_help_argument()
+        sample_xml_path = os.path.join(os.path.dirname(cligen.__file__), "sample_cligen.xml")
+        self.assertEqual(x.build(), ArgumentSpecParser().parse_file(sample_xml_path))
+
 
 class Test_ArgumentParserSpec_Argument(unittest.TestCase):
 
     def test___init___PositionalArgs(self):
-        keys = object()
+        keys = ["-n", "--name"]
         type = object()
         help_text = object()
         x = ArgumentParserSpec.Argument(keys, type, help_text)
-        self.assertIs(keys, x.keys)
+        self.assertEqual(("-n", "--name"), x.keys)
         self.assertIs(type, x.type)
         self.assertIs(help_text, x.help_text)
 
     def test___init___KeywordArgs(self):
-        keys = object()
+        keys = ["-n", "--name"]
         type = object()
         help_text = object()
         x = ArgumentParserSpec.Argument(keys=keys, type=type, help_text=help_text)
-        self.assertIs(keys, x.keys)
+        self.assertEqual(("-n", "--name"), x.keys)
         self.assertIs(type, x.type)
         self.assertIs(help_text, x.help_text)
 
+    def test___init___keys_Interned(self):
+        key = "".join(["--", "name"])
+        x = ArgumentParserSpec.Argument(keys=[key], type=None, help_text=None)
+        self.assertIs(sys.intern(key), x.keys[0])
+
+    def test___setattr___Raises(self):
+        x = self.new_Argument()
+        with self.assertRaises(AttributeError):
+            x.keys = ()
+        with self.assertRaises(AttributeError):
+            x.foo = 1
+
+    def test___delattr___Raises(self):
+        x = self.new_Argument()
+        with self.assertRaises(AttributeError):
+            del x.help_text
+
+    def test___dict___Absent(self):
+        x = self.new_Argument()
+        self.assertFalse(hasattr(x, "__dict__"))
+
+    def test___hash___Equal(self):
+        x1 = self.new_Argument()
+        x2 = self.new_Argument()
+        self.assertEqual(hash(x1), hash(x2))
+        self.assertEqual(1, len({x1, x2}))
+
+    def test___hash___Cached(self):
+        x = self.new_Argument()
+        self.assertEqual(hash(x), hash(x))
+        self.assertEqual(hash(x), x._hash)
+
     def test___eq___Equal(self):
         x1 = self.new_Argument()
         x2 = self.new_Argument()
@@ -147,8 +393,7 @@ class Test_ArgumentParserSpec_Argument(unittest.TestCase):
 
     def test___eq___keys_Missing(self):
         x1 = self.new_Argument()
-        x2 = self.new_Argument()
-        del x2.keys
+        x2 = without_attribute(self.new_Argument(), "keys")
         self.assertFalse(x1 == x2)
 
     def test___eq___keys_Unequal(self):
@@ -158,8 +403,7 @@ class Test_ArgumentParserSpec_Argument(unittest.TestCase):
 
     def test___eq___type_Missing(self):
         x1 = self.new_Argument()
-        x2 = self.new_Argument()
-        del x2.type
+        x2 = without_attribute(self.new_Argument(), "type")
         self.assertFalse(x1 == x2)
 
     def test___eq___type_Unequal(self):
@@ -169,8 +413,7 @@ class Test_ArgumentParserSpec_Argument(unittest.TestCase):
 
     def test___eq___help_text_Missing(self):
         x1 = self.new_Argument()
-        x2 = self.new_Argument()
-        del x2.help_text
+        x2 = without_attribute(self.new_Argument(), "help_text")
         self.assertFalse(x1 == x2)
 
     def test___eq___help_text_Unequal(self):
@@ -185,8 +428,7 @@ class Test_ArgumentParserSpec_Argument(unittest.TestCase):
 
     def test___ne___keys_Missing(self):
         x1 = self.new_Argument()
-        x2 = self.new_Argument()
-        del x2.keys
+        x2 = without_attribute(self.new_Argument(), "keys")
         self.assertTrue(x1 != x2)
 
     def test___ne___keys_Unequal(self):
@@ -196,8 +438,7 @@ class Test_ArgumentParserSpec_Argument(unittest.TestCase):
 
     def test___ne___type_Missing(self):
         x1 = self.new_Argument()
-        x2 = self.new_Argument()
-        del x2.type
+        x2 = without_attribute(self.new_Argument(), "type")
         self.assertTrue(x1 != x2)
 
     def test___ne___type_Unequal(self):
@@ -207,8 +448,7 @@ class Test_ArgumentParserSpec_Argument(unittest.TestCase):
 
     def test___ne___help_text_Missing(self):
         x1 = self.new_Argument()
-        x2 = self.new_Argument()
-        del x2.help_text
+        x2 = without_attribute(self.new_Argument(), "help_text")
         self.assertTrue(x1 != x2)
 
     def test___ne___help_text_Unequal(self):
@@ -228,6 +468,24 @@ class Test_ArgumentParserSpec_Argument(unittest.TestCase):
         x = self.new_Argument(keys=["-n", "--name"])
         self.assertEqual("-n/--name", "{}".format(x))
 
+    def test_is_list(self):
+        for (type, expected) in (
+                (ArgumentParserSpec.Argument.TYPE_STRING_VALUE, False),
+                (ArgumentParserSpec.Argument.TYPE_BUILTIN_HELP, False),
+                (ArgumentParserSpec.Argument.TYPE_REPEATABLE_STRING_VALUE, True),
+                (ArgumentParserSpec.Argument.TYPE_POSITIONAL_LIST, True)):
+            with self.subTest(type=type):
+                self.assertIs(self.new_Argument(type=type).is_list(), expected)
+
+    def test_is_positional(self):
+        for (type, expected) in (
+                (ArgumentParserSpec.Argument.TYPE_STRING_VALUE, False),
+                (ArgumentParserSpec.Argument.TYPE_BUILTIN_HELP, False),
+                (ArgumentParserSpec.Argument.TYPE_REPEATABLE_STRING_VALUE, False),
+                (ArgumentParserSpec.Argument.TYPE_POSITIONAL_LIST, True)):
+            with self.subTest(type=type):
+                self.assertIs(self.new_Argument(type=type).is_positional(), expected)
+
     def test___repr___(self):
         keys = ["keys"]
         type = "the type"
@@ -235,7 +493,7 @@ class Test_ArgumentParserSpec_Argument(unittest.TestCase):
         x = self.new_Argument(keys=keys, type=type, help_text=help_text)
 
         expected = "Argument(keys={keys!r}, type={type!r}, help_text={help_text!r})".format(
-            keys=keys,
+            keys=tuple(keys),
             type=type,
             help_text=help_text,
         )
@@ -252,3 +510,16 @@ class Test_ArgumentParserSpec_Argument(unittest.TestCase):
             type=type,
             help_text=help_text,
         )
+
+
+def without_attribute(x, name):
+    """
+    Returns an object with the same attributes as the given ArgumentParserSpec or
+    ArgumentParserSpec.Argument, except for the attribute with the given name.
+    """
+    attributes = {
+        x_name: getattr(x, x_name)
+        for x_name in type(x).__slots__
+        if not x_name.startswith("_") and x_name != name
+    }
+    return types.SimpleNamespace(**attributes)
@@ -0,0 +1,130 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from cligen.argspec import ArgumentParserSpec
+from cligen.argspec_diff import ArgumentSpecDiff
+
+
+class TestArgumentSpecDiff(unittest.TestCase):
+
+    def test_Equal(self):
+        x = ArgumentSpecDiff(self.new_ArgumentParserSpec(), self.new_ArgumentParserSpec())
+        self.assertFalse(x)
+        self.assertEqual((x.added, x.removed, x.changed, x.reordered), ([], [], [], False))
+        self.assertEqual(x.changed_options, [])
+        self.assertEqual(x.lines(), [])
+
+    def test_Added(self):
+        old_argspec = self.new_ArgumentParserSpec()
+        new_argspec = self.new_ArgumentParserSpec(("-v", "--verbose"))
+        x = ArgumentSpecDiff(old_argspec, new_argspec)
+        self.assertTrue(x)
+        self.assertEqual(x.added, [new_argspec.arguments[2]])
+        self.assertEqual((x.removed, x.changed, x.reordered), ([], [], False))
+        self.assertEqual("{}".format(x), "added argument -v/--verbose")
+
+    def test_Removed(self):
+        old_argspec = self.new_ArgumentParserSpec()
+        new_argspec = ArgumentParserSpec(old_argspec.arguments[1:], old_argspec.help_argument)
+        x = ArgumentSpecDiff(old_argspec, new_argspec)
+        self.assertTrue(x)
+        self.assertEqual(x.removed, [old_argspec.arguments[0]])
+        self.assertEqual((x.added, x.changed, x.reordered), ([], [], False))
+        self.assertEqual("{}".format(x), "removed argument -i/--input-file")
+
+    def test_Changed_help_text(self):
+        old_argspec = self.new_ArgumentParserSpec()
+        new_argspec = self.new_ArgumentParserSpec(input_file_help_text="The file to read")
+        x = ArgumentSpecDiff(old_argspec, new_argspec)
+        self.assertTrue(x)
+        (change,) = x.changed
+        self.assertIs(change.old_argument, old_argspec.arguments[0])
+        self.assertIs(change.new_argument, new_argspec.arguments[0])
+        self.assertEqual(change.attribute_names, ("help_text",))
+        self.assertEqual("{}".format(x), "changed argument -i/--input-file (help text)")
+
+    def test_Changed_keys(self):
+        old_argspec = self.new_ArgumentParserSpec()
+        new_argspec = self.new_ArgumentParserSpec(input_file_keys=("-i", "--in"))
+        x = ArgumentSpecDiff(old_argspec, new_argspec)
+        self.assertEqual((x.added, x.removed), ([], []))
+        self.assertEqual("{}".format(x), "changed argument -i/--input-file to -i/--in (keys)")
+
+    def test_Changed_help_argument(self):
+        old_argspec = self.new_ArgumentParserSpec()
+        new_argspec = ArgumentParserSpec(old_argspec.arguments, help_argument=None)
+        x = ArgumentSpecDiff(old_argspec, new_argspec)
+        self.assertEqual("{}".format(x), "changed argument -h/--help (help argument)")
+
+    def test_Reordered(self):
+        old_argspec = self.new_ArgumentParserSpec()
+        new_argspec = ArgumentParserSpec(reversed(old_argspec.arguments), old_argspec.help_argument)
+        x = ArgumentSpecDiff(old_argspec, new_argspec)
+        self.assertTrue(x)
+        self.assertEqual((x.added, x.removed, x.changed), ([], [], []))
+        self.assertEqual("{}".format(x), "reordered arguments")
+
+    def test_ChangedOption_response_files(self):
+        old_argspec = self.new_ArgumentParserSpec()
+        new_argspec = ArgumentParserSpec(old_argspec.arguments, old_argspec.help_argument, response_files=True)
+        x = ArgumentSpecDiff(old_argspec, new_argspec)
+        self.assertTrue(x)
+        self.assertEqual((x.added, x.removed, x.changed, x.reordered), ([], [], [], False))
+        self.assertEqual(x.changed_options, ["response_files"])
+        self.assertEqual("{}".format(x), "changed option response files from False to True")
+
+    def test_NoCommonKeys_AddedAndRemoved(self):
+        old_argspec = self.new_ArgumentParserSpec()
+        new_argspec = self.new_ArgumentParserSpec(input_file_keys=("--source",))
+        x = ArgumentSpecDiff(old_argspec, new_argspec)
+        self.assertEqual(x.lines(), ["removed argument -i/--input-file", "added argument --source"])
+
+    def test_DuplicateKeys_MatchedInOrder(self):
+        old_argspec = ArgumentParserSpec([self.new_Argument("-a"), self.new_Argument("-a")], None)
+        new_argspec = ArgumentParserSpec([self.new_Argument("-a"), self.new_Argument("-a", "-b")], None)
+        x = ArgumentSpecDiff(old_argspec, new_argspec)
+        self.assertEqual(x.lines(), ["changed argument -a to -a/-b (keys)"])
+        self.assertIs(x.changed[0].old_argument, old_argspec.arguments[1])
+
+    def test_Parsed_Formatting(self):
+        from cligen.argspec_xml_parser import ArgumentSpecParser
+        parser = ArgumentSpecParser()
+        old_argspec = parser.parse_string(
+            "<cligen xmlns=\"http://schemas.cligen.io/arguments\">"
+            "<argument><key>-i</key></argument><argument><key>-o</key></argument></cligen>")
+        new_argspec = parser.parse_string(
+            "<cligen xmlns=\"http://schemas.cligen.io/arguments\">\n"
+            "  <!-- the input file -->\n  <argument>\n    <key>-i</key>\n  </argument>\n"
+            "  <argument><key>-o</key><help>The output file</help></argument>\n</cligen>\n")
+        x = ArgumentSpecDiff(old_argspec, new_argspec)
+        self.assertEqual(x.lines(), ["changed argument -o (help text)"])
+
+    @staticmethod
+    def new_ArgumentParserSpec(
+            *extra_argument_keys, input_file_keys=("-i", "--input-file"), input_file_help_text="The input file"):
+        builder = ArgumentParserSpec.Builder()
+        builder.add_argument(keys=input_file_keys, help_text=input_file_help_text)
+        builder.add_argument(keys=("-o", "--output-file"), help_text="The output file")
+        for keys in extra_argument_keys:
+            builder.add_argument(keys=keys)
+        builder.add_help_argument()
+        return builder.build()
+
+    @staticmethod
+    def new_Argument(*keys):
+        return ArgumentParserSpec.Argument(
+            keys=keys, type=ArgumentParserSpec.Argument.TYPE_STRING_VALUE, help_text=None)
@@ -0,0 +1,160 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from cligen.argspec import ArgumentParserSpec
+from cligen.argspec_validator import ArgumentSpecValidator
+from cligen.target_python import PythonTargetLanguage
+
+
+class TestArgumentSpecValidator(unittest.TestCase):
+
+    def test_find_problems_NoArguments(self):
+        x = self.new_ArgumentSpecValidator()
+        self.assertEqual(x.find_problems(self.new_ArgumentParserSpec()), [])
+
+    def test_find_problems_Valid(self):
+        x = self.new_ArgumentSpecValidator()
+        argspec = self.new_ArgumentParserSpec(["-i", "--input-file"], ["-o", "--output-file"])
+        self.assertEqual(x.find_problems(argspec), [])
+
+    def test_find_problems_NoKeys(self):
+        x = self.new_ArgumentSpecValidator()
+        argspec = self.new_ArgumentParserSpec(["-a"], [])
+        self.assertEqual(x.find_problems(argspec), ["argument #2 has no keys"])
+
+    def test_find_problems_KeyNotAnOption(self):
+        x = self.new_ArgumentSpecValidator()
+        for key in ("a", "", "-", "--", "a-"):
+            with self.subTest(key=key):
+                argspec = self.new_ArgumentParserSpec(["-a", key])
+                self.assertEqual(x.find_problems(argspec)[0], (
+                    "key of argument -a/{0} is not an option: \"{0}\" (must start with \"-\" followed "
+                    "by a character other than \"-\")").format(key))
+
+    def test_find_problems_Positional_Valid(self):
+        x = self.new_ArgumentSpecValidator()
+        builder = ArgumentParserSpec.Builder()
+        builder.add_argument(keys=["-i"])
+        builder.add_argument(keys=["files"], type=ArgumentParserSpec.Argument.TYPE_POSITIONAL_LIST)
+        self.assertEqual(x.find_problems(builder.build()), [])
+
+    def test_find_problems_Positional_KeyIsAnOption(self):
+        x = self.new_ArgumentSpecValidator()
+        builder = ArgumentParserSpec.Builder()
+        builder.add_argument(keys=["files", "-f"], type=ArgumentParserSpec.Argument.TYPE_POSITIONAL_LIST)
+        self.assertEqual(x.find_problems(builder.build()), [
+            "key of positional argument files/-f is an option: \"-f\" (must not start with \"-\")"])
+
+    def test_find_problems_Positional_MoreThanOne(self):
+        x = self.new_ArgumentSpecValidator()
+        builder = ArgumentParserSpec.Builder()
+        builder.add_argument(keys=["files"], type=ArgumentParserSpec.Argument.TYPE_POSITIONAL_LIST)
+        builder.add_argument(keys=["paths"], type=ArgumentParserSpec.Argument.TYPE_POSITIONAL_LIST)
+        self.assertEqual(x.find_problems(builder.build()), [
+            "argument paths is a positional argument, as is argument files (at most one argument may be)"])
+
+    def test_find_problems_DuplicateKey(self):
+        x = self.new_ArgumentSpecValidator()
+        argspec = self.new_ArgumentParserSpec(["-a", "--all"], ["--all", "--both"])
+        self.assertEqual(x.find_problems(argspec), [
+            "key --all of argument --all/--both is also a key of argument -a/--all"])
+
+    def test_find_problems_DuplicateKeyInSameArgumentIgnored(self):
+        x = self.new_ArgumentSpecValidator()
+        argspec = self.new_ArgumentParserSpec(["-a", "-a"])
+        self.assertEqual(x.find_problems(argspec), [])
+
+    def test_find_problems_VariableNameCollision(self):
+        x = self.new_ArgumentSpecValidator()
+        argspec = self.new_ArgumentParserSpec(["--out-file"], ["--outfile"])
+        self.assertEqual(x.find_problems(argspec), [
+            "variable name of argument --outfile is the same as that of argument --out-file: outfile"])
+
+    def test_find_problems_NoVariableName(self):
+        x = self.new_ArgumentSpecValidator()
+        argspec = self.new_ArgumentParserSpec(["-!"])
+        self.assertEqual(x.find_problems(argspec), [
+            "argument -! has no variable name (its keys must contain at least one letter or digit)"])
+
+    def test_find_problems_ReservedVariableName(self):
+        x = self.new_ArgumentSpecValidator()
+        argspec = self.new_ArgumentParserSpec(["-p", "--print"], ["--verbose"])
+        self.assertEqual(x.find_problems(argspec), [
+            "variable name of argument -p/--print is reserved for use by the generated code: print"])
+
+    def test_find_problems_ReservedVariableName_variable_name_func_None(self):
+        x = ArgumentSpecValidator(reserved_variable_names=["print"])
+        argspec = self.new_ArgumentParserSpec(["--print"])
+        self.assertEqual(x.find_problems(argspec), [])
+
+    def test_find_problems_variable_name_func_None(self):
+        x = ArgumentSpecValidator()
+        argspec = self.new_ArgumentParserSpec(["--out-file"], ["--outfile"])
+        self.assertEqual(x.find_problems(argspec), [])
+
+    def test_find_problems_AllProblemsReported(self):
+        x = self.new_ArgumentSpecValidator()
+        argspec = self.new_ArgumentParserSpec(["-a", "b"], [], ["-c", "-a"], ["--c"])
+        self.assertEqual(x.find_problems(argspec), [
+            "key of argument -a/b is not an option: \"b\" (must start with \"-\" followed by a character other "
+            "than \"-\")",
+            "argument #2 has no keys",
+            "key -a of argument -c/-a is also a key of argument -a/b",
+            "variable name of argument --c is the same as that of argument -c/-a: c",
+        ])
+
+    def test_find_problems_LargeSpec(self):
+        x = self.new_ArgumentSpecValidator()
+        keys = [["-a{}".format(i), "--argument-{}".format(i)] for i in range(50000)]
+        keys.append(["--argument-0"])
+        argspec = self.new_ArgumentParserSpec(*keys)
+        problems = x.find_problems(argspec)
+        self.assertEqual(len(problems), 2)
+
+    def test_validate_Valid(self):
+        x = self.new_ArgumentSpecValidator()
+        x.validate(self.new_ArgumentParserSpec(["-a"], ["-b"]))
+
+    def test_validate_Invalid(self):
+        x = self.new_ArgumentSpecValidator()
+        with self.assertRaises(x.Error) as cm:
+            x.validate(self.new_ArgumentParserSpec([], ["-b", "c"]))
+        self.assertEqual(cm.exception.problems, [
+            "argument #1 has no keys",
+            "key of argument -b/c is not an option: \"c\" (must start with \"-\" followed by a character other "
+            "than \"-\")",
+        ])
+        self.assertEqual("{}".format(cm.exception), "; ".join(cm.exception.problems))
+
+    @staticmethod
+    def new_ArgumentSpecValidator():
+        target_language = PythonTargetLanguage()
+        return ArgumentSpecValidator(
+            variable_name_func=target_language.argument_variable_name,
+            reserved_variable_names=target_language.RESERVED_VARIABLE_NAMES)
+
+    @staticmethod
+    def new_ArgumentParserSpec(*keys_list):
+        arguments = [
+            ArgumentParserSpec.Argument(
+                keys=keys,
+                type=ArgumentParserSpec.Argument.TYPE_STRING_VALUE,
+                help_text=None,
+            )
+            for keys in keys_list
+        ]
+        return ArgumentParserSpec(arguments=arguments, help_argument=None)
@@ -13,16 +13,29 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import io
 import os
+import shutil
 import tempfile
+import time
+import tracemalloc
 import unittest
+import unittest.mock
 
 from cligen.argspec import ArgumentParserSpec
 from cligen.argspec_xml_parser import ArgumentSpecParser
+from cligen.argspec_xml_parser import IncludedFileCache
+from cligen.xml_backend import ElementTreeXmlBackend
+from cligen.xml_backend import LxmlXmlBackend
+from cligen.xml_limits import XmlLimits
 
 
 class Test_ArgumentSpecParser_parse_file(unittest.TestCase):
 
+    def test_DefaultXmlBackendIsElementTree(self):
+        x = ArgumentSpecParser()
+        self.assertIs(type(x.xml_backend), ElementTreeXmlBackend)
+
     def test_PathDoesNotExist(self):
         (handle, temp_file_path) = tempfile.mkstemp()
         os.close(handle)
@@ -93,7 +106,7 @@ class Test_ArgumentSpecParser_parse_string(unittest.TestCase):
     def assert_xml_parse_error(self, xml_string, expected_message):
         x = ArgumentSpecParser()
         with self.assertRaises(x.XmlParseError) as cm:
-            x.parse_string(xml_string)
+            self.parse(x, xml_string)
         self.assertEqual(expected_message, "{}".format(cm.exception))
 
     def test_InvalidXmlRootElement_WrongName_NoNamespace(self):
@@ -135,7 +148,7 @@ class Test_ArgumentSpecParser_parse_string(unittest.TestCase):
     def assert_cligen_xml_error(self, xml_string, expected_message):
         x = ArgumentSpecParser()
         with self.assertRaises(x.CligenXmlError) as cm:
-            x.parse_string(xml_string)
+            self.parse(x, xml_string)
         self.assertEqual(expected_message, "{}".format(cm.exception))
 
     def test_NoArguments(self):
@@ -231,6 +244,83 @@ class Test_ArgumentSpecParser_parse_string(unittest.TestCase):
             "add-builtin-help-argument: cheese (expected \"true\" or \"false\")"
         )
 
+    def test_argument_type(self):
+        for type in ("string", "repeatable-string", "positional-list", " Repeatable-String "):
+            with self.subTest(type=type):
+                self.assert_xml_parse_success(
+                    """<?xml version="1.0" ?>
+                        <cligen xmlns="http://schemas.cligen.io/arguments">
+                            <argument>
+                                <key>names</key>
+                                <type>{}</type>
+                            </argument>
+                        </cligen>
+                    """.format(type),
+                    arguments=[
+                        ArgumentParserSpec.Argument(
+                            keys=("names",),
+                            type=type.strip().lower(),
+                            help_text=None,
+                        )
+                    ],
+                )
+
+    def test_argument_type_InvalidValue(self):
+        self.assert_cligen_xml_error(
+            """<?xml version="1.0" ?>
+                <cligen xmlns="http://schemas.cligen.io/arguments">
+                    <argument>
+                        <key>-n</key>
+                        <type>help</type>
+                    </argument>
+                </cligen>
+            """,
+            expected_message="invalid text in element {http://schemas.cligen.io/arguments}"
+            "type: help (expected \"string\" or \"repeatable-string\" or \"positional-list\")"
+        )
+
+    def test_options_response_files_Default(self):
+        x = ArgumentSpecParser()
+        actual = self.parse(x, """<cligen xmlns="http://schemas.cligen.io/arguments" />""")
+        self.assertIs(actual.response_files, False)
+
+    def test_options_response_files_True(self):
+        self.assert_xml_parse_success(
+            """<?xml version="1.0" ?>
+                <cligen xmlns="http://schemas.cligen.io/arguments">
+                    <options>
+                        <response-files> TRUE </response-files>
+                    </options>
+                </cligen>
+            """,
+            response_files=True,
+        )
+
+    def test_options_response_files_False(self):
+        self.assert_xml_parse_success(
+            """<?xml version="1.0" ?>
+                <cligen xmlns="http://schemas.cligen.io/arguments">
+                    <options>
+                        <response-files>false</response-files>
+                    </options>
+                </cligen>
+            """,
+            response_files=False,
+        )
+
+    def test_options_response_files_InvalidValue(self):
+        self.assert_cligen_xml_error(
+            """<?xml version="1.0" ?>
+                <cligen xmlns="http://schemas.cligen.io/arguments">
+                    <options>
+                        <response-files>yes</response-files>
+                    </options>
+                </cligen>
+            """,
+            expected_message="invalid text in element {http://schemas.cligen.io/arguments}"
+            "response-files: yes (expected \"true\" or \"false\")"
+        )
+
     def test_1Argument(self):
         self.assert_xml_parse_success(
             """<?xml version="1.0" ?>
@@ -396,9 +486,10 @@ class Test_ArgumentSpecParser_parse_string(unittest.TestCase):
         )
 
     def assert_xml_parse_success(
-            self, xml_string, arguments=None, help_argument=None, add_builtin_help_argument=None):
+            self, xml_string, arguments=None, help_argument=None, add_builtin_help_argument=None,
+            response_files=False):
         x = ArgumentSpecParser()
-        actual = x.parse_string(xml_string)
+        actual = self.parse(x, xml_string)
 
         if arguments is None:
             arguments = []
@@ -415,6 +506,508 @@ class Test_ArgumentSpecParser_parse_string(unittest.TestCase):
         expected = ArgumentParserSpec(
             arguments=arguments,
             help_argument=help_argument,
+            response_files=response_files,
         )
 
         self.assertEqual(actual, expected)
+
+    def test_DocumentTypeDeclaration(self):
+        self.assert_xml_parse_success(
+            """<!DOCTYPE cligen [<!ENTITY input "--input-file">]>
+            <cligen xmlns="http://schemas.cligen.io/arguments">
+                <argument>
+                    <key>&input;</key>
+                </argument>
+            </cligen>""",
+            arguments=[
+                ArgumentParserSpec.Argument(
+                    keys=("--input-file",),
+                    type=ArgumentParserSpec.Argument.TYPE_STRING_VALUE,
+                    help_text=None,
+                ),
+            ],
+        )
+
+    def test_EncodingDeclaration(self):
+        self.assert_xml_parse_success(
+            """<?xml version="1.0" encoding="iso-8859-1"?>
+            <cligen xmlns="http://schemas.cligen.io/arguments">
+                <argument><key>-a</key></argument>
+            </cligen>""",
+            arguments=[
+                ArgumentParserSpec.Argument(
+                    keys=("-a",),
+                    type=ArgumentParserSpec.Argument.TYPE_STRING_VALUE,
+                    help_text=None,
+                ),
+            ],
+        )
+
+    def test_Comments(self):
+        self.assert_xml_parse_success(
+            """<cligen xmlns="http://schemas.cligen.io/arguments">
+                <!-- a comment -->
+                <argument><key>-<!-- a comment -->a</key></argument>
+            </cligen>""",
+            arguments=[
+                ArgumentParserSpec.Argument(
+                    keys=("-a",),
+                    type=ArgumentParserSpec.Argument.TYPE_STRING_VALUE,
+                    help_text=None,
+                ),
+            ],
+        )
+
+    def parse(self, x, xml_string):
+        x.xml_backend = self.new_xml_backend()
+        return x.parse_string(xml_string)
+
+    def new_xml_backend(self):
+        return ElementTreeXmlBackend()
+
+
+class Test_ArgumentSpecParser_parse_string_Lxml(Test_ArgumentSpecParser_parse_string):
+    """
+    Runs the tests of parse_string() with the lxml backend, to verify that it produces results and
+    errors identical to those of the ElementTree backend.
+    """
+
+    def new_xml_backend(self):
+        return new_LxmlXmlBackend(self)
+
+
+class Test_ArgumentSpecParser_parse_file_Streaming(Test_ArgumentSpecParser_parse_string):
+    """
+    Runs the tests of parse_string() against parse_file(), which parses the document incrementally,
+    to verify that both produce identical results and errors.
+    """
+
+    def parse(self, x, xml_string):
+        temp_dir_path = tempfile.mkdtemp("Test_ArgumentSpecParser_parse_file_Streaming")
+        self.addCleanup(shutil.rmtree, temp_dir_path)
+        temp_file_path = os.path.join(temp_dir_path, "cligen.xml")
+        with open(temp_file_path, "wt", encoding="utf8") as f:
+            f.write(xml_string)
+        x.xml_backend = self.new_xml_backend()
+        return x.parse_file(temp_file_path)
+
+    def test_FileObject(self):
+        x = ArgumentSpecParser(xml_backend=self.new_xml_backend())
+        f = io.BytesIO(b"<cligen xmlns=\"http://schemas.cligen.io/arguments\"/>")
+        actual = x.parse_file(f)
+        self.assertEqual(len(actual.arguments), 1)
+
+    def test_FileObject_InvalidXml(self):
+        x = ArgumentSpecParser(xml_backend=self.new_xml_backend())
+        f = io.BytesIO(b"<unclosed")
+        with self.assertRaises(x.XmlParseError) as cm:
+            x.parse_file(f)
+        self.assertEqual("{}".format(cm.exception), "unclosed token: line 1, column 0")
+
+    def test_InvalidXmlRootElement_SyntaxErrorTakesPrecedence(self):
+        self.assert_xml_parse_error(
+            "<wrongname><unclosed></wrongname>",
+            expected_message="mismatched tag: line 1, column 23"
+        )
+
+    def test_options_InvalidValue_SyntaxErrorTakesPrecedence(self):
+        self.assert_xml_parse_error(
+            """<cligen xmlns="http://schemas.cligen.io/arguments">
+                <options><add-builtin-help-argument>x</add-builtin-help-argument></options>
+                <unclosed>
+            </cligen>""",
+            expected_message="mismatched tag: line 4, column 14"
+        )
+
+    def test_ChildElementsDiscarded(self):
+        x = ArgumentSpecParser(xml_backend=self.new_xml_backend())
+        processed_elements = []
+        retained_element_counts = []
+        parse_root_child_element = x._parse_root_child_element
+
+        def parse_root_child_element_wrapper(element, data):
+            retained_element_counts.append(sum(1 for e in root if e in processed_elements))
+            processed_elements.append(element)
+            parse_root_child_element(element, data)
+
+        root = None
+        iterparse = x.xml_backend.iterparse
+
+        def iterparse_wrapper(*args, **kwargs):
+            nonlocal root
+            for (event, element) in iterparse(*args, **kwargs):
+                if root is None:
+                    root = element
+                yield (event, element)
+
+        xml_string = "<cligen xmlns=\"http://schemas.cligen.io/arguments\">{}</cligen>".format(
+            "<argument><key>-a</key></argument>" * 10)
+        with unittest.mock.patch.object(
+                x, "_parse_root_child_element", parse_root_child_element_wrapper), \
+                unittest.mock.patch.object(x.xml_backend, "iterparse", iterparse_wrapper), \
+                unittest.mock.patch.object(self, "new_xml_backend", return_value=x.xml_backend):
+            actual = self.parse(x, xml_string)
+
+        self.assertEqual(len(actual.arguments), 11)
+        self.assertEqual(retained_element_counts, [0] * 10)
+        self.assertEqual(len(root), 0)
+
+
+class Test_ArgumentSpecParser_parse_file_Streaming_Lxml(Test_ArgumentSpecParser_parse_file_Streaming):
+
+    def new_xml_backend(self):
+        return new_LxmlXmlBackend(self)
+
+
+class Test_ArgumentSpecParser_limits(unittest.TestCase):
+    """
+    Tests that pathological documents are rejected using a bounded amount of time and memory.
+    """
+
+    # generous bounds, so that the tests are not flaky on slow machines, that are nonetheless
+    # orders of magnitude less than what the documents would consume if they were not rejected
+    MAX_SECONDS = 2.0
+    MAX_MEMORY = 16 * 1024 * 1024
+
+    def test_BillionLaughs(self):
+        entity_decls = ["<!ENTITY lol0 \"lol\">"]
+        entity_decls.extend(
+            "<!ENTITY lol{} \"{}\">".format(i, "&lol{};".format(i - 1) * 10) for i in range(1, 10))
+        xml_string = "<!DOCTYPE cligen [{}]>{}".format(
+            "".join(entity_decls), self.spec("<argument><key>-a</key><help>&lol9;</help></argument>"))
+        self.assert_rejected(
+            xml_string, "expansion of entity lol6 exceeds the limit of 1048576 characters")
+
+    def test_BillionLaughs_Includes(self):
+        temp_dir_path = self.new_temp_dir()
+        paths = [os.path.join(temp_dir_path, "lol{}.xml".format(i)) for i in range(10)]
+        self.write_file(paths[0], self.spec("<argument><key>-a</key></argument>" * 10))
+        for i in range(1, 10):
+            self.write_file(paths[i], self.spec("<include href=\"lol{}.xml\"/>".format(i - 1) * 10))
+        xml_string = self.spec("<include href=\"{}\"/>".format(paths[9]))
+        self.assert_rejected(xml_string, "{}: number of elements exceeds the limit of 1000000".format(
+            ": ".join(reversed(paths[5:]))))
+
+    def test_DeeplyNestedIncludes(self):
+        temp_dir_path = self.new_temp_dir()
+        paths = [os.path.join(temp_dir_path, "{}.xml".format(i)) for i in range(100)]
+        self.write_file(paths[-1], self.spec("<argument><key>-a</key></argument>"))
+        for i in range(99):
+            self.write_file(paths[i], self.spec("<include href=\"{}.xml\"/>".format(i + 1)))
+        xml_string = self.spec("<include href=\"{}\"/>".format(paths[0]))
+        self.assert_rejected(xml_string, "{}: depth of nested included files exceeds the limit of 16".format(
+            ": ".join(paths[:16])))
+
+    def test_DeeplyNestedIncludes_Cached(self):
+        temp_dir_path = self.new_temp_dir()
+        paths = [os.path.join(temp_dir_path, "{}.xml".format(i)) for i in range(4)]
+        self.write_file(paths[-1], self.spec("<argument><key>-a</key></argument>"))
+        for i in range(3):
+            self.write_file(paths[i], self.spec("<include href=\"{}.xml\"/>".format(i + 1)))
+        x = ArgumentSpecParser(xml_backend=self.new_xml_backend(), include_cache=IncludedFileCache(),
+                               limits=XmlLimits(max_include_depth=3))
+        self.parse(x, self.spec("<include href=\"{}\"/>".format(paths[1])))
+        with self.assertRaises(x.CligenXmlError) as cm:
+            self.parse(x, self.spec("<include href=\"{}\"/>".format(paths[0])))
+        self.assertEqual("{}".format(cm.exception), "{}: depth of nested included files exceeds the limit of 3".format(
+            paths[0]))
+
+    def test_QuadraticBlowup(self):
+        xml_string = "<!DOCTYPE cligen [<!ENTITY a \"{}\">]>{}".format(
+            "a" * 100000, self.spec("<argument><key>-a</key><help>{}</help></argument>".format("&a;" * 10000)))
+        self.assert_rejected(xml_string, "expansion of entities exceeds the limit of 1048576 characters")
+
+    def test_DeepNesting(self):
+        xml_string = self.spec("<argument>" * 100000 + "</argument>" * 100000)
+        self.assert_rejected(xml_string, "depth of nested elements exceeds the limit of 32")
+
+    def test_ManyElements(self):
+        xml_string = self.spec("<argument><key>-a</key></argument>" * 100000)
+        self.assert_rejected(
+            xml_string, "number of elements exceeds the limit of 1000", XmlLimits(max_element_count=1000))
+
+    def test_LargeDocument(self):
+        xml_string = self.spec("<argument><key>-a</key><help>{}</help></argument>".format("a" * 1000000))
+        self.assert_rejected(
+            xml_string, "size of document exceeds the limit of 100000 bytes", XmlLimits(max_size=100000))
+
+    def test_WithinLimits(self):
+        xml_string = "<!DOCTYPE cligen [<!ENTITY input \"The input file\">]>{}".format(
+            self.spec("<argument><key>-i</key><help>&input;</help></argument>" * 3))
+        x = ArgumentSpecParser(xml_backend=self.new_xml_backend(), limits=XmlLimits(
+            max_size=len(xml_string), max_element_count=10, max_depth=3, max_entity_expansion=42))
+        actual = self.parse(x, xml_string)
+        self.assertEqual([x.help_text for x in actual.arguments[:3]], ["The input file"] * 3)
+
+    def test_IncludedFile(self):
+        temp_dir_path = tempfile.mkdtemp("Test_ArgumentSpecParser_limits")
+        self.addCleanup(shutil.rmtree, temp_dir_path)
+        included_file_path = os.path.join(temp_dir_path, "common.xml")
+        with open(included_file_path, "wt", encoding="utf8") as f:
+            f.write(self.spec("<argument>" * 100 + "</argument>" * 100))
+        x = ArgumentSpecParser(xml_backend=self.new_xml_backend(), include_cache=IncludedFileCache())
+        with self.assertRaises(x.CligenXmlError) as cm:
+            x.parse_string(self.spec("<include href=\"common.xml\"/>"), base_dir=temp_dir_path)
+        self.assertEqual("{}".format(cm.exception), "{}: depth of nested elements exceeds the limit of 32".format(
+            included_file_path))
+
+    def assert_rejected(self, xml_string, expected_message, limits=None):
+        x = ArgumentSpecParser(xml_backend=self.new_xml_backend(), limits=limits)
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        try:
+            with self.assertRaises(x.CligenXmlError) as cm:
+                self.parse(x, xml_string)
+            elapsed_time = time.perf_counter() - start_time
+            (_, peak_memory) = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual("{}".format(cm.exception), expected_message)
+        self.assertLess(elapsed_time, self.MAX_SECONDS)
+        self.assertLess(peak_memory, self.MAX_MEMORY)
+
+    @staticmethod
+    def spec(contents):
+        return "<cligen xmlns=\"http://schemas.cligen.io/arguments\">{}</cligen>".format(contents)
+
+    def new_temp_dir(self):
+        path = os.path.realpath(tempfile.mkdtemp("Test_ArgumentSpecParser_limits"))
+        self.addCleanup(shutil.rmtree, path)
+        return path
+
+    @staticmethod
+    def write_file(path, contents):
+        with open(path, "wt", encoding="utf8") as f:
+            f.write(contents)
+
+    def parse(self, x, xml_string):
+        return x.parse_string(xml_string)
+
+    def new_xml_backend(self):
+        return ElementTreeXmlBackend()
+
+
+class Test_ArgumentSpecParser_limits_Lxml(Test_ArgumentSpecParser_limits):
+
+    def new_xml_backend(self):
+        return new_LxmlXmlBackend(self)
+
+
+class Test_ArgumentSpecParser_limits_parse_file(Test_ArgumentSpecParser_limits):
+
+    def parse(self, x, xml_string):
+        temp_dir_path = tempfile.mkdtemp("Test_ArgumentSpecParser_limits_parse_file")
+        self.addCleanup(shutil.rmtree, temp_dir_path)
+        temp_file_path = os.path.join(temp_dir_path, "cligen.xml")
+        with open(temp_file_path, "wt", encoding="utf8") as f:
+            f.write(xml_string)
+        return x.parse_file(temp_file_path)
+
+    def test_FileObject_LargeDocument(self):
+        x = ArgumentSpecParser(xml_backend=self.new_xml_backend(), limits=XmlLimits(max_size=100000))
+        f = io.BytesIO(self.spec("<argument><help>{}</help></argument>".format("a" * 1000000)).encode("utf8"))
+        with self.assertRaises(x.CligenXmlError) as cm:
+            x.parse_file(f)
+        self.assertEqual("{}".format(cm.exception), "size of document exceeds the limit of 100000 bytes")
+
+
+class Test_ArgumentSpecParser_limits_parse_file_Lxml(Test_ArgumentSpecParser_limits_parse_file):
+
+    def new_xml_backend(self):
+        return new_LxmlXmlBackend(self)
+
+
+class Test_ArgumentSpecParser_include(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.dir_path = os.path.realpath(tempfile.mkdtemp("Test_ArgumentSpecParser_include"))
+        self.addCleanup(shutil.rmtree, self.dir_path)
+        self.include_cache = IncludedFileCache()
+
+    def test_ArgumentsInserted(self):
+        self.write_file("common.xml", "<argument><key>-b</key></argument><argument><key>-c</key></argument>")
+        path = self.write_file("cligen.xml", (
+            "<argument><key>-a</key></argument>"
+            "<include href=\"common.xml\"/>"
+            "<argument><key>-d</key></argument>"
+        ))
+        x = self.new_ArgumentSpecParser()
+        actual = x.parse_file(path)
+        self.assertEqual([x.keys for x in actual.arguments], [("-a",), ("-b",), ("-c",), ("-d",), ("-h", "--help")])
+        self.assertEqual(x.included_file_paths, (os.path.join(self.dir_path, "common.xml"),))
+
+    def test_NestedIncludeRelativeToIncludingFile(self):
+        self.write_file(os.path.join("lib", "common.xml"), "<include href=\"logging.xml\"/>")
+        self.write_file(os.path.join("lib", "logging.xml"), "<argument><key>-v</key></argument>")
+        path = self.write_file("cligen.xml", "<include href=\"lib/common.xml\"/>")
+        x = self.new_ArgumentSpecParser()
+        actual = x.parse_file(path)
+        self.assertEqual(actual.arguments[0].keys, ("-v",))
+        self.assertEqual(x.included_file_paths, (
+            os.path.join(self.dir_path, "lib", "common.xml"),
+            os.path.join(self.dir_path, "lib", "logging.xml"),
+        ))
+
+    def test_OptionsOfIncludedFileIgnored(self):
+        self.write_file("common.xml", (
+            "<options><add-builtin-help-argument>false</add-builtin-help-argument></options>"))
+        path = self.write_file("cligen.xml", "<include href=\"common.xml\"/>")
+        actual = self.new_ArgumentSpecParser().parse_file(path)
+        self.assertIsNotNone(actual.help_argument)
+
+    def test_parse_string_base_dir(self):
+        self.write_file("common.xml", "<argument><key>-b</key></argument>")
+        x = self.new_ArgumentSpecParser()
+        actual = x.parse_string(self.spec("<include href=\"common.xml\"/>"), base_dir=self.dir_path)
+        self.assertEqual(actual.arguments[0].keys, ("-b",))
+
+    def test_parse_file_FileObject_base_dir(self):
+        self.write_file("common.xml", "<argument><key>-b</key></argument>")
+        x = self.new_ArgumentSpecParser()
+        f = io.BytesIO(self.spec("<include href=\"common.xml\"/>").encode("utf8"))
+        actual = x.parse_file(f, base_dir=self.dir_path)
+        self.assertEqual(actual.arguments[0].keys, ("-b",))
+
+    def test_hrefMissing(self):
+        path = self.write_file("cligen.xml", "<include/>")
+        x = self.new_ArgumentSpecParser()
+        with self.assertRaises(x.CligenXmlError) as cm:
+            x.parse_file(path)
+        self.assertEqual("{}".format(cm.exception),
+                         "element {http://schemas.cligen.io/arguments}include must have a non-empty href attribute")
+
+    def test_IncludedFileNotFound(self):
+        path = self.write_file("cligen.xml", "<include href=\"missing.xml\"/>")
+        x = self.new_ArgumentSpecParser()
+        with self.assertRaises(x.CligenXmlError) as cm:
+            x.parse_file(path)
+        self.assertEqual(
+            "{}".format(cm.exception),
+            "reading included file failed: {} (No such file or directory)".format(
+                os.path.join(self.dir_path, "missing.xml")))
+
+    def test_IncludedFileInvalidXml(self):
+        common_path = self.write_file("common.xml", "<unclosed>")
+        path = self.write_file("cligen.xml", "<include href=\"common.xml\"/>")
+        x = self.new_ArgumentSpecParser()
+        with self.assertRaises(x.XmlParseError) as cm:
+            x.parse_file(path)
+        self.assertEqual("{}".format(cm.exception), "{}: mismatched tag: line 1, column 63".format(common_path))
+
+    def test_IncludedFileInvalidContents(self):
+        common_path = self.write_file("common.xml", "<include/>")
+        path = self.write_file("cligen.xml", "<include href=\"common.xml\"/>")
+        x = self.new_ArgumentSpecParser()
+        with self.assertRaises(x.CligenXmlError) as cm:
+            x.parse_file(path)
+        self.assertEqual("{}".format(cm.exception), (
+            "{}: element {{http://schemas.cligen.io/arguments}}include must have a non-empty href attribute"
+        ).format(common_path))
+
+    def test_Cycle_IncludesItself(self):
+        path = self.write_file("cligen.xml", "<include href=\"cligen.xml\"/>")
+        x = self.new_ArgumentSpecParser()
+        with self.assertRaises(x.CligenXmlError) as cm:
+            x.parse_file(path)
+        self.assertEqual("{}".format(cm.exception), "file includes itself: {}".format(path))
+
+    def test_Cycle_Indirect(self):
+        self.write_file("a.xml", "<include href=\"b.xml\"/>")
+        b_path = self.write_file("b.xml", "<include href=\"a.xml\"/>")
+        path = self.write_file("cligen.xml", "<include href=\"a.xml\"/>")
+        x = self.new_ArgumentSpecParser()
+        with self.assertRaises(x.CligenXmlError) as cm:
+            x.parse_file(path)
+        self.assertEqual("{}".format(cm.exception), "{}: {}: file includes itself: {}".format(
+            os.path.join(self.dir_path, "a.xml"), b_path, os.path.join(self.dir_path, "a.xml")))
+
+    def test_Cycle_IntroducedAfterCaching(self):
+        self.write_file("a.xml", "<include href=\"b.xml\"/>")
+        self.write_file("b.xml", "<argument><key>-b</key></argument>")
+        path = self.write_file("cligen.xml", "<include href=\"a.xml\"/>")
+        self.new_ArgumentSpecParser().parse_file(path)
+        self.write_file("b.xml", "<include href=\"cligen.xml\"/>", mtime=1)
+        x = self.new_ArgumentSpecParser()
+        with self.assertRaises(x.CligenXmlError) as cm:
+            x.parse_file(path)
+        self.assertTrue("{}".format(cm.exception).endswith("file includes itself: {}".format(path)))
+
+    def test_Cache_ParsedOncePerProcess(self):
+        self.write_file("common.xml", "<argument><key>-b</key></argument>")
+        path1 = self.write_file("cligen1.xml", "<include href=\"common.xml\"/>")
+        path2 = self.write_file("cligen2.xml", "<include href=\"common.xml\"/>")
+        with self.count_fragment_parses() as parse_counts:
+            actual1 = self.new_ArgumentSpecParser().parse_file(path1)
+            actual2 = self.new_ArgumentSpecParser().parse_file(path2)
+        self.assertEqual(parse_counts, [os.path.join(self.dir_path, "common.xml")])
+        self.assertEqual(actual1, actual2)
+
+    def test_Cache_IncludedFileModified(self):
+        self.write_file("common.xml", "<argument><key>-b</key></argument>")
+        path = self.write_file("cligen.xml", "<include href=\"common.xml\"/>")
+        self.new_ArgumentSpecParser().parse_file(path)
+        self.write_file("common.xml", "<argument><key>-c</key></argument>", mtime=1)
+        actual = self.new_ArgumentSpecParser().parse_file(path)
+        self.assertEqual(actual.arguments[0].keys, ("-c",))
+
+    def test_Cache_NestedIncludedFileModified(self):
+        self.write_file("common.xml", "<include href=\"logging.xml\"/>")
+        self.write_file("logging.xml", "<argument><key>-v</key></argument>")
+        path = self.write_file("cligen.xml", "<include href=\"common.xml\"/>")
+        self.new_ArgumentSpecParser().parse_file(path)
+        self.write_file("logging.xml", "<argument><key>-q</key></argument>", mtime=1)
+        actual = self.new_ArgumentSpecParser().parse_file(path)
+        self.assertEqual(actual.arguments[0].keys, ("-q",))
+
+    def new_ArgumentSpecParser(self):
+        return ArgumentSpecParser(xml_backend=ElementTreeXmlBackend(), include_cache=self.include_cache)
+
+    def count_fragment_parses(self):
+        """
+        Returns a context manager that records the path of each included file parsed in the list that
+        it returns from __enter__().
+        """
+        parsed_paths = []
+        parse_fragment = ArgumentSpecParser._parse_fragment
+
+        def parse_fragment_wrapper(parser, path):
+            parsed_paths.append(path)
+            return parse_fragment(parser, path)
+
+        patcher = unittest.mock.patch.object(ArgumentSpecParser, "_parse_fragment", parse_fragment_wrapper)
+
+        class CountFragmentParses:
+            def __enter__(self):
+                patcher.start()
+                return parsed_paths
+
+            def __exit__(self, *args):
+                patcher.stop()
+
+        return CountFragmentParses()
+
+    @staticmethod
+    def spec(contents):
+        return "<cligen xmlns=\"http://schemas.cligen.io/arguments\">{}</cligen>".format(contents)
+
+    def write_file(self, name, contents, mtime=0):
+        """
+        Writes a cligen specification file whose root element has the given contents, setting its
+        modification time to the given number of seconds so that modifications are detectable
+        regardless of the resolution of the file system's timestamps.
+        """
+        path = os.path.join(self.dir_path, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wt", encoding="utf8") as f:
+            f.write(self.spec(contents))
+        os.utime(path, ns=(mtime * 1000000000, mtime * 1000000000))
+        return path
+
+
+def new_LxmlXmlBackend(test_case):
+    try:
+        return LxmlXmlBackend()
+    except LxmlXmlBackend.Unavailable as e:
+        test_case.skipTest("{}".format(e))
@@ -0,0 +1,95 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from cligen.atomic_file import random_hex_string
+from cligen.atomic_file import write_file_atomically
+
+
+class Test_random_hex_string(unittest.TestCase):
+
+    def test_Length(self):
+        self.assertEqual(len(random_hex_string(8)), 16)
+
+    def test_HexDigits(self):
+        x = random_hex_string(32)
+        self.assertEqual(x.strip("0123456789abcdef"), "")
+
+    def test_Unique(self):
+        self.assertNotEqual(random_hex_string(8), random_hex_string(8))
+
+
+class Test_write_file_atomically(unittest.TestCase):
+
+    def test_Binary(self):
+        path = os.path.join(self.create_temp_dir(), "file.bin")
+        write_file_atomically(path, lambda f: f.write(b"\x00\xff"))
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"\x00\xff")
+
+    def test_Text(self):
+        path = os.path.join(self.create_temp_dir(), "file.txt")
+        write_file_atomically(path, lambda f: f.write("é"), binary=False)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"\xc3\xa9")
+
+    def test_ReplacesExistingFile(self):
+        path = os.path.join(self.create_temp_dir(), "file.bin")
+        with open(path, "wb") as f:
+            f.write(b"old")
+        write_file_atomically(path, lambda f: f.write(b"new"))
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"new")
+
+    def test_DirectoryCreatedIfMissing(self):
+        path = os.path.join(self.create_temp_dir(), "a", "b", "file.bin")
+        write_file_atomically(path, lambda f: f.write(b"abc"))
+        self.assertTrue(os.path.isfile(path))
+
+    def test_WriteFails_TempFileDeleted(self):
+        dir_path = self.create_temp_dir()
+        path = os.path.join(dir_path, "file.bin")
+
+        def write(f):
+            raise IOError("forced failure")
+
+        with self.assertRaises(IOError):
+            write_file_atomically(path, write)
+        self.assertEqual(os.listdir(dir_path), [])
+
+    def test_WriteFails_ExistingFileUntouched(self):
+        dir_path = self.create_temp_dir()
+        path = os.path.join(dir_path, "file.bin")
+        with open(path, "wb") as f:
+            f.write(b"old")
+
+        def write(f):
+            f.write(b"new")
+            raise IOError("forced failure")
+
+        with self.assertRaises(IOError):
+            write_file_atomically(path, write)
+        self.assertEqual(os.listdir(dir_path), ["file.bin"])
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"old")
+
+    def create_temp_dir(self):
+        path = tempfile.mkdtemp("Test_write_file_atomically")
+        self.addCleanup(shutil.rmtree, path)
+        return path
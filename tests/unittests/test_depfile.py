@@ -0,0 +1,69 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from cligen.depfile import DepfileWriter
+
+
+class TestDepfileWriter(unittest.TestCase):
+
+    def test_format_1Output(self):
+        x = DepfileWriter()
+        actual = x.format(["out.py"], ["cligen.xml", "templates/python.py"])
+        self.assertEqual(actual, "out.py: \\\n  cligen.xml \\\n  templates/python.py\n")
+
+    def test_format_2Outputs(self):
+        x = DepfileWriter()
+        actual = x.format(["out.c", "out.h"], ["cligen.xml"])
+        self.assertEqual(actual, "out.c: \\\n  cligen.xml\nout.h: \\\n  cligen.xml\n")
+
+    def test_format_NoDependencies(self):
+        x = DepfileWriter()
+        self.assertEqual(x.format(["out.py"], []), "out.py:\n")
+
+    def test_escape_Spaces(self):
+        self.assertEqual(DepfileWriter.escape("a b/c d.xml"), "a\\ b/c\\ d.xml")
+
+    def test_escape_Dollar(self):
+        self.assertEqual(DepfileWriter.escape("$HOME/a.xml"), "$$HOME/a.xml")
+
+    def test_escape_Hash(self):
+        self.assertEqual(DepfileWriter.escape("a#1.xml"), "a\\#1.xml")
+
+    def test_write(self):
+        dir_path = self.create_temp_dir()
+        path = os.path.join(dir_path, "out.d")
+        x = DepfileWriter()
+        x.write(path, ["out.py"], ["cligen.xml"])
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"out.py: \\\n  cligen.xml\n")
+
+    def test_write_Fails(self):
+        dir_path = self.create_temp_dir()
+        x = DepfileWriter()
+        with self.assertRaises(x.Error) as cm:
+            x.write(dir_path, ["out.py"], ["cligen.xml"])
+        self.assertEqual(
+            "{}".format(cm.exception),
+            "error writing dependency file: {} (Is a directory)".format(dir_path))
+
+    def create_temp_dir(self):
+        path = tempfile.mkdtemp("TestDepfileWriter")
+        self.addCleanup(shutil.rmtree, path)
+        return path
@@ -0,0 +1,103 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Regression tests for the set of modules imported by the cligen command-line utility, which
+dominates its startup time.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import cligen
+
+
+@unittest.skipUnless(sys.version_info >= (3, 7), "python -X importtime requires Python 3.7 or later")
+class TestImportTime(unittest.TestCase):
+
+    def test_Help(self):
+        imported_modules = self.run_cligen(["--help"])
+        self.assertIn("cligen.main", imported_modules)
+        self.assertNotImported(imported_modules, "jinja2")
+        self.assertNotImported(imported_modules, "cligen.target_c")
+        self.assertNotImported(imported_modules, "cligen.target_java")
+        self.assertNotImported(imported_modules, "cligen.target_python")
+        self.assertNotImported(imported_modules, "cligen.argspec_xml_parser")
+        self.assertNotImported(imported_modules, "importlib.metadata")
+        self.assertNotImported(imported_modules, "concurrent.futures")
+        self.assertNotImported(imported_modules, "cligen.depfile")
+        self.assertNotImported(imported_modules, "cligen.incremental")
+        self.assertNotImported(imported_modules, "hashlib")
+        self.assertNotImported(imported_modules, "json")
+
+    def test_SampleXml(self):
+        imported_modules = self.run_cligen(["--sample-xml"])
+        self.assertNotImported(imported_modules, "jinja2")
+        self.assertNotImported(imported_modules, "cligen.incremental")
+        self.assertNotImported(imported_modules, "hashlib")
+        self.assertNotImported(imported_modules, "cligen.target_python")
+
+    def test_Generate_OnlySelectedTargetImported(self):
+        dir_path = tempfile.mkdtemp("TestImportTime")
+        self.addCleanup(shutil.rmtree, dir_path)
+        source_file_path = os.path.join(os.path.dirname(cligen.__file__), "sample_cligen.xml")
+        output_file_path = os.path.join(dir_path, "cligen.py")
+
+        imported_modules = self.run_cligen(
+            ["-l", "python", "-o", output_file_path, source_file_path])
+
+        self.assertIn("cligen.target_python", imported_modules)
+        self.assertIn("jinja2", imported_modules)
+        self.assertNotImported(imported_modules, "cligen.target_c")
+        self.assertNotImported(imported_modules, "cligen.target_java")
+
+    def assertNotImported(self, imported_modules, module_name):
+        if module_name in imported_modules:
+            self.fail("module {} should not have been imported, but was (cumulative import time: "
+                      "{} us)".format(module_name, imported_modules[module_name]))
+
+    def run_cligen(self, args):
+        """
+        Runs "python -X importtime -m cligen" with the given arguments and returns a dict that maps
+        the name of each imported module to its cumulative import time in microseconds.
+        """
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.path.dirname(os.path.dirname(os.path.abspath(cligen.__file__)))
+        env.pop("CLIGEN_CACHE_DIR", None)
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "cligen"] + list(args),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            env=env,
+            universal_newlines=True,
+        )
+        self.assertEqual(process.returncode, 0, process.stderr)
+
+        imported_modules = {}
+        for line in process.stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            fields = line[len("import time:"):].split("|")
+            try:
+                cumulative_time = int(fields[1])
+            except ValueError:
+                continue  # the header line
+            imported_modules[fields[2].strip()] = cumulative_time
+
+        return imported_modules
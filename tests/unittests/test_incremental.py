@@ -0,0 +1,168 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from cligen.argspec import ArgumentParserSpec
+from cligen.incremental import BuildStamp
+
+
+class TestBuildStamp(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.dir_path = tempfile.mkdtemp("TestBuildStamp")
+        self.addCleanup(shutil.rmtree, self.dir_path)
+        self.cache_dir = os.path.join(self.dir_path, "cache")
+        self.input_file_paths = [
+            self.create_file("input1.txt", b"input 1"),
+            self.create_file("input2.txt", b"input 2"),
+        ]
+        self.output_file_paths = [
+            self.create_file("output1.txt", b"output 1"),
+            self.create_file("output2.txt", b"output 2"),
+        ]
+
+    def test_for_output_files_SameOutputFiles(self):
+        x1 = BuildStamp.for_output_files(self.cache_dir, ["a", "b"], settings=())
+        x2 = BuildStamp.for_output_files(self.cache_dir, ["a", "b"], settings=())
+        self.assertEqual(x1.path, x2.path)
+
+    def test_for_output_files_DifferentOutputFiles(self):
+        x1 = BuildStamp.for_output_files(self.cache_dir, ["a", "b"], settings=())
+        x2 = BuildStamp.for_output_files(self.cache_dir, ["a", "c"], settings=())
+        self.assertNotEqual(x1.path, x2.path)
+
+    def test_is_up_to_date_NoStampFile(self):
+        x = self.new_BuildStamp()
+        self.assertFalse(x.is_up_to_date())
+
+    def test_is_up_to_date_CorruptStampFile(self):
+        x = self.new_BuildStamp()
+        self.write_stamp(x)
+        with open(x.path, "wb") as f:
+            f.write(b"{")
+        self.assertFalse(x.is_up_to_date())
+
+    def test_is_up_to_date_NothingChanged(self):
+        self.write_stamp(self.new_BuildStamp())
+        self.assertTrue(self.new_BuildStamp().is_up_to_date())
+
+    def test_is_up_to_date_SettingsChanged(self):
+        self.write_stamp(self.new_BuildStamp())
+        self.assertFalse(self.new_BuildStamp(settings=("python", "utf16")).is_up_to_date())
+
+    def test_is_up_to_date_InputFileChanged(self):
+        self.write_stamp(self.new_BuildStamp())
+        self.create_file("input2.txt", b"input 2 changed")
+        self.assertFalse(self.new_BuildStamp().is_up_to_date())
+
+    def test_is_up_to_date_InputFileDeleted(self):
+        self.write_stamp(self.new_BuildStamp())
+        os.unlink(self.input_file_paths[0])
+        self.assertFalse(self.new_BuildStamp().is_up_to_date())
+
+    def test_is_up_to_date_OutputFileChanged(self):
+        self.write_stamp(self.new_BuildStamp())
+        self.create_file("output1.txt", b"output 1 changed")
+        self.assertFalse(self.new_BuildStamp().is_up_to_date())
+
+    def test_is_up_to_date_OutputFileDeleted(self):
+        self.write_stamp(self.new_BuildStamp())
+        os.unlink(self.output_file_paths[1])
+        self.assertFalse(self.new_BuildStamp().is_up_to_date())
+
+    def test_write_FingerprintNone_DeletesStampFile(self):
+        x = self.new_BuildStamp()
+        self.write_stamp(x)
+        x.write(None, self.input_file_paths, self.output_file_paths)
+        self.assertFalse(os.path.exists(x.path))
+
+    def test_fingerprint_InputFileMissing(self):
+        x = self.new_BuildStamp()
+        fingerprint = x.fingerprint([os.path.join(self.dir_path, "does_not_exist.txt")])
+        self.assertIsNone(fingerprint)
+
+    def test_is_spec_up_to_date_SameSpec(self):
+        x = self.new_BuildStamp()
+        dependency_paths = self.input_file_paths[1:]
+        self.write_stamp(x, spec_fingerprint=x.spec_fingerprint(self.new_argspec(), dependency_paths))
+        self.create_file("input1.txt", b"input 1 changed")
+        self.assertFalse(x.is_up_to_date())
+        self.assertTrue(x.is_spec_up_to_date(x.spec_fingerprint(self.new_argspec(), dependency_paths)))
+
+    def test_is_spec_up_to_date_DifferentSpec(self):
+        x = self.new_BuildStamp()
+        self.write_stamp(x, spec_fingerprint=x.spec_fingerprint(self.new_argspec(), self.input_file_paths))
+        spec_fingerprint = x.spec_fingerprint(self.new_argspec(help_text="changed"), self.input_file_paths)
+        self.assertFalse(x.is_spec_up_to_date(spec_fingerprint))
+
+    def test_is_spec_up_to_date_DependencyFileChanged(self):
+        x = self.new_BuildStamp()
+        self.write_stamp(x, spec_fingerprint=x.spec_fingerprint(self.new_argspec(), self.input_file_paths))
+        self.create_file("input2.txt", b"input 2 changed")
+        self.assertFalse(x.is_spec_up_to_date(x.spec_fingerprint(self.new_argspec(), self.input_file_paths)))
+
+    def test_is_spec_up_to_date_SettingsChanged(self):
+        x = self.new_BuildStamp()
+        self.write_stamp(x, spec_fingerprint=x.spec_fingerprint(self.new_argspec(), self.input_file_paths))
+        x2 = self.new_BuildStamp(settings=("python", "utf16"))
+        self.assertFalse(x2.is_spec_up_to_date(x2.spec_fingerprint(self.new_argspec(), self.input_file_paths)))
+
+    def test_is_spec_up_to_date_OutputFileChanged(self):
+        x = self.new_BuildStamp()
+        spec_fingerprint = x.spec_fingerprint(self.new_argspec(), self.input_file_paths)
+        self.write_stamp(x, spec_fingerprint=spec_fingerprint)
+        self.create_file("output1.txt", b"output 1 changed")
+        self.assertFalse(x.is_spec_up_to_date(spec_fingerprint))
+
+    def test_is_spec_up_to_date_NotRecorded(self):
+        x = self.new_BuildStamp()
+        self.write_stamp(x)
+        self.assertFalse(x.is_spec_up_to_date(x.spec_fingerprint(self.new_argspec(), self.input_file_paths)))
+
+    def test_is_spec_up_to_date_None(self):
+        x = self.new_BuildStamp()
+        self.write_stamp(x)
+        self.assertFalse(x.is_spec_up_to_date(None))
+
+    def test_spec_fingerprint_DependencyFileMissing(self):
+        x = self.new_BuildStamp()
+        self.assertIsNone(x.spec_fingerprint(self.new_argspec(), [os.path.join(self.dir_path, "does_not_exist")]))
+
+    def new_BuildStamp(self, settings=None):
+        if settings is None:
+            settings = ("python", "utf8")
+        return BuildStamp.for_output_files(self.cache_dir, self.output_file_paths, settings)
+
+    def write_stamp(self, build_stamp, spec_fingerprint=None):
+        fingerprint = build_stamp.fingerprint(self.input_file_paths)
+        build_stamp.write(
+            fingerprint, self.input_file_paths, self.output_file_paths, spec_fingerprint=spec_fingerprint)
+
+    @staticmethod
+    def new_argspec(help_text="The file to read"):
+        builder = ArgumentParserSpec.Builder()
+        builder.add_argument(keys=("-i", "--input-file"), help_text=help_text)
+        return builder.build()
+
+    def create_file(self, name, contents):
+        path = os.path.join(self.dir_path, name)
+        with open(path, "wb") as f:
+            f.write(contents)
+        return path
@@ -0,0 +1,80 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+import cligen.main
+
+
+class Test_run(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.dir_path = tempfile.mkdtemp("Test_run")
+        self.addCleanup(shutil.rmtree, self.dir_path)
+        self.source_file_path = os.path.join(self.dir_path, "cligen.xml")
+        self.output_file_path = os.path.join(self.dir_path, "cligen.py")
+        with open(self.source_file_path, "wt", encoding="utf8") as f:
+            f.write("<cligen xmlns=\"http://schemas.cligen.io/arguments\"/>")
+
+    def test_Watch_WatcherFails(self):
+        watcher = FailingFileWatcher()
+        with unittest.mock.patch("cligen.watch.new_file_watcher", return_value=watcher):
+            (exit_code, stderr) = self.run_main(
+                "--watch", "-l", "python", "-o", self.output_file_path, self.source_file_path)
+
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(stderr, "ERROR: watching files for changes failed: [Errno 28] No space left on device\n")
+        self.assertTrue(watcher.closed)
+
+    def test_Watch_SourceFileNotFound(self):
+        os.unlink(self.source_file_path)
+        watcher = FailingFileWatcher()
+        with unittest.mock.patch("cligen.watch.new_file_watcher", return_value=watcher):
+            (exit_code, stderr) = self.run_main(
+                "--watch", "-l", "python", "-o", self.output_file_path, self.source_file_path)
+
+        self.assertEqual(exit_code, 1)
+        self.assertTrue(stderr.endswith("ERROR: input file not found: {}\n".format(self.source_file_path)))
+
+    @staticmethod
+    def run_main(*args):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with unittest.mock.patch("sys.argv", ["cligen"] + list(args)), \
+                unittest.mock.patch("sys.stdout", stdout), \
+                unittest.mock.patch("sys.stderr", stderr):
+            exit_code = cligen.main.run()
+        return (exit_code, stderr.getvalue())
+
+
+class FailingFileWatcher:
+
+    def __init__(self):
+        self.closed = False
+
+    def set_paths(self, paths):
+        raise OSError(28, "No space left on device")
+
+    def wait(self, timeout=None):
+        raise AssertionError("wait() should not have been invoked")
+
+    def close(self):
+        self.closed = True
@@ -0,0 +1,618 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+import cligen
+from cligen.argspec_xml_parser import ArgumentSpecParser
+from cligen.depfile import DepfileWriter
+from cligen.main_app import CligenApplication
+from cligen.main_app import CligenBatchApplication
+from cligen.main_app import CligenMultiTargetApplication
+from cligen.main_app import CligenWatchApplication
+from cligen.target_python import PythonTargetLanguage
+from cligen.xml_backend import ElementTreeXmlBackend
+
+
+class TestCligenApplication_Incremental(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.dir_path = tempfile.mkdtemp("TestCligenApplication_Incremental")
+        self.addCleanup(shutil.rmtree, self.dir_path)
+        self.source_file_path = os.path.join(self.dir_path, "cligen.xml")
+        sample_xml_path = os.path.join(os.path.dirname(cligen.__file__), "sample_cligen.xml")
+        shutil.copyfile(sample_xml_path, self.source_file_path)
+        self.output_file_path = os.path.join(self.dir_path, "cligen.py")
+
+    def test_FirstRun_Generates(self):
+        self.assertTrue(self.run_app())
+        self.assertTrue(os.path.exists(self.output_file_path))
+
+    def test_SecondRun_Skipped(self):
+        self.run_app()
+        self.assertFalse(self.run_app())
+
+    def test_SourceFileChanged_Generates(self):
+        self.run_app()
+        with open(self.source_file_path, "ab") as f:
+            f.write(b"<!-- a comment -->")
+        self.assertTrue(self.run_app())
+
+    def test_SourceFileReformatted_OutputFilesNotGenerated(self):
+        self.run_app()
+        with open(self.source_file_path, "ab") as f:
+            f.write(b"\n\n<!-- a comment -->\n")
+        self.assertTrue(self.run_app())
+        self.assertFalse(self.output_files_generated)
+        self.assertFalse(self.run_app())
+
+    def test_SourceFileMeaningChanged_OutputFilesGenerated(self):
+        self.run_app()
+        with open(self.source_file_path, "rt", encoding="utf8") as f:
+            contents = f.read()
+        with open(self.source_file_path, "wt", encoding="utf8") as f:
+            f.write(contents.replace("</cligen>", "<argument><key>--new</key></argument></cligen>"))
+        self.assertTrue(self.run_app())
+        self.assertTrue(self.output_files_generated)
+        with open(self.output_file_path, "rt", encoding="utf8") as f:
+            self.assertIn("--new", f.read())
+
+    def test_SourceFileReformattedAndOutputFileModified_OutputFilesGenerated(self):
+        self.run_app()
+        with open(self.source_file_path, "ab") as f:
+            f.write(b"<!-- a comment -->")
+        with open(self.output_file_path, "ab") as f:
+            f.write(b"# modified")
+        self.run_app()
+        self.assertTrue(self.output_files_generated)
+
+    def test_EncodingChanged_Generates(self):
+        self.run_app()
+        self.assertTrue(self.run_app(encoding="utf16"))
+
+    def test_CligenVersionChanged_Generates(self):
+        self.run_app()
+        with unittest.mock.patch.object(cligen, "__version__", cligen.__version__ + ".1"):
+            self.assertTrue(self.run_app())
+
+    def test_ParserVersionChanged_Generates(self):
+        self.run_app()
+        with unittest.mock.patch.object(ArgumentSpecParser, "VERSION", ArgumentSpecParser.VERSION + ".1"):
+            self.assertTrue(self.run_app())
+
+    def test_OutputFileDeleted_Generates(self):
+        self.run_app()
+        os.unlink(self.output_file_path)
+        self.assertTrue(self.run_app())
+        self.assertTrue(os.path.exists(self.output_file_path))
+
+    def test_NotIncremental_AlwaysGenerates(self):
+        self.run_app(incremental=False)
+        self.assertTrue(self.run_app(incremental=False))
+
+    def run_app(self, encoding=None, incremental=True):
+        """
+        Runs a CligenApplication and returns whether or not it read the source file.
+        """
+        app = CligenApplication(
+            source_file_path=self.source_file_path,
+            output_file_paths=[self.output_file_path],
+            target_language=PythonTargetLanguage(),
+            inline=False,
+            encoding=encoding,
+            newline="\n",
+            cache_dir=os.path.join(self.dir_path, "cache"),
+            incremental=incremental,
+        )
+        with unittest.mock.patch.object(
+                app, "read_source_file", wraps=app.read_source_file) as read_source_file:
+            with unittest.mock.patch.object(
+                    app, "generate_output_files", wraps=app.generate_output_files) as generate:
+                app.run()
+        self.output_files_generated = generate.called
+        return read_source_file.called
+
+
+class TestCligenApplication_Includes(unittest.TestCase):
+
+    DEFAULT_VALUE = object()
+
+    def setUp(self):
+        super().setUp()
+        self.dir_path = tempfile.mkdtemp("TestCligenApplication_Includes")
+        self.addCleanup(shutil.rmtree, self.dir_path)
+        self.source_file_path = os.path.join(self.dir_path, "cligen.xml")
+        self.included_file_path = os.path.realpath(os.path.join(self.dir_path, "common.xml"))
+        self.output_file_path = os.path.join(self.dir_path, "cligen.py")
+        self.write_spec(self.source_file_path, "<include href=\"common.xml\"/>")
+        self.write_spec(self.included_file_path, "<argument><key>-v</key></argument>")
+
+    def test_input_file_paths_IncludedFilesAfterRead(self):
+        app = self.new_CligenApplication(cache_dir=None)
+        app.run()
+        self.assertEqual(app.input_file_paths()[:2], (self.source_file_path, self.included_file_path))
+
+    def test_read_source_file_CacheHit(self):
+        self.new_CligenApplication().read_source_file()
+        app = self.new_CligenApplication()
+        argspec = app.read_source_file()
+        self.assertEqual(argspec.arguments[0].keys, ("-v",))
+        self.assertEqual(app.included_file_paths, (self.included_file_path,))
+
+    def test_read_source_file_IncludedFileModified(self):
+        self.new_CligenApplication().read_source_file()
+        self.write_spec(self.included_file_path, "<argument><key>-q</key></argument>")
+        argspec = self.new_CligenApplication().read_source_file()
+        self.assertEqual(argspec.arguments[0].keys, ("-q",))
+
+    def test_Incremental_IncludedFileModified(self):
+        self.new_CligenApplication(incremental=True).run()
+        self.write_spec(self.included_file_path, "<argument><key>-q</key></argument>")
+        self.new_CligenApplication(incremental=True).run()
+        with open(self.output_file_path, "rt", encoding="utf8") as f:
+            self.assertIn("\"-q\"", f.read())
+
+    def test_Incremental_UpToDate_IncludedFilesFromStamp(self):
+        self.new_CligenApplication(incremental=True).run()
+        app = self.new_CligenApplication(incremental=True)
+        with unittest.mock.patch.object(app, "read_source_file") as read_source_file:
+            app.run()
+        self.assertFalse(read_source_file.called)
+        self.assertEqual(app.included_file_paths, (self.included_file_path,))
+
+    def new_CligenApplication(self, cache_dir=DEFAULT_VALUE, incremental=False):
+        if cache_dir is self.DEFAULT_VALUE:
+            cache_dir = os.path.join(self.dir_path, "cache")
+        return CligenApplication(
+            source_file_path=self.source_file_path,
+            output_file_paths=[self.output_file_path],
+            target_language=PythonTargetLanguage(),
+            inline=False,
+            encoding=None,
+            newline="\n",
+            cache_dir=cache_dir,
+            incremental=incremental,
+        )
+
+    @staticmethod
+    def write_spec(path, contents):
+        with open(path, "wt", encoding="utf8") as f:
+            f.write("<cligen xmlns=\"http://schemas.cligen.io/arguments\">{}</cligen>".format(contents))
+        # make the modification detectable regardless of the resolution of file system timestamps
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + len(contents) * 1000000000))
+
+
+class TestCligenApplication_read_source_file(unittest.TestCase):
+
+    DEFAULT_VALUE = object()
+
+    def setUp(self):
+        super().setUp()
+        self.dir_path = tempfile.mkdtemp("TestCligenApplication_read_source_file")
+        self.addCleanup(shutil.rmtree, self.dir_path)
+        self.source_file_path = os.path.join(self.dir_path, "cligen.xml")
+        sample_xml_path = os.path.join(os.path.dirname(cligen.__file__), "sample_cligen.xml")
+        shutil.copyfile(sample_xml_path, self.source_file_path)
+
+    def test_NoCacheDir(self):
+        app = self.new_CligenApplication(cache_dir=None)
+        (argspec, parse_count) = self.read_source_file(app)
+        self.assertEqual(parse_count, 1)
+        self.assertEqual(len(argspec.arguments), 3)
+
+    def test_CacheDir_Miss(self):
+        app = self.new_CligenApplication()
+        (argspec, parse_count) = self.read_source_file(app)
+        self.assertEqual(parse_count, 1)
+        self.assertEqual(len(os.listdir(os.path.join(self.dir_path, "cache", "specs"))), 1)
+
+    def test_CacheDir_Hit(self):
+        (expected, _) = self.read_source_file(self.new_CligenApplication())
+        (actual, parse_count) = self.read_source_file(self.new_CligenApplication())
+        self.assertEqual(parse_count, 0)
+        self.assertEqual(actual, expected)
+
+    def test_CacheDir_SourceFileChanged(self):
+        self.read_source_file(self.new_CligenApplication())
+        with open(self.source_file_path, "ab") as f:
+            f.write(b"<!-- a comment -->")
+        (argspec, parse_count) = self.read_source_file(self.new_CligenApplication())
+        self.assertEqual(parse_count, 1)
+
+    def test_CacheDir_SourceFileNotFound(self):
+        os.unlink(self.source_file_path)
+        app = self.new_CligenApplication()
+        with self.assertRaises(app.Error) as cm:
+            app.read_source_file()
+        self.assertEqual("{}".format(cm.exception), "reading file failed: {} (No such file or directory)".format(
+            self.source_file_path))
+
+    def test_CacheDir_ParseErrorNotCached(self):
+        with open(self.source_file_path, "wb") as f:
+            f.write(b"<unclosed")
+        app = self.new_CligenApplication()
+        with self.assertRaises(app.Error) as cm:
+            app.read_source_file()
+        self.assertEqual(
+            "{}".format(cm.exception),
+            "parsing file failed: {} (unclosed token: line 1, column 0)".format(self.source_file_path))
+        self.assertFalse(os.path.exists(os.path.join(self.dir_path, "cache", "specs")))
+
+    def test_XmlBackend(self):
+        xml_backend = ElementTreeXmlBackend()
+        app = self.new_CligenApplication(cache_dir=None, xml_backend=xml_backend)
+        with unittest.mock.patch.object(
+                xml_backend, "iterparse", side_effect=xml_backend.iterparse) as iterparse:
+            (argspec, parse_count) = self.read_source_file(app)
+        self.assertEqual(iterparse.call_count, 1)
+        self.assertEqual(len(argspec.arguments), 3)
+
+    def new_CligenApplication(self, cache_dir=DEFAULT_VALUE, xml_backend=None):
+        if cache_dir is self.DEFAULT_VALUE:
+            cache_dir = os.path.join(self.dir_path, "cache")
+        return CligenApplication(
+            source_file_path=self.source_file_path,
+            output_file_paths=None,
+            target_language=PythonTargetLanguage(),
+            inline=False,
+            encoding=None,
+            newline="\n",
+            cache_dir=cache_dir,
+            xml_backend=xml_backend,
+        )
+
+    @staticmethod
+    def read_source_file(app):
+        """
+        Invokes read_source_file() on the given application and returns a (argspec, parse_count)
+        pair whose values are the ArgumentParserSpec that it returned and the number of times that
+        it parsed the source file.
+        """
+        from cligen.argspec_xml_parser import ArgumentSpecParser
+        with unittest.mock.patch.object(
+                ArgumentSpecParser, "parse_file", autospec=True,
+                side_effect=ArgumentSpecParser.parse_file) as parse_file:
+            argspec = app.read_source_file()
+        return (argspec, parse_file.call_count)
+
+
+class TestCligenApplication_validate(unittest.TestCase):
+
+    def test_InvalidSpecificationFile(self):
+        dir_path = tempfile.mkdtemp("TestCligenApplication_validate")
+        self.addCleanup(shutil.rmtree, dir_path)
+        source_file_path = os.path.join(dir_path, "cligen.xml")
+        output_file_path = os.path.join(dir_path, "cligen.py")
+        with open(source_file_path, "wt", encoding="utf8") as f:
+            f.write(
+                "<cligen xmlns=\"http://schemas.cligen.io/arguments\">"
+                "<argument><key>--out-file</key></argument>"
+                "<argument><key>--outfile</key></argument>"
+                "<argument><key>--help</key></argument>"
+                "</cligen>"
+            )
+
+        app = CligenApplication(
+            source_file_path=source_file_path,
+            output_file_paths=[output_file_path],
+            target_language=PythonTargetLanguage(),
+            inline=False,
+            encoding=None,
+            newline="\n",
+        )
+        with self.assertRaises(app.Error) as cm:
+            app.run()
+
+        self.assertEqual("{}".format(cm.exception), (
+            "invalid specification file: {} ("
+            "variable name of argument --outfile is the same as that of argument --out-file: outfile; "
+            "key --help of argument -h/--help is also a key of argument --help; "
+            "variable name of argument -h/--help is the same as that of argument --help: help)"
+        ).format(source_file_path))
+        self.assertFalse(os.path.exists(output_file_path))
+
+
+class TestCligenApplication_Depfile(unittest.TestCase):
+
+    def test(self):
+        dir_path = tempfile.mkdtemp("TestCligenApplication_Depfile")
+        self.addCleanup(shutil.rmtree, dir_path)
+        source_file_path = os.path.join(os.path.dirname(cligen.__file__), "sample_cligen.xml")
+        output_file_path = os.path.join(dir_path, "cligen.py")
+        depfile_path = os.path.join(dir_path, "cligen.d")
+        target_language = PythonTargetLanguage()
+
+        app = CligenApplication(
+            source_file_path=source_file_path,
+            output_file_paths=[output_file_path],
+            target_language=target_language,
+            inline=False,
+            encoding=None,
+            newline="\n",
+            depfile_path=depfile_path,
+        )
+        app.run()
+
+        with open(depfile_path, "rt", encoding="utf8") as f:
+            actual = f.read()
+        dependency_paths = (source_file_path,) + target_language.dependency_paths()
+        expected = "{}:{}\n".format(
+            output_file_path, "".join(" \\\n  {}".format(x) for x in dependency_paths))
+        self.assertEqual(actual, expected)
+        self.assertIn(os.path.join("templates", "python.py"), actual)
+        self.assertIn("target_python.py", actual)
+
+
+class TestCligenMultiTargetApplication(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.dir_path = tempfile.mkdtemp("TestCligenMultiTargetApplication")
+        self.addCleanup(shutil.rmtree, self.dir_path)
+        self.source_file_path = os.path.join(os.path.dirname(cligen.__file__), "sample_cligen.xml")
+
+    def test_run_SourceFileReadOnce(self):
+        apps = [self.new_CligenApplication("cligen1.py"), self.new_CligenApplication("cligen2.py")]
+        x = CligenMultiTargetApplication(apps, stderr=io.StringIO())
+
+        with unittest.mock.patch.object(
+                apps[0], "read_source_file", wraps=apps[0].read_source_file) as read1, \
+                unittest.mock.patch.object(apps[1], "read_source_file") as read2:
+            x.run()
+
+        self.assertEqual(read1.call_count, 1)
+        self.assertEqual(read2.call_count, 0)
+        with open(os.path.join(self.dir_path, "cligen1.py"), "rb") as f1, \
+                open(os.path.join(self.dir_path, "cligen2.py"), "rb") as f2:
+            self.assertEqual(f1.read(), f2.read())
+
+    def test_run_IncludedFilePathsShared(self):
+        apps = [self.new_CligenApplication("cligen1.py"), self.new_CligenApplication("cligen2.py")]
+        x = CligenMultiTargetApplication(apps, stderr=io.StringIO())
+
+        def read_source_file():
+            apps[0].included_file_paths = ("common.xml",)
+            return ArgumentSpecParser().parse_file(self.source_file_path)
+
+        with unittest.mock.patch.object(apps[0], "read_source_file", read_source_file):
+            x.run()
+
+        self.assertEqual(apps[1].included_file_paths, ("common.xml",))
+        self.assertIn("common.xml", x.input_file_paths())
+
+    def test_run_Jobs(self):
+        apps = [self.new_CligenApplication("cligen{}.py".format(i)) for i in range(3)]
+        x = CligenMultiTargetApplication(apps, jobs=1, stderr=io.StringIO())
+        x.run()
+        for i in range(3):
+            self.assertTrue(os.path.exists(os.path.join(self.dir_path, "cligen{}.py".format(i))))
+
+    def test_run_ReadingSourceFileFails_ReportedOnce(self):
+        self.source_file_path = os.path.join(self.dir_path, "does_not_exist.xml")
+        apps = [self.new_CligenApplication("cligen1.py"), self.new_CligenApplication("cligen2.py")]
+        stderr = io.StringIO()
+        x = CligenMultiTargetApplication(apps, stderr=stderr)
+
+        with self.assertRaises(x.Error) as cm:
+            x.run()
+
+        self.assertEqual(
+            "{}".format(cm.exception), "generating code for 2 of 2 target languages failed")
+        self.assertEqual(
+            stderr.getvalue(), "ERROR: reading file failed: {} (No such file or directory)\n".format(
+                self.source_file_path))
+
+    def test_run_FailuresDoNotStopOtherApplications(self):
+        apps = [
+            self.new_CligenApplication(os.path.join("does_not_exist", "cligen1.py")),
+            self.new_CligenApplication("cligen2.py"),
+        ]
+        stderr = io.StringIO()
+        x = CligenMultiTargetApplication(apps, stderr=stderr)
+
+        with self.assertRaises(x.Error) as cm:
+            x.run()
+
+        self.assertEqual(
+            "{}".format(cm.exception), "generating code for 1 of 2 target languages failed")
+        self.assertTrue(stderr.getvalue().startswith("ERROR: error writing generated code to file"))
+        self.assertTrue(os.path.exists(os.path.join(self.dir_path, "cligen2.py")))
+
+    def test_run_Depfile(self):
+        apps = [self.new_CligenApplication("cligen1.py"), self.new_CligenApplication("cligen2.py")]
+        depfile_path = os.path.join(self.dir_path, "cligen.d")
+        x = CligenMultiTargetApplication(apps, depfile_path=depfile_path, stderr=io.StringIO())
+        x.run()
+
+        with open(depfile_path, "rt", encoding="utf8") as f:
+            actual = f.read()
+        expected = DepfileWriter().format(*apps[0].depfile_rule())
+        expected += DepfileWriter().format(*apps[1].depfile_rule())
+        self.assertEqual(actual, expected)
+
+    def new_CligenApplication(self, output_file_name):
+        return CligenApplication(
+            source_file_path=self.source_file_path,
+            output_file_paths=[os.path.join(self.dir_path, output_file_name)],
+            target_language=PythonTargetLanguage(),
+            inline=False,
+            encoding=None,
+            newline="\n",
+        )
+
+
+class TestCligenBatchApplication(unittest.TestCase):
+
+    def test_run_NoApplications(self):
+        stderr = io.StringIO()
+        x = CligenBatchApplication([], stderr=stderr)
+        x.run()
+        self.assertEqual(stderr.getvalue(), "")
+
+    def test_run_AllSucceed(self):
+        stderr = io.StringIO()
+        apps = [FakeApplication(), FakeApplication()]
+        x = CligenBatchApplication(apps, stderr=stderr)
+        x.run()
+        self.assertEqual([app.run_count for app in apps], [1, 1])
+        self.assertEqual(stderr.getvalue(), "")
+
+    def test_run_FailuresDoNotStopOtherApplications(self):
+        stderr = io.StringIO()
+        apps = [FakeApplication("error 1"), FakeApplication(), FakeApplication("error 3")]
+        x = CligenBatchApplication(apps, stderr=stderr)
+
+        with self.assertRaises(x.Error) as cm:
+            x.run()
+
+        self.assertEqual(
+            "{}".format(cm.exception), "compiling 2 of 3 specification files failed")
+        self.assertEqual([app.run_count for app in apps], [1, 1, 1])
+        self.assertEqual(stderr.getvalue(), "ERROR: error 1\nERROR: error 3\n")
+
+
+class TestCligenWatchApplication(unittest.TestCase):
+
+    def test_run(self):
+        app1 = FakeApplication(input_file_paths=["a.xml", "common.txt"])
+        app2 = FakeApplication(input_file_paths=["b.xml", "common.txt"])
+        watcher = FakeFileWatcher([{os.path.abspath("a.xml")}, set(), KeyboardInterrupt()])
+        x = self.new_CligenWatchApplication([app1, app2], watcher)
+
+        x.run()
+
+        self.assertEqual([app1.run_count, app2.run_count], [2, 1])
+        self.assertEqual(
+            watcher.paths, {os.path.abspath(x) for x in ("a.xml", "b.xml", "common.txt")})
+        self.assertTrue(watcher.closed)
+
+    def test_run_FailuresReportedAndWatchingContinues(self):
+        temp_dir_path = tempfile.mkdtemp("TestCligenWatchApplication")
+        self.addCleanup(shutil.rmtree, temp_dir_path)
+        path = os.path.join(temp_dir_path, "a.xml")
+        with open(path, "wb"):
+            pass
+        app = FakeApplication("error 1", input_file_paths=[path])
+        watcher = FakeFileWatcher([{path}, set(), KeyboardInterrupt()])
+        stderr = io.StringIO()
+        x = self.new_CligenWatchApplication([app], watcher, stderr=stderr)
+
+        x.run()
+
+        self.assertEqual(app.run_count, 2)
+        self.assertEqual(stderr.getvalue(), "ERROR: error 1\nERROR: error 1\n")
+
+    def test_run_WatcherFails(self):
+        app = FakeApplication(input_file_paths=["a.xml"])
+        watcher = FakeFileWatcher([OSError(28, "No space left on device")])
+        x = self.new_CligenWatchApplication([app], watcher)
+
+        with self.assertRaises(x.Error) as cm:
+            x.run()
+
+        self.assertEqual(
+            "{}".format(cm.exception), "watching files for changes failed: [Errno 28] No space left on device")
+        self.assertTrue(watcher.closed)
+
+    def test_run_InputFileNotFound(self):
+        temp_dir_path = tempfile.mkdtemp("TestCligenWatchApplication")
+        self.addCleanup(shutil.rmtree, temp_dir_path)
+        path = os.path.join(temp_dir_path, "a.xml")
+        app = FakeApplication("reading file failed", input_file_paths=[path])
+        watcher = FakeFileWatcher([])
+        x = self.new_CligenWatchApplication([app], watcher)
+
+        with self.assertRaises(x.Error) as cm:
+            x.run()
+
+        self.assertEqual("{}".format(cm.exception), "input file not found: {}".format(path))
+        self.assertEqual(watcher.timeouts, [])
+        self.assertTrue(watcher.closed)
+
+    def test_wait_for_changes_Debounced(self):
+        watcher = FakeFileWatcher([{"a"}, {"b"}, {"a", "c"}, set(), {"d"}])
+        x = self.new_CligenWatchApplication([], watcher)
+        self.assertEqual(x.wait_for_changes(watcher), {"a", "b", "c"})
+        self.assertEqual(watcher.timeouts, [None, 0.05, 0.05, 0.05])
+
+    def test_affected_applications(self):
+        app1 = FakeApplication(input_file_paths=["a.xml", "common.txt"])
+        app2 = FakeApplication(input_file_paths=["b.xml", "common.txt"])
+        x = self.new_CligenWatchApplication([app1, app2], FakeFileWatcher([]))
+        self.assertEqual(x.affected_applications({os.path.abspath("b.xml")}), [app2])
+        self.assertEqual(x.affected_applications({os.path.abspath("common.txt")}), [app1, app2])
+        self.assertEqual(x.affected_applications({os.path.abspath("other.txt")}), [])
+
+    @staticmethod
+    def new_CligenWatchApplication(applications, watcher, stderr=None):
+        return CligenWatchApplication(
+            applications,
+            watcher=watcher,
+            stdout=io.StringIO(),
+            stderr=stderr if stderr is not None else io.StringIO(),
+        )
+
+
+class FakeFileWatcher:
+
+    def __init__(self, results):
+        """
+        *results* must be an iterable of the values to return from successive invocations of
+        wait(), or of exceptions to raise from it.
+        """
+        self.results = list(results)
+        self.paths = None
+        self.timeouts = []
+        self.closed = False
+
+    def set_paths(self, paths):
+        self.paths = set(paths)
+
+    def wait(self, timeout=None):
+        self.timeouts.append(timeout)
+        result = self.results.pop(0)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    def close(self):
+        self.closed = True
+
+
+class FakeApplication:
+
+    def __init__(self, error_message=None, input_file_paths=()):
+        self.error_message = error_message
+        self.source_file_path = "cligen.xml"
+        self._input_file_paths = tuple(input_file_paths)
+        self.run_count = 0
+
+    def input_file_paths(self):
+        return self._input_file_paths
+
+    def run(self):
+        self.run_count += 1
+        if self.error_message is not None:
+            raise self.Error(self.error_message)
+
+    class Error(Exception):
+        pass
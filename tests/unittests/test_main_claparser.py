@@ -15,15 +15,21 @@
 
 import io
 import os
+import shutil
 import sys
+import tempfile
 import unittest
+import unittest.mock
 
 import fakeable
 
 import cligen.targets
+from cligen.main_app import CligenMultiTargetApplication
+from cligen.main_app import CligenWatchApplication
 from cligen.main_claparser import ArgumentParser
 from cligen.targets import TargetLanguageBase
 from cligen.targets import TargetRegistry
+from cligen.xml_backend import LxmlXmlBackend
 
 
 class TestArgumentParser(unittest.TestCase):
@@ -163,6 +169,84 @@ class TestArgumentParser_parse_args(fakeable.FakeableCleanupMixin, unittest.Test
             ["-l", "c", "-o", "out1.c", "-o", "out2.c", "-o", "out3.c"],
             message="too many -o/--output-file arguments specified for language C: 3 (expected 2)")
 
+    def test_OutputFiles_BeforeLanguage(self):
+        self.assert_parse_args_succeeds(
+            ["-o", "out.java", "-l", "java"],
+            target_language="java", output_file_paths=["out.java"])
+
+    def test_MultipleLanguages(self):
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["-l", "java", "-l", "c", "-e", "ascii", "--depfile", "out.d", "a.xml"])
+
+        self.assertIsInstance(app, CligenMultiTargetApplication)
+        self.assertEqual(app.depfile_path, "out.d")
+        self.assertIsNone(app.jobs)
+        (app1, app2) = app.applications
+        self.assertIs(app1.target_language, x.targets["java"])
+        self.assertIs(app2.target_language, x.targets["c"])
+        for sub_app in app.applications:
+            self.assertEqual(sub_app.source_file_path, "a.xml")
+            self.assertIsNone(sub_app.output_file_paths)
+            self.assertEqual(sub_app.encoding, "ascii")
+            self.assertIsNone(sub_app.depfile_path)
+
+    def test_MultipleLanguages_OutputFiles(self):
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["-o", "out.java", "-l", "java", "-l", "c", "-o", "out.h", "-o", "out.c"])
+        (app1, app2) = app.applications
+        self.assertEqual(app1.output_file_paths, ("out.java",))
+        self.assertEqual(app2.output_file_paths, ("out.h", "out.c"))
+
+    def test_MultipleLanguages_OutputFilesForSecondLanguageOnly(self):
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["-l", "c", "-l", "java", "-o", "out.java"])
+        (app1, app2) = app.applications
+        self.assertIsNone(app1.output_file_paths)
+        self.assertEqual(app2.output_file_paths, ("out.java",))
+
+    def test_MultipleLanguages_MissingOutputFile(self):
+        self.assert_parse_args_fails(
+            ["-l", "java", "-l", "c", "-o", "out.c"],
+            message="missing -o/--output-file argument for language C to specify the generated source file")
+
+    def test_MultipleLanguages_SameOutputFile(self):
+        self.assert_parse_args_fails(
+            ["-l", "java", "-o", "out.txt", "-l", "c", "-o", "out.h", "-o", "./out.txt", "a.xml"],
+            message="languages Java and C would both write the output file ./out.txt; specify different "
+                    "output files with -o/--output-file")
+
+    def test_MultipleLanguages_SameLanguageTwice(self):
+        self.assert_parse_args_fails(
+            ["-l", "c", "-l", "c", "a.xml"],
+            message="languages C and C would both write the output file cligen.h; specify different "
+                    "output files with -o/--output-file")
+
+    def test_MultipleLanguages_SameLanguageDifferentOutputFiles(self):
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["-l", "java", "-o", "a.java", "-l", "java", "-o", "b.java", "a.xml"])
+        self.assertEqual([x.output_file_paths for x in app.applications], [("a.java",), ("b.java",)])
+
+    def test_Jobs(self):
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["-l", "java", "-l", "c", "-j", "1"])
+        self.assertEqual(app.jobs, 1)
+
+    def test_Jobs_Invalid(self):
+        self.assert_parse_args_fails(
+            ["-l", "c", "--jobs", "0"],
+            message="invalid value specified for -j/--jobs: 0 (must be at least 1)")
+
+    def test_Watch(self):
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["-l", "c", "--watch", "a.xml"])
+        self.assertIsInstance(app, CligenWatchApplication)
+        (sub_app,) = app.applications
+        self.assertIs(sub_app.target_language, x.targets["c"])
+        self.assertEqual(sub_app.source_file_path, "a.xml")
+
+    def test_NoWatch(self):
+        self.assert_parse_args_succeeds(["-l", "c", "--watch", "--no-watch"], target_language="c")
+
     def test_Inline(self):
         self.assert_parse_args_succeeds(
             ["-l", "c", "--inline"],
@@ -242,6 +326,243 @@ class TestArgumentParser_parse_args(fakeable.FakeableCleanupMixin, unittest.Test
         self.assert_parse_args_succeeds(
             ["-l", "c", "--newline", "\\r\\n", "--detect-newline"])
 
+    def test_CacheDir_NotSpecified(self):
+        with unittest.mock.patch.dict(os.environ, clear=True):
+            self.assert_parse_args_succeeds(["-l", "c"], cache_dir=None)
+
+    def test_CacheDir(self):
+        with unittest.mock.patch.dict(os.environ, clear=True):
+            self.assert_parse_args_succeeds(["-l", "c", "--cache-dir", "abc"], cache_dir="abc")
+
+    def test_CacheDir_EnvironmentVariable(self):
+        with unittest.mock.patch.dict(os.environ, {"CLIGEN_CACHE_DIR": "xyz"}):
+            self.assert_parse_args_succeeds(["-l", "c"], cache_dir="xyz")
+
+    def test_CacheDir_OverridesEnvironmentVariable(self):
+        with unittest.mock.patch.dict(os.environ, {"CLIGEN_CACHE_DIR": "xyz"}):
+            self.assert_parse_args_succeeds(["-l", "c", "--cache-dir", "abc"], cache_dir="abc")
+
+    def test_NoCacheDir_AfterCacheDir(self):
+        with unittest.mock.patch.dict(os.environ, clear=True):
+            self.assert_parse_args_succeeds(
+                ["-l", "c", "--cache-dir", "abc", "--no-cache-dir"], cache_dir=None)
+
+    def test_NoCacheDir_EnvironmentVariable(self):
+        with unittest.mock.patch.dict(os.environ, {"CLIGEN_CACHE_DIR": "xyz"}):
+            self.assert_parse_args_succeeds(["-l", "c", "--no-cache-dir"], cache_dir=None)
+
+    def test_Incremental(self):
+        with unittest.mock.patch.dict(os.environ, clear=True):
+            x = ArgumentParser(stdout=io.StringIO())
+            app = x.parse_args(["-l", "c", "--cache-dir", "abc", "--incremental"])
+        self.assertIs(app.incremental, True)
+
+    def test_Incremental_NotSpecified(self):
+        with unittest.mock.patch.dict(os.environ, clear=True):
+            x = ArgumentParser(stdout=io.StringIO())
+            app = x.parse_args(["-l", "c", "--cache-dir", "abc"])
+        self.assertIs(app.incremental, False)
+
+    def test_Incremental_NoIncremental(self):
+        with unittest.mock.patch.dict(os.environ, clear=True):
+            x = ArgumentParser(stdout=io.StringIO())
+            app = x.parse_args(["-l", "c", "--cache-dir", "abc", "--incremental", "--no-incremental"])
+        self.assertIs(app.incremental, False)
+
+    def test_Incremental_CacheDirFromEnvironmentVariable(self):
+        with unittest.mock.patch.dict(os.environ, {"CLIGEN_CACHE_DIR": "xyz"}):
+            x = ArgumentParser(stdout=io.StringIO())
+            app = x.parse_args(["-l", "c", "--incremental"])
+        self.assertIs(app.incremental, True)
+
+    def test_Incremental_NoCacheDir(self):
+        with unittest.mock.patch.dict(os.environ, clear=True):
+            self.assert_parse_args_fails(
+                ["-l", "c", "--incremental"],
+                message="--incremental requires --cache-dir or the CLIGEN_CACHE_DIR environment variable "
+                "to be set")
+
+    def test_Depfile(self):
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["-l", "c", "--depfile", "out.d"])
+        self.assertEqual(app.depfile_path, "out.d")
+
+    def test_Depfile_NotSpecified(self):
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["-l", "c"])
+        self.assertIsNone(app.depfile_path)
+
+    def test_XmlBackend_NotSpecified(self):
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["-l", "c"])
+        self.assertIsNone(app.xml_backend)
+
+    def test_XmlBackend_Etree(self):
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["-l", "c", "--xml-backend", "etree"])
+        self.assertIsNone(app.xml_backend)
+
+    def test_XmlBackend_Lxml(self):
+        try:
+            LxmlXmlBackend()
+        except LxmlXmlBackend.Unavailable as e:
+            self.skipTest("{}".format(e))
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["-l", "c", "--xml-backend", "lxml"])
+        self.assertIsInstance(app.xml_backend, LxmlXmlBackend)
+
+    def test_XmlBackend_LxmlUnavailable(self):
+        error = LxmlXmlBackend.Unavailable("lxml is not installed")
+        with unittest.mock.patch.object(LxmlXmlBackend, "__init__", side_effect=error):
+            self.assert_parse_args_fails(
+                ["-l", "c", "--xml-backend", "lxml"],
+                message="invalid value specified for --xml-backend: lxml (lxml is not installed)")
+
+    def test_Batch_InheritsXmlBackend(self):
+        batch_file_path = self.create_batch_file("a.xml\n")
+        error = LxmlXmlBackend.Unavailable("lxml is not installed")
+        with unittest.mock.patch.object(LxmlXmlBackend, "__init__", side_effect=error):
+            self.assert_parse_args_fails(
+                ["-l", "c", "--xml-backend", "lxml", "--batch", batch_file_path],
+                message="invalid arguments on line 1 of {}: invalid value specified for --xml-backend: "
+                "lxml (lxml is not installed)".format(batch_file_path))
+
+    def test_Batch(self):
+        batch_file_path = self.create_batch_file(
+            "# a comment\n"
+            "\n"
+            "-l java -o out.java a.xml\n"
+            "  -l c \"b c.xml\"  # trailing comment\n"
+        )
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["--batch", batch_file_path])
+
+        self.assertEqual(len(app.applications), 2)
+        (app1, app2) = app.applications
+        self.assertIs(app1.target_language, x.targets["java"])
+        self.assertEqual(app1.source_file_path, "a.xml")
+        self.assertEqual(app1.output_file_paths, ("out.java",))
+        self.assertIs(app2.target_language, x.targets["c"])
+        self.assertEqual(app2.source_file_path, "b c.xml")
+        self.assertIsNone(app2.output_file_paths)
+
+    def test_Batch_InheritsOptions(self):
+        batch_file_path = self.create_batch_file(
+            "a.xml\n"
+            "-l java -e ascii b.xml\n"
+        )
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["-l", "c", "-e", "utf16", "--newline", "\\r", "--batch", batch_file_path])
+
+        (app1, app2) = app.applications
+        self.assertIs(app1.target_language, x.targets["c"])
+        self.assertEqual(app1.encoding, "utf16")
+        self.assertEqual(app1.newline, "\r")
+        self.assertIs(app2.target_language, x.targets["java"])
+        self.assertEqual(app2.encoding, "ascii")
+        self.assertEqual(app2.newline, "\r")
+
+    def test_Batch_MultipleLanguagesInherited(self):
+        batch_file_path = self.create_batch_file(
+            "a.xml\n"
+            "-l java b.xml\n"
+        )
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["-l", "c", "-l", "java", "--batch", batch_file_path])
+
+        (app1, app2) = app.applications
+        self.assertEqual(
+            [a.target_language for a in app1.applications], [x.targets["c"], x.targets["java"]])
+        self.assertIs(app2.target_language, x.targets["java"])
+
+    def test_Batch_Watch(self):
+        batch_file_path = self.create_batch_file("-l c a.xml\n-l java b.xml\n")
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["--batch", batch_file_path, "--watch"])
+        self.assertIsInstance(app, CligenWatchApplication)
+        self.assertEqual([a.source_file_path for a in app.applications], ["a.xml", "b.xml"])
+
+    def test_Batch_WatchOnLine(self):
+        batch_file_path = self.create_batch_file("-l c --watch a.xml\n")
+        self.assert_parse_args_fails(
+            ["--batch", batch_file_path],
+            message="invalid arguments on line 1 of {}: --watch must not be specified in a batch "
+            "file".format(batch_file_path))
+
+    def test_Batch_DefaultSourceFile(self):
+        batch_file_path = self.create_batch_file("-l c\n")
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["--batch", batch_file_path])
+        self.assertEqual(app.applications[0].source_file_path, "cligen.xml")
+
+    def test_Batch_Empty(self):
+        batch_file_path = self.create_batch_file("")
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["--batch", batch_file_path])
+        self.assertEqual(app.applications, ())
+
+    def test_Batch_InvalidArgumentsOnLine(self):
+        batch_file_path = self.create_batch_file("-l c a.xml\n-l invalid b.xml\n")
+        self.assert_parse_args_fails(
+            ["--batch", batch_file_path],
+            message="invalid arguments on line 2 of {}: invalid value specified for -l/--language: "
+            "invalid (valid values are: c, java)".format(batch_file_path))
+
+    def test_Batch_InvalidSyntaxOnLine(self):
+        batch_file_path = self.create_batch_file("-l c \"a.xml\n")
+        self.assert_parse_args_fails(
+            ["--batch", batch_file_path],
+            message="invalid syntax on line 1 of {}: No closing quotation".format(batch_file_path))
+
+    def test_Batch_NestedBatch(self):
+        batch_file_path = self.create_batch_file("-l c --batch other.txt\n")
+        self.assert_parse_args_fails(
+            ["--batch", batch_file_path],
+            message="invalid arguments on line 1 of {}: --batch must not be specified in a batch "
+            "file".format(batch_file_path))
+
+    def test_Batch_WithSourceFile(self):
+        batch_file_path = self.create_batch_file("-l c\n")
+        self.assert_parse_args_fails(
+            ["--batch", batch_file_path, "a.xml"],
+            message="source_file must not be specified when --batch is specified")
+
+    def test_Batch_WithOutputFile(self):
+        batch_file_path = self.create_batch_file("-l c\n")
+        self.assert_parse_args_fails(
+            ["--batch", batch_file_path, "-o", "out.c"],
+            message="-o/--output-file must not be specified when --batch is specified")
+
+    def test_Batch_WithDepfile(self):
+        batch_file_path = self.create_batch_file("-l c\n")
+        self.assert_parse_args_fails(
+            ["--batch", batch_file_path, "--depfile", "out.d"],
+            message="--depfile must not be specified when --batch is specified")
+
+    def test_Batch_DepfileOnLine(self):
+        batch_file_path = self.create_batch_file("-l c --depfile out.d a.xml\n")
+        x = ArgumentParser(stdout=io.StringIO())
+        app = x.parse_args(["--batch", batch_file_path])
+        self.assertEqual(app.applications[0].depfile_path, "out.d")
+
+    def test_Batch_FileNotFound(self):
+        batch_file_path = os.path.join(self.create_temp_dir(), "batch.txt")
+        self.assert_parse_args_fails(
+            ["--batch", batch_file_path],
+            message="reading batch file failed: {} (No such file or directory)".format(batch_file_path),
+            exit_code=1)
+
+    def create_batch_file(self, contents):
+        path = os.path.join(self.create_temp_dir(), "batch.txt")
+        with open(path, "wt", encoding="utf8") as f:
+            f.write(contents)
+        return path
+
+    def create_temp_dir(self):
+        path = tempfile.mkdtemp("TestArgumentParser_parse_args")
+        self.addCleanup(shutil.rmtree, path)
+        return path
+
     def test_SampleXml(self):
         stdout = io.StringIO()
         self.assert_parse_args_fails(["--sample-xml"], message=None, exit_code=0, stdout=stdout)
@@ -275,6 +596,7 @@ class TestArgumentParser_parse_args(fakeable.FakeableCleanupMixin, unittest.Test
             inline=DEFAULT_VALUE,
             encoding=DEFAULT_VALUE,
             newline=DEFAULT_VALUE,
+            cache_dir=DEFAULT_VALUE,
     ):
         stdout = io.StringIO()
         x = ArgumentParser(stdout=stdout)
@@ -309,6 +631,8 @@ class TestArgumentParser_parse_args(fakeable.FakeableCleanupMixin, unittest.Test
         self.assertIs(app.inline, inline)
         self.assertIs(app.encoding, encoding)
         self.assertEqual(app.newline, newline)
+        if cache_dir is not self.DEFAULT_VALUE:
+            self.assertEqual(app.cache_dir, cache_dir)
 
 
 class TestArgumentParser_Error(unittest.TestCase):
@@ -350,6 +674,9 @@ class FakeTargets(dict):
         for fake_language in self.fake_languages():
             self[fake_language.key] = fake_language
 
+    def loaded_keys(self):
+        return list(self)
+
     def fake_languages(self):
         yield TargetLanguageBase(key="c", name="C", output_files=(
             TargetLanguageBase.OutputFileInfo(name="header file", default_value="cligen.h"),
@@ -0,0 +1,184 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import marshal
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import unittest.mock
+
+import cligen
+import cligen.runtime
+from cligen.runtime import ParserLoader
+from cligen.target_python import PythonTargetLanguage
+
+
+class TestParserLoader(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.dir_path = os.path.realpath(tempfile.mkdtemp("TestParserLoader"))
+        self.addCleanup(shutil.rmtree, self.dir_path)
+        self.spec_path = os.path.join(self.dir_path, "cligen.xml")
+        self.write_spec(self.spec_path, "<argument><key>-i</key><key>--input-file</key></argument>")
+
+    def test_load_parser(self):
+        parser_class = ParserLoader().load_parser(self.spec_path)
+        parsed_args = parser_class().parse(["-i", "in.txt"])
+        self.assertEqual(parsed_args.inputfile, "in.txt")
+
+    def test_load_parser_Help(self):
+        stdout = io.StringIO()
+        parser_class = ParserLoader().load_parser(self.spec_path)
+        with self.assertRaises(parser_class.ExitApplicationSuccessfully):
+            parser_class(stdout=stdout).parse(["--help"], no_exit=True)
+        self.assertIn("--input-file", stdout.getvalue())
+
+    def test_load_parser_CacheFileWritten(self):
+        ParserLoader().load_parser(self.spec_path)
+        self.assertEqual(os.listdir(os.path.join(self.dir_path, "__pycache__")), [
+            "cligen.xml.cligen.{}.pyc".format(sys.implementation.cache_tag)])
+
+    def test_load_parser_Cached_NotGenerated(self):
+        ParserLoader().load_parser(self.spec_path)
+        x = ParserLoader()
+        with unittest.mock.patch.object(x, "_generate_code") as generate_code:
+            parser_class = x.load_parser(self.spec_path)
+        self.assertFalse(generate_code.called)
+        self.assertEqual(parser_class().parse(["--input-file", "a"]).inputfile, "a")
+
+    def test_load_parser_cache_dir(self):
+        cache_dir = os.path.join(self.dir_path, "cache")
+        ParserLoader().load_parser(self.spec_path, cache_dir=cache_dir)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dir_path, "__pycache__")))
+
+    def test_load_parser_SpecModified(self):
+        ParserLoader().load_parser(self.spec_path)
+        self.write_spec(self.spec_path, "<argument><key>-o</key></argument>", mtime=1)
+        parser_class = ParserLoader().load_parser(self.spec_path)
+        self.assertEqual(parser_class().parse(["-o", "out.txt"]).o, "out.txt")
+
+    def test_load_parser_IncludedFileModified(self):
+        included_file_path = os.path.join(self.dir_path, "common.xml")
+        self.write_spec(included_file_path, "<argument><key>-v</key></argument>")
+        self.write_spec(self.spec_path, "<include href=\"common.xml\"/>")
+        ParserLoader().load_parser(self.spec_path)
+        self.write_spec(included_file_path, "<argument><key>-q</key></argument>", mtime=1)
+        parser_class = ParserLoader().load_parser(self.spec_path)
+        self.assertEqual(parser_class().parse(["-q", "1"]).q, "1")
+
+    def test_load_parser_TargetLanguageFileModified(self):
+        template_path = os.path.join(self.dir_path, "template.py")
+        with open(template_path, "wb"):
+            pass
+        os.utime(template_path, ns=(0, 0))
+        with unittest.mock.patch.object(PythonTargetLanguage, "dependency_paths", return_value=[template_path]):
+            ParserLoader().load_parser(self.spec_path)
+            os.utime(template_path, ns=(1000000000, 1000000000))
+            x = ParserLoader()
+            with unittest.mock.patch.object(x, "_generate_code", wraps=x._generate_code) as generate_code:
+                x.load_parser(self.spec_path)
+        self.assertTrue(generate_code.called)
+
+    def test_load_parser_TargetLanguageFilesRecorded(self):
+        ParserLoader().load_parser(self.spec_path)
+        (cache_file_name,) = os.listdir(os.path.join(self.dir_path, "__pycache__"))
+        with open(os.path.join(self.dir_path, "__pycache__", cache_file_name), "rb") as f:
+            (header, file_states, code) = marshal.load(f)
+        file_paths = [file_path for (file_path, file_state) in file_states]
+        self.assertEqual(file_paths, [self.spec_path] + list(PythonTargetLanguage().dependency_paths()))
+
+    def test_load_parser_CorruptCacheFile(self):
+        ParserLoader().load_parser(self.spec_path)
+        (cache_file_name,) = os.listdir(os.path.join(self.dir_path, "__pycache__"))
+        with open(os.path.join(self.dir_path, "__pycache__", cache_file_name), "wb") as f:
+            f.write(b"\xff\x00")
+        parser_class = ParserLoader().load_parser(self.spec_path)
+        self.assertEqual(parser_class().parse(["-i", "a"]).inputfile, "a")
+
+    def test_load_parser_CacheDirCannotBeCreated(self):
+        cache_dir = os.path.join(self.dir_path, "cache")
+        with open(cache_dir, "wb"):
+            pass
+        parser_class = ParserLoader().load_parser(self.spec_path, cache_dir=cache_dir)
+        self.assertEqual(parser_class().parse(["-i", "a"]).inputfile, "a")
+
+    def test_load_parser_SpecNotFound(self):
+        os.unlink(self.spec_path)
+        x = ParserLoader()
+        with self.assertRaises(x.Error) as cm:
+            x.load_parser(self.spec_path)
+        self.assertEqual("{}".format(cm.exception), "reading file failed: {} (No such file or directory)".format(
+            self.spec_path))
+
+    def test_load_parser_InvalidXml(self):
+        with open(self.spec_path, "wb") as f:
+            f.write(b"<unclosed")
+        x = ParserLoader()
+        with self.assertRaises(x.Error) as cm:
+            x.load_parser(self.spec_path)
+        self.assertEqual("{}".format(cm.exception), "parsing file failed: {} (unclosed token: line 1, column 0)".format(
+            self.spec_path))
+
+    def test_load_parser_InvalidSpec(self):
+        self.write_spec(
+            self.spec_path, "<argument><key>--out-file</key></argument><argument><key>--outfile</key></argument>")
+        x = ParserLoader()
+        with self.assertRaises(x.Error) as cm:
+            x.load_parser(self.spec_path)
+        self.assertTrue("{}".format(cm.exception).startswith("invalid specification file: "))
+
+    def test_load_parser_ReservedVariableName(self):
+        self.write_spec(self.spec_path, "<argument><key>--print</key></argument>")
+        x = ParserLoader()
+        with self.assertRaises(x.Error) as cm:
+            x.load_parser(self.spec_path)
+        self.assertEqual("{}".format(cm.exception), "invalid specification file: {} (variable name of argument "
+                         "--print is reserved for use by the generated code: print)".format(self.spec_path))
+
+    def test_load_parser_Cached_FewModulesImported(self):
+        ParserLoader().load_parser(self.spec_path)
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.path.dirname(os.path.dirname(os.path.abspath(cligen.__file__)))
+        process = subprocess.Popen(
+            [sys.executable, "-c", "import sys, cligen.runtime; cligen.runtime.load_parser(sys.argv[1]); "
+                "print(\"\\n\".join(sys.modules))", self.spec_path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            universal_newlines=True,
+        )
+        (stdout, stderr) = process.communicate()
+        self.assertEqual(process.returncode, 0, stderr)
+        imported_modules = set(stdout.splitlines())
+        for module_name in ("jinja2", "hashlib", "cligen.argspec_xml_parser", "cligen.target_python"):
+            self.assertNotIn(module_name, imported_modules)
+
+    def test_module_load_parser(self):
+        parser_class = cligen.runtime.load_parser(self.spec_path)
+        self.assertEqual(parser_class().parse(["-i", "a"]).inputfile, "a")
+
+    @staticmethod
+    def write_spec(path, contents, mtime=0):
+        with open(path, "wt", encoding="utf8") as f:
+            f.write("<cligen xmlns=\"http://schemas.cligen.io/arguments\">{}</cligen>".format(contents))
+        # set the modification time explicitly so that modifications are detectable regardless of the
+        # resolution of the file system's timestamps
+        os.utime(path, ns=(mtime * 1000000000, mtime * 1000000000))
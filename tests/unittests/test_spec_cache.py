@@ -0,0 +1,160 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from cligen.argspec import ArgumentParserSpec
+from cligen.spec_cache import SpecCache
+
+
+class TestSpecCache(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.dir_path = tempfile.mkdtemp("TestSpecCache")
+        self.addCleanup(shutil.rmtree, self.dir_path)
+        self.cache_dir = os.path.join(self.dir_path, "specs")
+
+    def test_key_SameBytes(self):
+        x = SpecCache(self.cache_dir, "1")
+        self.assertEqual(x.key(b"abc"), x.key(b"abc"))
+
+    def test_key_DifferentBytes(self):
+        x = SpecCache(self.cache_dir, "1")
+        self.assertNotEqual(x.key(b"abc"), x.key(b"abd"))
+
+    def test_key_DifferentParserVersions(self):
+        x1 = SpecCache(self.cache_dir, "1")
+        x2 = SpecCache(self.cache_dir, "2")
+        self.assertNotEqual(x1.key(b"abc"), x2.key(b"abc"))
+
+    def test_key_DifferentBaseDirs(self):
+        x = SpecCache(self.cache_dir, "1")
+        self.assertNotEqual(x.key(b"abc", "/dir1"), x.key(b"abc", "/dir2"))
+
+    def test_load_Miss(self):
+        x = SpecCache(self.cache_dir, "1")
+        self.assertIsNone(x.load(x.key(b"abc")))
+
+    def test_load_Hit(self):
+        x = SpecCache(self.cache_dir, "1")
+        argspec = self.sample_argspec()
+        x.store(x.key(b"abc"), argspec)
+
+        actual = x.load(x.key(b"abc"))
+
+        self.assertEqual(actual, argspec)
+        self.assertIs(actual.help_argument, actual.arguments[1])
+
+    def test_load_NoHelpArgument(self):
+        x = SpecCache(self.cache_dir, "1")
+        argspec = ArgumentParserSpec(arguments=self.sample_argspec().arguments, help_argument=None)
+        x.store(x.key(b"abc"), argspec)
+        self.assertEqual(x.load(x.key(b"abc")), argspec)
+
+    def test_load_response_files(self):
+        x = SpecCache(self.cache_dir, "1")
+        argspec = ArgumentParserSpec(arguments=self.sample_argspec().arguments, help_argument=None,
+                                     response_files=True)
+        x.store(x.key(b"abc"), argspec)
+        self.assertIs(x.load(x.key(b"abc")).response_files, True)
+
+    def test_load_CorruptEntry(self):
+        x = SpecCache(self.cache_dir, "1")
+        key = x.key(b"abc")
+        x.store(key, self.sample_argspec())
+        with open(os.path.join(self.cache_dir, "{}.json".format(key)), "wb") as f:
+            f.write(b"{\"arguments\": [[")
+        self.assertIsNone(x.load(key))
+
+    def test_load_entry_IncludedFiles(self):
+        x = SpecCache(self.cache_dir, "1")
+        included_file_path = self.write_included_file(b"abc")
+        argspec = self.sample_argspec()
+        x.store(x.key(b"abc"), argspec, [included_file_path])
+        self.assertEqual(x.load_entry(x.key(b"abc")), (argspec, (included_file_path,)))
+
+    def test_load_entry_IncludedFileModified(self):
+        x = SpecCache(self.cache_dir, "1")
+        included_file_path = self.write_included_file(b"abc")
+        x.store(x.key(b"abc"), self.sample_argspec(), [included_file_path])
+        self.write_included_file(b"abd")
+        self.assertIsNone(x.load_entry(x.key(b"abc")))
+        self.assertIsNone(x.load(x.key(b"abc")))
+
+    def test_load_entry_IncludedFileDeleted(self):
+        x = SpecCache(self.cache_dir, "1")
+        included_file_path = self.write_included_file(b"abc")
+        x.store(x.key(b"abc"), self.sample_argspec(), [included_file_path])
+        os.unlink(included_file_path)
+        self.assertIsNone(x.load_entry(x.key(b"abc")))
+
+    def test_store_IncludedFileNotFound(self):
+        x = SpecCache(self.cache_dir, "1")
+        x.store(x.key(b"abc"), self.sample_argspec(), [os.path.join(self.dir_path, "missing.xml")])
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_store_DirectoryCannotBeCreated(self):
+        with open(self.cache_dir, "wb"):
+            pass
+        x = SpecCache(self.cache_dir, "1")
+        x.store(x.key(b"abc"), self.sample_argspec())
+        self.assertIsNone(x.load(x.key(b"abc")))
+
+    def test_store_LeastRecentlyUsedEvicted(self):
+        x = SpecCache(self.cache_dir, "1")
+        argspec = self.sample_argspec()
+        keys = [x.key("{}".format(i).encode("utf8")) for i in range(3)]
+        for (i, key) in enumerate(keys):
+            x.store(key, argspec)
+            self.set_entry_mtime(key, i)
+        entry_size = os.path.getsize(os.path.join(self.cache_dir, "{}.json".format(keys[0])))
+
+        # use the oldest entry, making the second oldest the least recently used one
+        x.load(keys[0])
+        x.max_size = entry_size * 3
+        x.store(x.key(b"new"), argspec)
+
+        self.assertIsNotNone(x.load(keys[0]))
+        self.assertIsNone(x.load(keys[1]))
+        self.assertIsNotNone(x.load(keys[2]))
+        self.assertIsNotNone(x.load(x.key(b"new")))
+
+    def write_included_file(self, contents):
+        path = os.path.join(self.dir_path, "common.xml")
+        with open(path, "wb") as f:
+            f.write(contents)
+        return path
+
+    def set_entry_mtime(self, key, seconds):
+        path = os.path.join(self.cache_dir, "{}.json".format(key))
+        os.utime(path, ns=(seconds * 1000000000, seconds * 1000000000))
+
+    @staticmethod
+    def sample_argspec():
+        arg1 = ArgumentParserSpec.Argument(
+            keys=("-i", "--input-file"),
+            type=ArgumentParserSpec.Argument.TYPE_STRING_VALUE,
+            help_text="the file to read",
+        )
+        arg2 = ArgumentParserSpec.Argument(
+            keys=("-h", "--help"),
+            type=ArgumentParserSpec.Argument.TYPE_BUILTIN_HELP,
+            help_text=None,
+        )
+        return ArgumentParserSpec(arguments=(arg1, arg2), help_argument=arg2)
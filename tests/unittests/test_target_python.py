@@ -0,0 +1,534 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+
+from cligen.argspec import ArgumentParserSpec
+from cligen.target_python import PythonFastTargetLanguage
+from cligen.target_python import PythonTargetLanguage
+
+
+class TestPythonTargetLanguage_string_literal_lines(unittest.TestCase):
+
+    def test_Empty(self):
+        self.assertEqual(PythonTargetLanguage().string_literal_lines(""), ["\"\""])
+
+    def test_Lines(self):
+        actual = PythonTargetLanguage().string_literal_lines("a\nb \"c\" \\\n\u00e9")
+        self.assertEqual(actual, ["\"a\\n\"", "\"b \\\"c\\\" \\\\\\n\"", "\"\\xe9\""])
+
+    def test_RoundTrip(self):
+        text = "".join(chr(i) for i in range(0x250)) + "\u4e2d\U0001f600\n\n"
+        literals = PythonTargetLanguage().string_literal_lines(text)
+        self.assertTrue(all(all(" " <= c <= "~" for c in x) for x in literals))
+        self.assertEqual(eval("".join(literals)), text)
+
+
+class TestPythonTargetLanguage_GeneratedParser(unittest.TestCase):
+    """
+    Tests the behavior of the argument parsers generated by PythonTargetLanguage.
+    """
+
+    TARGET_LANGUAGE = PythonTargetLanguage
+
+    def test_parse_NoArgs(self):
+        parsed_args = self.parse([])
+        self.assertIsNone(parsed_args.inputfile)
+        self.assertIsNone(parsed_args.outputfile)
+
+    def test_parse_ShortAndLongKeys(self):
+        parsed_args = self.parse(["-i", "in.txt", "--output-file", "out.txt"])
+        self.assertEqual(parsed_args.inputfile, "in.txt")
+        self.assertEqual(parsed_args.outputfile, "out.txt")
+
+    def test_parse_LastValueWins(self):
+        parsed_args = self.parse(["-i", "a.txt", "--input-file", "b.txt"])
+        self.assertEqual(parsed_args.inputfile, "b.txt")
+
+    def test_parse_ValueStartingWithDash(self):
+        parsed_args = self.parse(["-i", "-o"])
+        self.assertEqual(parsed_args.inputfile, "-o")
+        self.assertIsNone(parsed_args.outputfile)
+
+    def test_parse_UnknownArgument(self):
+        parser_class = self.new_ArgumentParser()
+        with self.assertRaises(parser_class.UnknownArgument) as cm:
+            self.parse(["-i", "in.txt", "--bogus"], parser_class=parser_class)
+        self.assertEqual("{}".format(cm.exception), "unknown argument: --bogus")
+
+    def test_parse_ArgumentValueMissing(self):
+        parser_class = self.new_ArgumentParser()
+        with self.assertRaises(parser_class.ArgumentValueMissing) as cm:
+            self.parse(["--output-file"], parser_class=parser_class)
+        self.assertEqual("{}".format(cm.exception), "--output-file must be followed by a value")
+
+    def test_parse_UnexpectedArgument(self):
+        parser_class = self.new_ArgumentParser()
+        with self.assertRaises(parser_class.UnexpectedArgument) as cm:
+            self.parse(["hello"], parser_class=parser_class)
+        self.assertEqual("{}".format(cm.exception), "unexpected argument: hello")
+
+    def test_parse_Help(self):
+        parser_class = self.new_ArgumentParser()
+        stdout = io.StringIO()
+        with self.assertRaises(parser_class.ExitApplicationSuccessfully):
+            parser_class(stdout=stdout).parse(["-i", "in.txt", "--help", "--bogus"], no_exit=True)
+        self.assertIn("--input-file", stdout.getvalue())
+
+    def test_parse_DuplicateKey_FirstArgumentWins(self):
+        builder = ArgumentParserSpec.Builder()
+        builder.add_argument(keys=["-a", "--alpha"])
+        builder.add_argument(keys=["--beta", "-a"])
+        parsed_args = self.parse(["-a", "1", "--beta", "2"], argspec=builder.build())
+        self.assertEqual(parsed_args.alpha, "1")
+        self.assertEqual(parsed_args.beta, "2")
+
+    def test_parse_ManyArguments(self):
+        builder = ArgumentParserSpec.Builder()
+        for i in range(300):
+            builder.add_argument(keys=["-a{}".format(i), "--argument-{}".format(i)])
+        parsed_args = self.parse(["--argument-299", "x", "-a0", "y", "-a150", "z"], argspec=builder.build())
+        self.assertEqual(parsed_args.argument299, "x")
+        self.assertEqual(parsed_args.argument0, "y")
+        self.assertEqual(parsed_args.argument150, "z")
+        self.assertIsNone(parsed_args.argument1)
+
+    def test_print_help(self):
+        parser_class = self.new_ArgumentParser()
+        stdout = io.StringIO()
+        parser_class(stdout=stdout).print_help()
+        self.assertEqual(stdout.getvalue(), self.EXPECTED_HELP_TEXT)
+
+    def test_get_help_lines(self):
+        parser_class = self.new_ArgumentParser()
+        self.assertEqual(list(parser_class.get_help_lines()), self.EXPECTED_HELP_TEXT.splitlines())
+
+    def test_print_help_SpecialCharacters(self):
+        help_text = "Quotes \"'\"\"\" and \\ backslashes \\n, \u00e9\u4e2d\U0001f600\x7f\t tabs"
+        builder = ArgumentParserSpec.Builder()
+        builder.add_argument(keys=["--\"quoted\"", "--\u00e9"], help_text=help_text)
+        parser_class = self.new_ArgumentParser(builder.build())
+        self.assertEqual(parser_class.get_help_text(), (
+            "The following command-line arguments are recognized:\n"
+            "\n"
+            "--\"quoted\"\n"
+            "--\u00e9\n"
+            "    {}\n"
+        ).format(help_text))
+        parsed_args = self.parse(["--\u00e9", "x"], parser_class=parser_class)
+        stdout = io.StringIO()
+        parsed_args.print(stdout)
+        self.assertEqual(stdout.getvalue(), "--\"quoted\" x\n")
+
+    def test_print_help_LargeHelpText_Compressed(self):
+        builder = ArgumentParserSpec.Builder()
+        for i in range(100):
+            builder.add_argument(keys=["--argument-{}".format(i)], help_text="The argument number {}".format(i))
+        argspec = builder.build()
+        (source,) = self.TARGET_LANGUAGE().generate_to_strings(argspec, newline="\n")
+        self.assertIn("_HELP_TEXT_COMPRESSED", source)
+        self.assertNotIn("The argument number 42", source)
+
+        parser_class = self.new_ArgumentParser(argspec)
+        stdout = io.StringIO()
+        parser_class(stdout=stdout).print_help()
+        self.assertEqual(stdout.getvalue(), "The following command-line arguments are recognized:\n{}".format(
+            "".join("\n--argument-{0}\n    The argument number {0}\n".format(i) for i in range(100))))
+        self.assertEqual(len(list(parser_class.get_help_lines())), 301)
+
+    def test_print_help_SmallHelpText_NotCompressed(self):
+        (source,) = self.TARGET_LANGUAGE().generate_to_strings(self.new_ArgumentParserSpec(), newline="\n")
+        self.assertNotIn("_HELP_TEXT_COMPRESSED", source)
+        self.assertIn("\"--input-file\\n\"", source)
+
+    def parse(self, args, parser_class=None, argspec=None):
+        if parser_class is None:
+            parser_class = self.new_ArgumentParser(argspec)
+        return parser_class(stdout=io.StringIO(), stderr=io.StringIO()).parse(args, no_exit=True)
+
+    @classmethod
+    def new_ArgumentParser(cls, argspec=None):
+        """
+        Generates the Python code of an argument parser for the given ArgumentParserSpec and
+        returns its ArgumentParser class.  If *argspec* is None then one with an input file,
+        output file and help argument is used.
+        """
+        if argspec is None:
+            argspec = TestPythonTargetLanguage_GeneratedParser.new_ArgumentParserSpec()
+        (source,) = cls.TARGET_LANGUAGE().generate_to_strings(argspec, newline="\n")
+        namespace = {"__name__": "cligen_generated_parser"}
+        exec(compile(source, "<generated>", "exec"), namespace)
+        return namespace["ArgumentParser"]
+
+    @staticmethod
+    def new_ArgumentParserSpec():
+        builder = ArgumentParserSpec.Builder()
+        builder.add_argument(keys=["-i", "--input-file"], help_text="The file from which to read")
+        builder.add_argument(keys=["-o", "--output-file"], help_text="The file to which to write")
+        builder.add_help_argument()
+        return builder.build()
+
+    EXPECTED_HELP_TEXT = (
+        "The following command-line arguments are recognized:\n"
+        "\n"
+        "-i\n"
+        "--input-file\n"
+        "    The file from which to read\n"
+        "\n"
+        "-o\n"
+        "--output-file\n"
+        "    The file to which to write\n"
+        "\n"
+        "-h\n"
+        "--help\n"
+        "    Print the help information then exit\n"
+    )
+
+
+class TestPythonFastTargetLanguage_GeneratedParser(TestPythonTargetLanguage_GeneratedParser):
+    """
+    Tests the behavior of the argument parsers generated by PythonFastTargetLanguage, which must be
+    the same as that of those generated by PythonTargetLanguage, plus its differences.
+    """
+
+    TARGET_LANGUAGE = PythonFastTargetLanguage
+
+    def test_key(self):
+        self.assertEqual(PythonFastTargetLanguage().key, "python-fast")
+
+    def test_ParsedArguments_Slots(self):
+        parsed_args = self.parse(["-i", "in.txt"])
+        self.assertFalse(hasattr(parsed_args, "__dict__"))
+        with self.assertRaises(AttributeError):
+            parsed_args.bogus = 1
+        with self.assertRaises(AttributeError):
+            parsed_args.bogus
+
+    def test_ParsedArguments_SetDefaultValue(self):
+        parsed_args = self.parse([])
+        self.assertIsNone(parsed_args.outputfile)
+        parsed_args.outputfile = "out.txt"
+        self.assertEqual(parsed_args.outputfile, "out.txt")
+        del parsed_args.outputfile
+        self.assertIsNone(parsed_args.outputfile)
+
+    def test_ParsedArguments_print(self):
+        parsed_args = self.parse(["-o", "out.txt"])
+        stdout = io.StringIO()
+        parsed_args.print(stdout)
+        self.assertEqual(stdout.getvalue(), "--input-file [not set]\n--output-file out.txt\n")
+
+    def test_parse_NoArgumentIterator(self):
+        parser_class = self.new_ArgumentParser()
+        self.assertFalse(hasattr(parser_class, "_ArgumentIterator"))
+
+
+class TestPythonTargetLanguage_ResponseFiles(unittest.TestCase):
+    """
+    Tests the expansion of response files by the argument parsers generated by PythonTargetLanguage
+    from specifications that enable them.
+    """
+
+    TARGET_LANGUAGE = PythonTargetLanguage
+
+    def setUp(self):
+        super().setUp()
+        self.dir_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir_path)
+        self.parser_class = self.new_ArgumentParser()
+
+    def test_Expanded(self):
+        path = self.write_response_file("rsp", b"-i in.txt\n  --output-file\tout.txt\n")
+        parsed_args = self.parse(["@" + path])
+        self.assertEqual(parsed_args.inputfile, "in.txt")
+        self.assertEqual(parsed_args.outputfile, "out.txt")
+
+    def test_MixedWithCommandLineArguments(self):
+        path = self.write_response_file("rsp", b"in2.txt -o out.txt")
+        parsed_args = self.parse(["-i", "in1.txt", "-i", "@" + path, "-o", "out2.txt"])
+        self.assertEqual(parsed_args.inputfile, "in2.txt")
+        self.assertEqual(parsed_args.outputfile, "out2.txt")
+
+    def test_Quoting(self):
+        path = self.write_response_file("rsp", (
+            b"-i 'a b\"c\\'  -o \"d e\\\"f\\\\g'h\"i\\ j"
+        ))
+        parsed_args = self.parse(["@" + path])
+        self.assertEqual(parsed_args.inputfile, "a b\"c\\")
+        self.assertEqual(parsed_args.outputfile, "d e\"f\\g'hi j")
+
+    def test_Quoting_Empty(self):
+        path = self.write_response_file("rsp", b"-i '' -o \"\"")
+        parsed_args = self.parse(["@" + path])
+        self.assertEqual(parsed_args.inputfile, "")
+        self.assertEqual(parsed_args.outputfile, "")
+
+    def test_Quoting_Unterminated(self):
+        path = self.write_response_file("rsp", b"-i \"a b\n")
+        parsed_args = self.parse(["@" + path])
+        self.assertEqual(parsed_args.inputfile, "a b\n")
+
+    def test_NonAscii(self):
+        path = self.write_response_file("rsp", "-i \u00e9\u4e2d".encode("utf8"))
+        self.assertEqual(self.parse(["@" + path]).inputfile, "\u00e9\u4e2d")
+
+    def test_EmptyFile(self):
+        path = self.write_response_file("rsp", b"")
+        parsed_args = self.parse(["@" + path, "-i", "in.txt"])
+        self.assertEqual(parsed_args.inputfile, "in.txt")
+
+    def test_AtSignAlone_NotExpanded(self):
+        self.assertEqual(self.parse(["-i", "@"]).inputfile, "@")
+
+    def test_Nested(self):
+        path2 = self.write_response_file("rsp2", b"-o out.txt")
+        path1 = self.write_response_file("rsp1", "-i in.txt @{}".format(path2).encode("utf8"))
+        parsed_args = self.parse(["@" + path1])
+        self.assertEqual(parsed_args.inputfile, "in.txt")
+        self.assertEqual(parsed_args.outputfile, "out.txt")
+
+    def test_Nested_SameFileTwice(self):
+        path2 = self.write_response_file("rsp2", b"-o out.txt")
+        path1 = self.write_response_file("rsp1", "@{0} @{0}".format(path2).encode("utf8"))
+        self.assertEqual(self.parse(["@" + path1]).outputfile, "out.txt")
+
+    def test_Cycle(self):
+        path1 = os.path.join(self.dir_path, "rsp1")
+        path2 = self.write_response_file("rsp2", "-o out.txt @{}".format(path1).encode("utf8"))
+        self.write_response_file("rsp1", "-i in.txt @{}".format(path2).encode("utf8"))
+        with self.assertRaises(self.parser_class.ResponseFileError) as cm:
+            self.parse(["@" + path1])
+        self.assertEqual("{}".format(cm.exception), "response file includes itself: {}".format(path1))
+
+    def test_FileNotFound(self):
+        path = os.path.join(self.dir_path, "does_not_exist")
+        with self.assertRaises(self.parser_class.ResponseFileError) as cm:
+            self.parse(["@" + path])
+        self.assertEqual("{}".format(cm.exception), "unable to read response file: {} ({})".format(
+            path, os.strerror(2)))
+        self.assertIsInstance(cm.exception, self.parser_class.InvalidCommandLineArguments)
+
+    def test_InvalidUtf8(self):
+        path = self.write_response_file("rsp", b"-i \xff")
+        with self.assertRaises(self.parser_class.ResponseFileError) as cm:
+            self.parse(["@" + path])
+        self.assertIn("unable to decode response file: {}".format(path), "{}".format(cm.exception))
+
+    def test_ArgumentValueMissing(self):
+        path = self.write_response_file("rsp", b"-i")
+        with self.assertRaises(self.parser_class.ArgumentValueMissing):
+            self.parse(["@" + path])
+
+    def test_MemoryMapped(self):
+        self.parser_class.RESPONSE_FILE_MMAP_SIZE = 1
+        path = self.write_response_file("rsp", b"-i in.txt -o 'out file.txt'")
+        parsed_args = self.parse(["@" + path])
+        self.assertEqual(parsed_args.inputfile, "in.txt")
+        self.assertEqual(parsed_args.outputfile, "out file.txt")
+
+    def test_LargeFile_Streamed(self):
+        self.parser_class.RESPONSE_FILE_MMAP_SIZE = 1
+        path = os.path.join(self.dir_path, "rsp")
+        with open(path, "wb") as f:
+            for i in range(20000):
+                f.write("-i /a/directory/with/a/long/name/file{}.txt\n".format(i).encode("ascii"))
+
+        tracemalloc.start()
+        try:
+            parsed_args = self.parse(["@" + path])
+            (_, peak_memory) = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(parsed_args.inputfile, "/a/directory/with/a/long/name/file19999.txt")
+        self.assertLess(peak_memory, 256 * 1024)
+
+    def test_Disabled(self):
+        path = self.write_response_file("rsp", b"-i in.txt")
+        parser_class = TestPythonTargetLanguage_GeneratedParser.new_ArgumentParser()
+        with self.assertRaises(parser_class.UnexpectedArgument):
+            parser_class(stdout=io.StringIO()).parse(["@" + path], no_exit=True)
+
+    def test_Help(self):
+        self.assertIn("\n@path\n", self.parser_class.get_help_text())
+
+    def parse(self, args):
+        parser = self.parser_class(stdout=io.StringIO(), stderr=io.StringIO())
+        return parser.parse(args, no_exit=True)
+
+    def write_response_file(self, name, data):
+        path = os.path.join(self.dir_path, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def new_ArgumentParser(self):
+        argspec = TestPythonTargetLanguage_GeneratedParser.new_ArgumentParserSpec()
+        argspec = ArgumentParserSpec(argspec.arguments, argspec.help_argument, response_files=True)
+        (source,) = self.TARGET_LANGUAGE().generate_to_strings(argspec, newline="\n")
+        namespace = {"__name__": "cligen_generated_parser"}
+        exec(compile(source, "<generated>", "exec"), namespace)
+        return namespace["ArgumentParser"]
+
+
+class TestPythonFastTargetLanguage_ResponseFiles(TestPythonTargetLanguage_ResponseFiles):
+    """
+    Tests the expansion of response files by the argument parsers generated by
+    PythonFastTargetLanguage from specifications that enable them.
+    """
+
+    TARGET_LANGUAGE = PythonFastTargetLanguage
+
+
+class TestPythonTargetLanguage_ListArguments(unittest.TestCase):
+    """
+    Tests the parsing of repeatable and positional arguments by the argument parsers generated by
+    PythonTargetLanguage.
+    """
+
+    TARGET_LANGUAGE = PythonTargetLanguage
+
+    def test_NoArgs(self):
+        parsed_args = self.parse([])
+        self.assertIsNone(parsed_args.outputfile)
+        self.assertEqual(parsed_args.define, [])
+        self.assertEqual(parsed_args.files, [])
+
+    def test_Repeatable(self):
+        parsed_args = self.parse(["-D", "a=1", "-o", "out.txt", "--define", "b=2", "-D", "a=1"])
+        self.assertEqual(parsed_args.define, ["a=1", "b=2", "a=1"])
+        self.assertEqual(parsed_args.outputfile, "out.txt")
+
+    def test_Repeatable_ArgumentValueMissing(self):
+        parser_class = self.new_ArgumentParser()
+        with self.assertRaises(parser_class.ArgumentValueMissing) as cm:
+            self.parse(["-D", "a=1", "--define"], parser_class=parser_class)
+        self.assertEqual("{}".format(cm.exception), "--define must be followed by a value")
+
+    def test_Positional(self):
+        parsed_args = self.parse(["a.txt", "-o", "out.txt", "b.txt", "-", "c.txt"])
+        self.assertEqual(parsed_args.files, ["a.txt", "b.txt", "-", "c.txt"])
+        self.assertEqual(parsed_args.outputfile, "out.txt")
+
+    def test_Positional_KeyNotRecognized(self):
+        parsed_args = self.parse(["files", "x"])
+        self.assertEqual(parsed_args.files, ["files", "x"])
+
+    def test_Positional_UnknownArgument(self):
+        parser_class = self.new_ArgumentParser()
+        with self.assertRaises(parser_class.UnknownArgument) as cm:
+            self.parse(["a.txt", "--bogus"], parser_class=parser_class)
+        self.assertEqual("{}".format(cm.exception), "unknown argument: --bogus")
+
+    def test_EndOfOptions(self):
+        parsed_args = self.parse(["a.txt", "-D", "x", "--", "-o", "out.txt", "--", "--help", "b.txt"])
+        self.assertEqual(parsed_args.files, ["a.txt", "-o", "out.txt", "--", "--help", "b.txt"])
+        self.assertEqual(parsed_args.define, ["x"])
+        self.assertIsNone(parsed_args.outputfile)
+
+    def test_EndOfOptions_Last(self):
+        parsed_args = self.parse(["a.txt", "--"])
+        self.assertEqual(parsed_args.files, ["a.txt"])
+
+    def test_EndOfOptions_Tuple(self):
+        parsed_args = self.parse(("--", "a.txt", "b.txt"))
+        self.assertEqual(parsed_args.files, ["a.txt", "b.txt"])
+        self.assertIsInstance(parsed_args.files, list)
+
+    def test_EndOfOptions_ManyArguments(self):
+        paths = ["/path/to/file{}.txt".format(i) for i in range(100000)]
+        parsed_args = self.parse(["-o", "out.txt", "--"] + paths)
+        self.assertEqual(parsed_args.files, paths)
+
+    def test_EndOfOptions_AsValue(self):
+        parsed_args = self.parse(["-o", "--", "a.txt"])
+        self.assertEqual(parsed_args.outputfile, "--")
+        self.assertEqual(parsed_args.files, ["a.txt"])
+
+    def test_EndOfOptions_NoPositionalArgument(self):
+        builder = ArgumentParserSpec.Builder()
+        builder.add_argument(keys=["-o"])
+        parser_class = self.new_ArgumentParser(builder.build())
+        with self.assertRaises(parser_class.UnknownArgument):
+            self.parse(["--", "a.txt"], parser_class=parser_class)
+
+    def test_ListsNotShared(self):
+        parser_class = self.new_ArgumentParser()
+        parsed_args1 = self.parse(["-D", "a", "a.txt"], parser_class=parser_class)
+        parsed_args2 = self.parse([], parser_class=parser_class)
+        self.assertEqual(parsed_args1.define, ["a"])
+        self.assertEqual(parsed_args1.files, ["a.txt"])
+        self.assertEqual(parsed_args2.define, [])
+        self.assertEqual(parsed_args2.files, [])
+
+    def test_ResponseFiles(self):
+        dir_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dir_path)
+        path = os.path.join(dir_path, "rsp")
+        with open(path, "wb") as f:
+            f.write(b"-D a a.txt -- -D b.txt")
+        parser_class = self.new_ArgumentParser(self.new_ArgumentParserSpec(response_files=True))
+        parsed_args = self.parse(["-D", "x", "@" + path, "c.txt"], parser_class=parser_class)
+        self.assertEqual(parsed_args.define, ["x", "a"])
+        self.assertEqual(parsed_args.files, ["a.txt", "-D", "b.txt", "c.txt"])
+
+    def test_Help(self):
+        parser_class = self.new_ArgumentParser()
+        self.assertIn("\nfiles\n    The files to process\n", parser_class.get_help_text())
+
+    def test_print(self):
+        parsed_args = self.parse(["-D", "a", "a.txt"])
+        stdout = io.StringIO()
+        parsed_args.print(stdout)
+        self.assertEqual(stdout.getvalue(), "--output-file [not set]\n--define ['a']\nfiles ['a.txt']\n")
+
+    def parse(self, args, parser_class=None):
+        if parser_class is None:
+            parser_class = self.new_ArgumentParser()
+        return parser_class(stdout=io.StringIO(), stderr=io.StringIO()).parse(args, no_exit=True)
+
+    def new_ArgumentParser(self, argspec=None):
+        if argspec is None:
+            argspec = self.new_ArgumentParserSpec()
+        (source,) = self.TARGET_LANGUAGE().generate_to_strings(argspec, newline="\n")
+        namespace = {"__name__": "cligen_generated_parser"}
+        exec(compile(source, "<generated>", "exec"), namespace)
+        return namespace["ArgumentParser"]
+
+    @staticmethod
+    def new_ArgumentParserSpec(response_files=False):
+        builder = ArgumentParserSpec.Builder()
+        builder.add_argument(keys=["-o", "--output-file"], help_text="The file to which to write")
+        builder.add_argument(keys=["-D", "--define"], help_text="A definition",
+                             type=ArgumentParserSpec.Argument.TYPE_REPEATABLE_STRING_VALUE)
+        builder.add_argument(keys=["files"], help_text="The files to process",
+                             type=ArgumentParserSpec.Argument.TYPE_POSITIONAL_LIST)
+        builder.add_help_argument()
+        builder.response_files = response_files
+        return builder.build()
+
+
+class TestPythonFastTargetLanguage_ListArguments(TestPythonTargetLanguage_ListArguments):
+    """
+    Tests the parsing of repeatable and positional arguments by the argument parsers generated by
+    PythonFastTargetLanguage.
+    """
+
+    TARGET_LANGUAGE = PythonFastTargetLanguage
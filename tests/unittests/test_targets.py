@@ -15,11 +15,258 @@
 
 import os
 import shutil
+import stat
 import tempfile
 import unittest
+import unittest.mock
 
+import cligen.targets
 from cligen.targets import Jinja2TargetLanguageBase
+from cligen.targets import TargetLanguageBase
+from cligen.targets import TargetRegistry
 from cligen.argspec import ArgumentParserSpec
+from cligen.target_python import PythonTargetLanguage
+
+
+class TestTargetRegistry_load(unittest.TestCase):
+
+    def test_BuiltinTargets(self):
+        x = TargetRegistry()
+        targets = x.load()
+        self.assertEqual(targets["c"].key, "c")
+        self.assertEqual(targets["java"].key, "java")
+        self.assertEqual(targets["python"].key, "python")
+        self.assertEqual(targets["python-fast"].key, "python-fast")
+        self.assertIn("python", list(targets))
+
+    def test_SameObjectReturnedEachTime(self):
+        targets = TargetRegistry().load()
+        self.assertIs(targets["python"], targets["python"])
+
+    def test_InvalidKey(self):
+        targets = TargetRegistry().load()
+        with self.assertRaises(KeyError):
+            targets["invalid key"]
+
+
+class TestTargetRegistry_Targets(unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.created_keys = []
+        self.plugin_load_count = 0
+
+    def test_getitem_Builtin_PluginsNotLoaded(self):
+        x = self.new_Targets()
+        self.assertEqual(x["a"].key, "a")
+        self.assertEqual(self.plugin_load_count, 0)
+
+    def test_getitem_OnlyRequestedTargetCreated(self):
+        x = self.new_Targets()
+        x["b"]
+        self.assertEqual(self.created_keys, ["b"])
+
+    def test_getitem_Plugin(self):
+        x = self.new_Targets()
+        self.assertEqual(x["p"].key, "p")
+        self.assertEqual(self.plugin_load_count, 1)
+
+    def test_getitem_BuiltinTakesPrecedenceOverPlugin(self):
+        x = self.new_Targets()
+        self.assertEqual(x["a"].name, "builtin")
+
+    def test_iter_IncludesPlugins(self):
+        x = self.new_Targets()
+        self.assertEqual(sorted(x), ["a", "b", "p"])
+        self.assertEqual(self.created_keys, [])
+
+    def test_len_IncludesPlugins(self):
+        x = self.new_Targets()
+        self.assertEqual(len(x), 3)
+
+    def test_loaded_keys_PluginsNotLoaded(self):
+        x = self.new_Targets()
+        self.assertEqual(sorted(x.loaded_keys()), ["a", "b"])
+        self.assertEqual(self.plugin_load_count, 0)
+        self.assertEqual(self.created_keys, [])
+
+    def test_loaded_keys_PluginsAlreadyLoaded(self):
+        x = self.new_Targets()
+        x["p"]
+        self.assertEqual(sorted(x.loaded_keys()), ["a", "b", "p"])
+
+    def test_PluginsLoadedOnce(self):
+        x = self.new_Targets()
+        list(x)
+        len(x)
+        x["p"]
+        self.assertEqual(self.plugin_load_count, 1)
+
+    def new_Targets(self):
+        factories = {
+            "a": self.factory("a", "builtin"),
+            "b": self.factory("b", "builtin"),
+        }
+        return TargetRegistry.Targets(factories, self.load_plugin_factories)
+
+    def load_plugin_factories(self):
+        self.plugin_load_count += 1
+        return {
+            "a": self.factory("a", "plugin"),
+            "p": self.factory("p", "plugin"),
+        }
+
+    def factory(self, key, name):
+        def f():
+            self.created_keys.append(key)
+            return TargetLanguageBase(key=key, name=name, output_files=())
+        return f
+
+
+class Test_TargetLanguageBase_resolve_output_file_paths(unittest.TestCase):
+
+    def test_None(self):
+        x = self.new_TargetLanguageBase()
+        self.assertEqual(x.resolve_output_file_paths(None), ("cligen.c", "cligen.h"))
+
+    def test_Specified(self):
+        x = self.new_TargetLanguageBase()
+        self.assertEqual(x.resolve_output_file_paths(["a.c", "a.h"]), ("a.c", "a.h"))
+
+    def test_WrongLength(self):
+        x = self.new_TargetLanguageBase()
+        with self.assertRaises(RuntimeError) as cm:
+            x.resolve_output_file_paths(["a.c"])
+        self.assertEqual("{}".format(cm.exception), "len(output_file_paths)==1 (expected 2)")
+
+    @staticmethod
+    def new_TargetLanguageBase():
+        return TargetLanguageBase(key="c", name="C", output_files=(
+            TargetLanguageBase.OutputFileInfo(name="source file", default_value="cligen.c"),
+            TargetLanguageBase.OutputFileInfo(name="header file", default_value="cligen.h"),
+        ))
+
+
+class Test_Jinja2TargetLanguageBase_dependency_paths(unittest.TestCase):
+
+    def test(self):
+        output_files = [
+            Jinja2TargetLanguageBase.OutputFileInfo(
+                name="test1", default_value="test1.txt", template_name="test.txt"),
+            Jinja2TargetLanguageBase.OutputFileInfo(
+                name="test2", default_value="test2.txt", template_name="test2.txt"),
+        ]
+        x = Jinja2TargetLanguageBase(key="test", name="test", output_files=output_files)
+
+        templates_dir = os.path.join(os.path.dirname(cligen.targets.__file__), "templates")
+        expected = (
+            os.path.abspath(cligen.targets.__file__),
+            os.path.join(templates_dir, "test.txt"),
+            os.path.join(templates_dir, "test2.txt"),
+        )
+        self.assertEqual(x.dependency_paths(), expected)
+
+
+class Test_Jinja2TargetLanguageBase_template_environment(unittest.TestCase):
+
+    def test_SameInstance(self):
+        x = self.new_Jinja2TargetLanguageBase(key="test")
+        self.assertIs(x.template_environment(), x.template_environment())
+
+    def test_DifferentInstances_SameKey(self):
+        x1 = self.new_Jinja2TargetLanguageBase(key="test")
+        x2 = self.new_Jinja2TargetLanguageBase(key="test")
+        self.assertIs(x1.template_environment(), x2.template_environment())
+
+    def test_DifferentInstances_DifferentKeys(self):
+        x1 = self.new_Jinja2TargetLanguageBase(key="test1")
+        x2 = self.new_Jinja2TargetLanguageBase(key="test2")
+        self.assertIsNot(x1.template_environment(), x2.template_environment())
+
+    def test_DifferentCacheDirs(self):
+        x = self.new_Jinja2TargetLanguageBase(key="test")
+        self.assertIsNot(x.template_environment(None), x.template_environment("abc"))
+
+    def test_CacheDir_CompiledTemplatesPersisted(self):
+        cache_dir = tempfile.mkdtemp("Test_Jinja2TargetLanguageBase_template_environment")
+        self.addCleanup(shutil.rmtree, cache_dir)
+        x = self.new_Jinja2TargetLanguageBase(key="test")
+        x.generate(
+            argspec=Test_Jinja2TargetLanguageBase_generate.sample_argspec(),
+            output_file_paths=[os.path.join(cache_dir, "test.txt")],
+            encoding="utf8",
+            newline="\n",
+            cache_dir=cache_dir,
+        )
+        self.assertEqual(len(os.listdir(os.path.join(cache_dir, "templates"))), 1)
+
+    @staticmethod
+    def new_Jinja2TargetLanguageBase(key):
+        output_file = Jinja2TargetLanguageBase.OutputFileInfo(
+            name="test",
+            default_value="test.generated.txt",
+            template_name="test.txt",
+        )
+        return Jinja2TargetLanguageBase(key=key, name=key, output_files=[output_file])
+
+
+class Test_Jinja2TargetLanguageBase_generate_to_strings(unittest.TestCase):
+
+    def test_Text(self):
+        x = Test_Jinja2TargetLanguageBase_generate.sample_Jinja2TargetLanguageBase()
+        actual = x.generate_to_strings(self.sample_argspec(), newline="\n")
+        self.assertEqual(actual, (Test_Jinja2TargetLanguageBase_generate.generated_test_txt(),))
+
+    def test_Newline(self):
+        x = Test_Jinja2TargetLanguageBase_generate.sample_Jinja2TargetLanguageBase()
+        actual = x.generate_to_strings(self.sample_argspec(), newline="\r\n")
+        self.assertEqual(actual, (Test_Jinja2TargetLanguageBase_generate.generated_test_txt("\r\n"),))
+
+    def test_NewlineNone(self):
+        x = Test_Jinja2TargetLanguageBase_generate.sample_Jinja2TargetLanguageBase()
+        actual = x.generate_to_strings(self.sample_argspec())
+        self.assertEqual(actual, (Test_Jinja2TargetLanguageBase_generate.generated_test_txt(os.linesep),))
+
+    def test_Encoding(self):
+        x = Test_Jinja2TargetLanguageBase_generate.sample_Jinja2TargetLanguageBase()
+        actual = x.generate_to_strings(self.sample_argspec(), encoding="utf16", newline="\n")
+        self.assertEqual(actual, (Test_Jinja2TargetLanguageBase_generate.generated_test_txt().encode("utf16"),))
+
+    def test_Encoding_Fails(self):
+        x = Test_Jinja2TargetLanguageBase_generate.sample_Jinja2TargetLanguageBase_nonascii()
+        with self.assertRaises(x.Error) as cm:
+            x.generate_to_strings(self.sample_argspec(), encoding="ascii", newline="\n")
+        self.assertEqual(
+            "{}".format(cm.exception),
+            "unable to encode generated code using encoding ascii: test_nonascii ('ascii' codec can't encode "
+            r"character '\xe9' in position 1: ordinal not in range(128))"
+        )
+
+    def test_MultipleOutputFiles(self):
+        x = Test_Jinja2TargetLanguageBase_generate.sample_Jinja2TargetLanguageBase_MultipleOutputFiles()
+        actual = x.generate_to_strings(self.sample_argspec(), newline="\n")
+        self.assertEqual(actual, (
+            Test_Jinja2TargetLanguageBase_generate.generated_test_txt(),
+            Test_Jinja2TargetLanguageBase_generate.generated_test2_txt(),
+        ))
+
+    def test_SameAsGenerate(self):
+        x = PythonTargetLanguage()
+        argspec = self.sample_argspec()
+        dir_path = tempfile.mkdtemp("Test_Jinja2TargetLanguageBase_generate_to_strings")
+        self.addCleanup(shutil.rmtree, dir_path)
+        output_file_path = os.path.join(dir_path, "cligen.py")
+        x.generate(argspec, [output_file_path], encoding="utf8", newline="\r\n")
+        with open(output_file_path, "rb") as f:
+            expected = f.read()
+        self.assertEqual(x.generate_to_strings(argspec, encoding="utf8", newline="\r\n"), (expected,))
+
+    @staticmethod
+    def sample_argspec():
+        builder = ArgumentParserSpec.Builder()
+        builder.add_argument(keys=("-i", "--input-file"), help_text="the file to read")
+        builder.add_argument(keys=("-o", "--output-file"), help_text="the file to write")
+        return builder.build()
 
 
 class Test_Jinja2TargetLanguageBase_generate(unittest.TestCase):
@@ -91,6 +338,59 @@ class Test_Jinja2TargetLanguageBase_generate(unittest.TestCase):
             output_file_initial_contents="Windows\r\nMac\rLinux\n",
         )
 
+    def test_NewlineNone_UTF16(self):
+        self.assert_generate_ok(
+            newline=None,
+            encoding="utf16",
+            expected_newline="\r\n",
+            output_file_initial_contents="ab\r\ncd\r\n",
+        )
+
+    def test_NewlineNone_CarriageReturnAtChunkBoundary(self):
+        for encoding in ("utf8", "utf16"):
+            for (contents, expected_newline) in (("ab\r\ncd", "\r\n"), ("ab\rcd", "\r"), ("ab\r", "\r")):
+                with self.subTest(encoding=encoding, contents=contents):
+                    with unittest.mock.patch.object(TargetLanguageBase, "DETECT_NEWLINE_CHUNK_SIZE", 1):
+                        self.assert_generate_ok(
+                            newline=None,
+                            encoding=encoding,
+                            expected_newline=expected_newline,
+                            output_file_initial_contents=contents,
+                        )
+
+    def test_NewlineNone_NewlineBeyondScanLimit(self):
+        newline_in_file = "\r" if os.linesep != "\r" else "\n"
+        for encoding in ("utf8", "utf16"):
+            with self.subTest(encoding=encoding):
+                with unittest.mock.patch.object(TargetLanguageBase, "DETECT_NEWLINE_MAX_BYTES", 32):
+                    self.assert_generate_ok(
+                        newline=None,
+                        encoding=encoding,
+                        expected_newline=os.linesep,
+                        output_file_initial_contents=("x" * 100) + newline_in_file,
+                    )
+
+    def test_NewlineNone_DecodingFailsAfterNewline(self):
+        output_file_path = os.path.join(self.create_temp_dir(), "test.txt")
+        with open(output_file_path, "wb") as f:
+            f.write(b"ab\r\n\xc3\x28")
+        newline = TargetLanguageBase._detect_newline(output_file_path, "utf8")
+        self.assertEqual(newline, "\r\n")
+
+    def test_NewlineNone_SameFileDetectedOnce(self):
+        x = self.sample_Jinja2TargetLanguageBase_MultipleOutputFiles()
+        output_file_path = os.path.join(self.create_temp_dir(), "test.txt")
+        with open(output_file_path, "wb") as f:
+            f.write(b"ab\r\n")
+
+        with unittest.mock.patch.object(
+                x, "_detect_newline", wraps=x._detect_newline) as detect_newline:
+            output_files = tuple(
+                x._resolved_output_files([output_file_path, output_file_path], "utf8", None))
+
+        self.assertEqual(detect_newline.call_count, 1)
+        self.assertEqual([output_file.newline for output_file in output_files], ["\r\n", "\r\n"])
+
     def test_Encoding_None(self):
         self.assert_generate_ok(encoding=None, effective_encoding="utf8")
 
@@ -118,6 +418,98 @@ class Test_Jinja2TargetLanguageBase_generate(unittest.TestCase):
             "ordinal not in range(128))"
         )
 
+    def test_ExistingFileUnchanged_NotRewritten(self):
+        (output_file_path, mtime_ns) = self.generate_twice(modify=None)
+        self.assertEqual(os.stat(output_file_path).st_mtime_ns, mtime_ns)
+
+    def test_ExistingFileDifferentSize_Rewritten(self):
+        def modify(f):
+            f.seek(0, os.SEEK_END)
+            f.write(b"x")
+        (output_file_path, mtime_ns) = self.generate_twice(modify=modify)
+        self.assertNotEqual(os.stat(output_file_path).st_mtime_ns, mtime_ns)
+        with open(output_file_path, "rb") as f:
+            self.assertEqual(f.read().decode("utf8"), self.generated_test_txt())
+
+    def test_ExistingFileSameSizeDifferentContents_Rewritten(self):
+        def modify(f):
+            f.seek(-2, os.SEEK_END)
+            f.write(b"x")
+        (output_file_path, mtime_ns) = self.generate_twice(modify=modify)
+        self.assertNotEqual(os.stat(output_file_path).st_mtime_ns, mtime_ns)
+        with open(output_file_path, "rb") as f:
+            self.assertEqual(f.read().decode("utf8"), self.generated_test_txt())
+
+    def generate_twice(self, modify):
+        x = self.sample_Jinja2TargetLanguageBase()
+        output_file_path = os.path.join(self.create_temp_dir(), "test.txt")
+        x.generate(self.sample_argspec(), [output_file_path], encoding="utf8", newline="\n")
+        if modify is not None:
+            with open(output_file_path, "r+b") as f:
+                modify(f)
+
+        # set the modification time far into the past so that a rewrite is detectable
+        os.utime(output_file_path, ns=(1000000000, 1000000000))
+        x.generate(self.sample_argspec(), [output_file_path], encoding="utf8", newline="\n")
+
+        return (output_file_path, 1000000000)
+
+    def test_EncodingFails_ExistingFileUnchanged(self):
+        x = self.sample_Jinja2TargetLanguageBase_nonascii()
+        dir_path = self.create_temp_dir()
+        output_file_path = os.path.join(dir_path, "test.txt")
+        with open(output_file_path, "wb") as f:
+            f.write(b"original contents")
+
+        with self.assertRaises(x.Error):
+            x.generate(self.sample_argspec(), [output_file_path], encoding="ascii", newline="\n")
+
+        with open(output_file_path, "rb") as f:
+            self.assertEqual(f.read(), b"original contents")
+        self.assertEqual(os.listdir(dir_path), ["test.txt"])
+
+    def test_ExistingFileModePreserved(self):
+        x = self.sample_Jinja2TargetLanguageBase()
+        output_file_path = os.path.join(self.create_temp_dir(), "test.txt")
+        with open(output_file_path, "wb"):
+            pass
+        os.chmod(output_file_path, 0o640)
+
+        x.generate(self.sample_argspec(), [output_file_path], encoding="utf8", newline="\n")
+
+        self.assertEqual(stat.S_IMODE(os.stat(output_file_path).st_mode), 0o640)
+
+    def test_SmallChunks(self):
+        with unittest.mock.patch.object(Jinja2TargetLanguageBase, "GENERATED_CODE_CHUNK_SIZE", 1):
+            self.assert_generate_ok(newline="\r\n")
+
+    def test_encode_error_message_FirstChunk(self):
+        e = self.new_UnicodeEncodeError("abc\xe9", "ascii")
+        message = Jinja2TargetLanguageBase._encode_error_message(e, 0)
+        self.assertEqual(message, "{}".format(e))
+
+    def test_encode_error_message_LaterChunk(self):
+        for c in ("\xe9", "\u20ac", "\U0001f600"):
+            with self.subTest(c=c):
+                e1 = self.new_UnicodeEncodeError("0123456789" + c, "ascii")
+                e2 = self.new_UnicodeEncodeError("6789" + c, "ascii")
+                message = Jinja2TargetLanguageBase._encode_error_message(e2, 6)
+                self.assertEqual(message, "{}".format(e1))
+
+    def test_encode_error_message_LaterChunk_MultipleCharacters(self):
+        e1 = self.new_UnicodeEncodeError("0123456789\xe9\xe9\xe9", "ascii")
+        e2 = self.new_UnicodeEncodeError("6789\xe9\xe9\xe9", "ascii")
+        message = Jinja2TargetLanguageBase._encode_error_message(e2, 6)
+        self.assertEqual(message, "{}".format(e1))
+
+    @staticmethod
+    def new_UnicodeEncodeError(s, encoding):
+        try:
+            s.encode(encoding)
+        except UnicodeEncodeError as e:
+            return e
+        raise AssertionError("encoding should have failed: {!r}".format(s))
+
     def test_OutputFiles_None(self):
         dir_path = self.create_temp_dir()
         old_cwd = os.getcwd()
@@ -0,0 +1,126 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import jinja2
+
+from cligen.template_cache import TemplateBytecodeCache
+
+
+class TestTemplateBytecodeCache(unittest.TestCase):
+
+    TEMPLATE_SOURCE = "Hello {{ name }}"
+
+    def test_InMemory_Miss(self):
+        x = TemplateBytecodeCache()
+        bucket = self.get_bucket(x)
+        self.assertIsNone(bucket.code)
+
+    def test_InMemory_Hit(self):
+        x = TemplateBytecodeCache()
+        self.compile_template(x)
+        bucket = self.get_bucket(x)
+        self.assertIsNotNone(bucket.code)
+
+    def test_InMemory_SourceChanged(self):
+        x = TemplateBytecodeCache()
+        self.compile_template(x)
+        bucket = self.get_bucket(x, source="Goodbye {{ name }}")
+        self.assertIsNone(bucket.code)
+
+    def test_InMemory_DoesNotWriteFiles(self):
+        x = TemplateBytecodeCache()
+        self.compile_template(x)
+        self.assertIsNone(x.dir_path)
+
+    def test_clear(self):
+        x = TemplateBytecodeCache()
+        self.compile_template(x)
+        x.clear()
+        bucket = self.get_bucket(x)
+        self.assertIsNone(bucket.code)
+
+    def test_Directory_CreatedIfMissing(self):
+        dir_path = os.path.join(self.create_temp_dir(), "a", "b")
+        x = TemplateBytecodeCache(dir_path)
+        self.compile_template(x)
+        self.assertEqual(len(os.listdir(dir_path)), 1)
+
+    def test_Directory_SharedBetweenInstances(self):
+        dir_path = self.create_temp_dir()
+        x1 = TemplateBytecodeCache(dir_path)
+        self.compile_template(x1)
+
+        x2 = TemplateBytecodeCache(dir_path)
+        bucket = self.get_bucket(x2)
+        self.assertIsNotNone(bucket.code)
+
+    def test_Directory_SourceChanged(self):
+        dir_path = self.create_temp_dir()
+        x1 = TemplateBytecodeCache(dir_path)
+        self.compile_template(x1)
+
+        x2 = TemplateBytecodeCache(dir_path)
+        bucket = self.get_bucket(x2, source="Goodbye {{ name }}")
+        self.assertIsNone(bucket.code)
+
+    def test_Directory_CorruptFile(self):
+        dir_path = self.create_temp_dir()
+        x1 = TemplateBytecodeCache(dir_path)
+        self.compile_template(x1)
+        for file_name in os.listdir(dir_path):
+            with open(os.path.join(dir_path, file_name), "wb") as f:
+                f.write(b"garbage")
+
+        x2 = TemplateBytecodeCache(dir_path)
+        bucket = self.get_bucket(x2)
+        self.assertIsNone(bucket.code)
+
+    def test_Directory_Unwritable(self):
+        dir_path = self.create_temp_dir()
+        file_path = os.path.join(dir_path, "file")
+        with open(file_path, "wb"):
+            pass
+
+        # the directory cannot be created since a file exists at its path; compiling the template
+        # must succeed regardless
+        x = TemplateBytecodeCache(file_path)
+        template = self.compile_template(x)
+        self.assertEqual(template.render(name="Bob"), "Hello Bob")
+
+    def compile_template(self, bytecode_cache):
+        env = self.new_environment(bytecode_cache)
+        return env.get_template("test.txt")
+
+    def get_bucket(self, bytecode_cache, source=None):
+        if source is None:
+            source = self.TEMPLATE_SOURCE
+        env = self.new_environment(bytecode_cache)
+        return bytecode_cache.get_bucket(env, "test.txt", None, source)
+
+    def new_environment(self, bytecode_cache):
+        return jinja2.Environment(
+            loader=jinja2.DictLoader({"test.txt": self.TEMPLATE_SOURCE}),
+            bytecode_cache=bytecode_cache,
+        )
+
+    def create_temp_dir(self):
+        path = tempfile.mkdtemp("TestTemplateBytecodeCache")
+        self.addCleanup(shutil.rmtree, path)
+        return path
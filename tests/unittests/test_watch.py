@@ -0,0 +1,116 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import ctypes
+import errno
+import os
+import shutil
+import tempfile
+import unittest
+
+from cligen.watch import InotifyFileWatcher
+from cligen.watch import PollingFileWatcher
+
+
+class FileWatcherTestsMixin:
+    """
+    Tests that apply to every FileWatcher implementation; subclasses must also extend
+    unittest.TestCase and implement new_FileWatcher().
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.dir_path = tempfile.mkdtemp("TestFileWatcher")
+        self.addCleanup(shutil.rmtree, self.dir_path)
+        self.path1 = self.create_file("file1.txt", b"file 1")
+        self.path2 = self.create_file("file2.txt", b"file 2")
+        self.x = self.new_FileWatcher()
+        self.addCleanup(self.x.close)
+        self.x.set_paths([self.path1, self.path2])
+
+    def test_wait_NoChanges(self):
+        self.assertEqual(self.x.wait(0.05), set())
+
+    def test_wait_FileModified(self):
+        self.create_file("file1.txt", b"file 1 modified")
+        self.assertEqual(self.x.wait(5), {self.path1})
+
+    def test_wait_FileReplaced(self):
+        temp_path = self.create_file("file2.txt.tmp", b"file 2 replaced")
+        os.replace(temp_path, self.path2)
+        self.assertEqual(self.x.wait(5), {self.path2})
+
+    def test_wait_FileDeleted(self):
+        os.unlink(self.path1)
+        self.assertEqual(self.x.wait(5), {self.path1})
+
+    def test_wait_UnwatchedFileModified(self):
+        self.create_file("file3.txt", b"file 3")
+        self.assertEqual(self.x.wait(0.05), set())
+
+    def test_wait_ChangeReportedOnce(self):
+        self.create_file("file1.txt", b"file 1 modified")
+        self.x.wait(5)
+        self.assertEqual(self.x.wait(0.05), set())
+
+    def test_set_paths_PathRemoved(self):
+        self.x.set_paths([self.path2])
+        self.create_file("file1.txt", b"file 1 modified")
+        self.assertEqual(self.x.wait(0.05), set())
+
+    def test_set_paths_ChangeBeforeSetPathsReported(self):
+        self.create_file("file1.txt", b"file 1 modified")
+        self.x.set_paths([self.path1, self.path2])
+        self.assertEqual(self.x.wait(5), {self.path1})
+
+    def create_file(self, name, contents):
+        path = os.path.join(self.dir_path, name)
+        with open(path, "wb") as f:
+            f.write(contents)
+        return path
+
+
+class TestPollingFileWatcher(FileWatcherTestsMixin, unittest.TestCase):
+
+    def new_FileWatcher(self):
+        return PollingFileWatcher(interval=0.01)
+
+    def create_file(self, name, contents):
+        path = super().create_file(name, contents)
+        # ensure that the change is detectable even if the modification time is unchanged due to
+        # the coarse resolution of the file system's timestamps
+        os.utime(path, ns=(len(contents), len(contents) * 1000000000))
+        return path
+
+
+class TestInotifyFileWatcher(FileWatcherTestsMixin, unittest.TestCase):
+
+    def new_FileWatcher(self):
+        try:
+            return InotifyFileWatcher()
+        except InotifyFileWatcher.Error as e:
+            self.skipTest("{}".format(e))
+
+    def test_set_paths_OutOfWatches(self):
+        def inotify_add_watch(fd, path, mask):
+            ctypes.set_errno(errno.ENOSPC)
+            return -1
+
+        self.x._inotify_add_watch = inotify_add_watch
+        sub_dir_path = os.path.join(self.dir_path, "sub")
+        os.mkdir(sub_dir_path)
+        with self.assertRaises(OSError) as cm:
+            self.x.set_paths([self.path1, os.path.join(sub_dir_path, "a.txt")])
+        self.assertEqual(cm.exception.errno, errno.ENOSPC)
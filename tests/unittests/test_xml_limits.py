@@ -0,0 +1,180 @@
+# Copyright 2015 Denver Coneybeare <denver@sleepydragon.org>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from cligen.xml_limits import XmlLimits
+
+
+class TestXmlLimits(unittest.TestCase):
+
+    def test_check_string_WithinLimits(self):
+        x = XmlLimits(max_size=100, max_element_count=3, max_depth=2, max_entity_expansion=6)
+        x.check_string("<!DOCTYPE a [<!ENTITY e \"abc\">]><a><b>&e;</b><b>&e;</b></a>")
+
+    def test_check_string_max_size(self):
+        x = XmlLimits(max_size=10)
+        with self.assertRaises(x.LimitExceeded) as cm:
+            x.check_string("<a>text</a>")
+        self.assertEqual("{}".format(cm.exception), "size of document exceeds the limit of 10 bytes")
+
+    def test_check_string_max_element_count(self):
+        x = XmlLimits(max_element_count=3)
+        with self.assertRaises(x.LimitExceeded) as cm:
+            x.check_string(b"<a><b/><b/><b/></a>")
+        self.assertEqual("{}".format(cm.exception), "number of elements exceeds the limit of 3")
+
+    def test_check_string_max_depth(self):
+        x = XmlLimits(max_depth=2)
+        with self.assertRaises(x.LimitExceeded) as cm:
+            x.check_string("<a><b><c/></b></a>")
+        self.assertEqual("{}".format(cm.exception), "depth of nested elements exceeds the limit of 2")
+
+    def test_check_include_depth(self):
+        x = XmlLimits(max_include_depth=2)
+        x.check_include_depth(2)
+        with self.assertRaises(x.LimitExceeded) as cm:
+            x.check_include_depth(3)
+        self.assertEqual("{}".format(cm.exception), "depth of nested included files exceeds the limit of 2")
+
+    def test_check_include_depth_NoLimit(self):
+        XmlLimits(max_include_depth=None).check_include_depth(1000)
+
+    def test_check_string_max_entity_expansion_SingleEntity(self):
+        x = XmlLimits(max_entity_expansion=8)
+        with self.assertRaises(x.LimitExceeded) as cm:
+            x.check_string("<!DOCTYPE a [<!ENTITY e1 \"abc\"><!ENTITY e2 \"&e1;&e1;&e1;\">]><a/>")
+        self.assertEqual("{}".format(cm.exception), "expansion of entity e2 exceeds the limit of 8 characters")
+
+    def test_check_string_max_entity_expansion_References(self):
+        x = XmlLimits(max_entity_expansion=8)
+        with self.assertRaises(x.LimitExceeded) as cm:
+            x.check_string("<!DOCTYPE a [<!ENTITY e \"abc\">]><a x=\"&e;\">&e;<b>&e;</b></a>")
+        self.assertEqual("{}".format(cm.exception), "expansion of entities exceeds the limit of 8 characters")
+
+    def test_check_string_max_entity_expansion_Bytes(self):
+        x = XmlLimits(max_entity_expansion=8)
+        xml_bytes = "<?xml version=\"1.0\" encoding=\"utf-16\"?><!DOCTYPE a [<!ENTITY e \"abc\">]><a>&e;&e;&e;</a>"
+        with self.assertRaises(x.LimitExceeded):
+            x.check_string(xml_bytes.encode("utf-16"))
+
+    def test_check_string_max_entity_expansion_PredefinedAndCharacterReferencesIgnored(self):
+        x = XmlLimits(max_entity_expansion=0)
+        x.check_string("<a>&amp;&lt;&#65;&#x41;</a>")
+
+    def test_check_string_max_entity_expansion_RecursiveEntity(self):
+        # the recursion is reported as an error by the XML backend
+        x = XmlLimits(max_entity_expansion=100)
+        x.check_string("<!DOCTYPE a [<!ENTITY e1 \"a&e2;\"><!ENTITY e2 \"b&e1;\">]><a>&e1;</a>")
+
+    def test_check_string_max_entity_expansion_LongChainOfEntities(self):
+        entity_decls = "".join("<!ENTITY e{} \"&e{};\">".format(i, i + 1) for i in range(10000))
+        xml_string = "<!DOCTYPE a [{}<!ENTITY e10000 \"abc\">]><a>&e0;</a>".format(entity_decls)
+        XmlLimits(max_size=None, max_entity_expansion=3).check_string(xml_string)
+        with self.assertRaises(XmlLimits.LimitExceeded):
+            XmlLimits(max_size=None, max_entity_expansion=2).check_string(xml_string)
+
+    def test_check_string_NotWellFormed(self):
+        x = XmlLimits(max_element_count=2)
+        x.check_string("<a><unclosed></a><b/>")
+        x.check_string("<!DOCTYPE")
+
+    def test_check_string_Unlimited(self):
+        x = XmlLimits(max_size=None, max_element_count=None, max_depth=None, max_entity_expansion=None)
+        x.check_string("<!DOCTYPE a [<!ENTITY e \"abc\">]>" + "<a>" * 100 + "&e;" * 100 + "</a>" * 100)
+
+    def test_open_Path(self):
+        path = self.write_file(b"<a/>")
+        with XmlLimits().open(path) as f:
+            self.assertEqual(f.read(), b"<a/>")
+
+    def test_open_Path_max_size(self):
+        path = self.write_file(b"<a>text</a>")
+        x = XmlLimits(max_size=10)
+        with self.assertRaises(x.LimitExceeded):
+            x.open(path)
+
+    def test_open_Path_DoesNotExist(self):
+        with self.assertRaises(FileNotFoundError):
+            XmlLimits().open(os.path.join(self.new_temp_dir(), "does_not_exist.xml"))
+
+    def test_open_FileObject_max_size(self):
+        x = XmlLimits(max_size=100)
+        with self.assertRaises(x.LimitExceeded) as cm:
+            with x.open(io.BytesIO(b"<a>" + b" " * 200 + b"</a>")) as f:
+                f.read()
+        self.assertEqual("{}".format(cm.exception), "size of document exceeds the limit of 100 bytes")
+
+    def test_open_FileObject_NotClosed(self):
+        source = io.BytesIO(b"<a/>")
+        with XmlLimits().open(source):
+            pass
+        self.assertFalse(source.closed)
+
+    def test_open_FileObject_EntitiesDeclared_ContentsReadAgain(self):
+        xml_bytes = b"<!DOCTYPE a [<!ENTITY e \"abc\">]><a>" + b"&e;" * 10000 + b"</a>"
+        with XmlLimits(max_entity_expansion=30000).open(io.BytesIO(xml_bytes)) as f:
+            self.assertEqual(f.read(), xml_bytes)
+
+    def test_open_FileObject_NoEntities_ReadingStopsAtRootElement(self):
+        xml_bytes = b"<a>" + b" " * (XmlLimits.CHUNK_SIZE * 4) + b"</a>"
+        source = io.BytesIO(xml_bytes)
+        with XmlLimits().open(source) as f:
+            self.assertEqual(source.tell(), XmlLimits.CHUNK_SIZE)
+            self.assertEqual(f.read(5), b"<a>  ")
+            self.assertEqual(b"<a>  " + f.read(), xml_bytes)
+
+    def test_open_FileObject_max_entity_expansion(self):
+        x = XmlLimits(max_entity_expansion=29999)
+        xml_bytes = b"<!DOCTYPE a [<!ENTITY e \"abc\">]><a>" + b"&e;" * 10000 + b"</a>"
+        with self.assertRaises(x.LimitExceeded):
+            x.open(io.BytesIO(xml_bytes))
+
+    def test_LimitedReader_unread_ReadInSmallChunks(self):
+        f = XmlLimits.LimitedReader(io.BytesIO(b"ghi"), max_size=None, close=True)
+        f.unread(b"abcdef")
+        self.assertEqual([f.read(2), f.read(2), f.read(4), f.read(4), f.read(4)], [b"ab", b"cd", b"ef", b"ghi", b""])
+
+    def test_LimitedReader_unread_PartiallyRead(self):
+        f = XmlLimits.LimitedReader(io.BytesIO(b"ghi"), max_size=None, close=True)
+        f.unread(b"def")
+        self.assertEqual(f.read(1), b"d")
+        f.unread(b"abc")
+        self.assertEqual(f.read(4), b"abce")
+        self.assertEqual(f.read(), b"fghi")
+
+    def test_LimitedReader_unread_readinto(self):
+        f = XmlLimits.LimitedReader(io.BytesIO(b""), max_size=None, close=True)
+        f.unread(b"abcdef")
+        buffer = bytearray(4)
+        self.assertEqual(f.readinto(buffer), 4)
+        self.assertEqual(buffer, b"abcd")
+        self.assertEqual(f.readinto(buffer), 2)
+        self.assertEqual(buffer[:2], b"ef")
+
+    def new_temp_dir(self):
+        path = tempfile.mkdtemp("TestXmlLimits")
+        self.addCleanup(shutil.rmtree, path)
+        return path
+
+    def write_file(self, contents):
+        path = os.path.join(self.new_temp_dir(), "cligen.xml")
+        with open(path, "wb") as f:
+            f.write(contents)
+        return path